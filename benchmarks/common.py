@@ -0,0 +1,98 @@
+"""
+Helpers shared by the benchmarks: timing, percentiles and the JSON result files.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = REPO_ROOT / "benchmarks" / "results"
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    """
+    What the numbers depend on besides the code: commit, interpreter and machine.
+    """
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "system": platform.platform(),
+        "cpus": _cpu_count(),
+    }
+
+
+def _cpu_count() -> Optional[int]:
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+
+
+def peak_rss_mb() -> float:
+    """
+    Largest resident set size of this process so far, in MiB.
+    """
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in KiB on Linux and in bytes on macOS
+    return round(peak / (1024 * 1024 if platform.system() == "Darwin" else 1024), 1)
+
+
+def latency_summary(latencies: Sequence[float]) -> Dict[str, float]:
+    """
+    p50/p95/p99 and mean of `latencies` (seconds), in milliseconds.
+    """
+    ms = np.asarray(latencies, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"p50_ms": round(p50, 3), "p95_ms": round(p95, 3), "p99_ms": round(p99, 3), "mean_ms": round(ms.mean(), 3)}
+
+
+def run_concurrently(call: Callable[[Any], Any], items: Sequence[Any], threads: int) -> Tuple[List[Any], List[float], float]:
+    """
+    Run `call` on every item from `threads` threads.
+
+    Returns:
+        (results in item order, per-call latencies in seconds, wall time in seconds)
+    """
+    def timed(item):
+        start = time.perf_counter()
+        result = call(item)
+        return result, time.perf_counter() - start
+
+    start = time.perf_counter()
+    if threads == 1:
+        timings = [timed(item) for item in items]
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            timings = list(pool.map(timed, items))
+    wall = time.perf_counter() - start
+    return [result for result, _ in timings], [latency for _, latency in timings], wall
+
+
+def write_results(name: str, results: Dict[str, Any], output: Optional[str] = None) -> Path:
+    """
+    Write `results` with the environment as JSON, by default to benchmarks/results/<name>-<commit>.json.
+    """
+    path = Path(output) if output else RESULTS_DIR / f"{name}-{git_commit() or 'unknown'}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"benchmark": name, "environment": environment(), **results}, indent=2) + "\n")
+    return path
@@ -0,0 +1,512 @@
+"""
+End-to-end ingestion benchmark: throughput of every stage between files on disk and
+chunks in the vector store, on a synthetic corpus of plain text, HTML, PDF and .eml
+files plus a Thunderbird mbox.
+
+The corpus is read by the client's filesystem and Thunderbird sources, queued through
+the /queue/add_batch route in the client's batch size and indexed by the server's
+run_indexing_process, all in this process and against a throwaway metadata DB. Discovery
+finishes before indexing starts, so the two are measured apart; in production they overlap.
+
+Reported per stage:
+    extract   documents, parts and extracted text per second, per file type
+    queue     parts per second into the queue
+    index     parts and chunks per second, split into chunking, embedding,
+              vector store and SQLite time; the rest is queue handling and bookkeeping
+and the peak RSS after each stage. Results are written as JSON, by default to
+benchmarks/results/ingestion-<commit>.json, for comparing commits.
+
+Embeddings come from the DummyEmbeddingProvider unless --embedding real, which loads
+LOSEME_EMBEDDING_MODEL; the chunker is LOSEME_CHUNKER. Model calls the chunker makes
+itself (semantic chunking) count as chunking time. The embedding cache is off unless
+--embedding-cache, which starts it empty.
+
+Usage (from project root):
+    PYTHONPATH=server:client:core python -m benchmarks.ingestion
+    PYTHONPATH=server:client:core python -m benchmarks.ingestion --documents 1000 --messages 5000 --store local
+    LOSEME_CHUNKER=sentence PYTHONPATH=server:client:core python -m benchmarks.ingestion --embedding real
+"""
+
+import argparse
+import logging
+import mailbox
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from email.utils import format_datetime
+from itertools import accumulate
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from benchmarks.common import peak_rss_mb, write_results
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s  %(levelname)-8s  %(message)s",
+    datefmt="%H:%M:%S",
+)
+logger = logging.getLogger("benchmark")
+
+VOCABULARY_SIZE = 5000
+# Generated PDFs: words per line and lines per page
+PDF_LINE_WORDS = 12
+PDF_PAGE_LINES = 45
+# Every this many e-mails carries an HTML attachment, which becomes a part of its own
+ATTACHMENT_EVERY = 4
+
+
+class TextGenerator:
+    """
+    Deterministic pseudo-English: made-up words with Zipf-distributed frequencies,
+    in sentences of 6-20 words and paragraphs of 3-7 sentences.
+    """
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        syllables = [consonant + vowel for consonant in "bcdfghklmnprstvz" for vowel in "aeiou"]
+        vocabulary = set()
+        while len(vocabulary) < VOCABULARY_SIZE:
+            vocabulary.add("".join(self.rng.choices(syllables, k=self.rng.randint(1, 3))))
+        self.vocabulary = sorted(vocabulary, key=len)
+        self.cum_weights = list(accumulate(1 / rank for rank in range(1, VOCABULARY_SIZE + 1)))
+
+    def words(self, count: int) -> List[str]:
+        return self.rng.choices(self.vocabulary, cum_weights=self.cum_weights, k=count)
+
+    def sentence(self) -> str:
+        words = self.words(self.rng.randint(6, 20))
+        return " ".join(words).capitalize() + "."
+
+    def paragraphs(self, words: int) -> List[str]:
+        paragraphs = []
+        while words > 0:
+            sentences = [self.sentence() for _ in range(self.rng.randint(3, 7))]
+            paragraphs.append(" ".join(sentences))
+            words -= sum(sentence.count(" ") + 1 for sentence in sentences)
+        return paragraphs
+
+
+def pdf_bytes(pages: List[List[str]]) -> bytes:
+    """
+    A minimal PDF with one line of Helvetica text per string; `pages` holds the lines of each page.
+    """
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, lines in enumerate(pages):
+        objects.append((
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        ).encode())
+        stream = ("BT /F1 10 Tf 12 TL 50 750 Td " + "".join(f"({line}) Tj T* " for line in lines) + "ET").encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+def email_message(text: TextGenerator, i: int, words: int) -> EmailMessage:
+    message = EmailMessage()
+    sender, recipient = text.words(2)
+    message["From"] = f"{sender} <{sender}@example.org>"
+    message["To"] = f"{recipient} <{recipient}@example.org>"
+    message["Subject"] = text.sentence().rstrip(".")
+    message["Date"] = format_datetime(datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=37 * i))
+    message["Message-ID"] = f"<benchmark-{i}@example.org>"
+    message.set_content("\n\n".join(text.paragraphs(words)))
+    if i % ATTACHMENT_EVERY == 0:
+        body = "".join(f"<p>{paragraph}</p>" for paragraph in text.paragraphs(words // 2))
+        message.add_attachment(f"<html><body>{body}</body></html>", subtype="html", filename="notes.html")
+    return message
+
+
+def generate_corpus(root: Path, documents: int, messages: int, words: int, seed: int) -> Dict[str, dict]:
+    """
+    Write `documents` files of each type under root/files and an mbox of `messages` e-mails
+    as root/thunderbird/Inbox. Returns the number of files and bytes per type.
+    """
+    text = TextGenerator(seed)
+    files = root / "files"
+    written = defaultdict(lambda: {"files": 0, "bytes": 0})
+
+    def write(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        kind = written[path.suffix.lstrip(".")]
+        kind["files"] += 1
+        kind["bytes"] += len(data)
+
+    for i in range(documents):
+        write(files / "text" / f"note-{i:06d}.txt", "\n\n".join(text.paragraphs(words)).encode())
+
+        title = text.sentence().rstrip(".")
+        body = "".join(f"<p>{paragraph}</p>\n" for paragraph in text.paragraphs(words))
+        html = f"<!DOCTYPE html>\n<html><head><title>{title}</title></head>\n<body><h1>{title}</h1>\n{body}</body></html>\n"
+        write(files / "html" / f"page-{i:06d}.html", html.encode())
+
+        lines = [" ".join(text.words(PDF_LINE_WORDS)) for _ in range(max(1, words // PDF_LINE_WORDS))]
+        pages = [lines[start:start + PDF_PAGE_LINES] for start in range(0, len(lines), PDF_PAGE_LINES)]
+        write(files / "pdf" / f"report-{i:06d}.pdf", pdf_bytes(pages))
+
+        write(files / "mail" / f"message-{i:06d}.eml", email_message(text, i, words).as_bytes())
+
+    mbox_path = root / "thunderbird" / "Inbox"
+    mbox_path.parent.mkdir(parents=True)
+    mbox = mailbox.mbox(mbox_path)
+    try:
+        for i in range(messages):
+            mbox.add(email_message(text, documents + i, words))
+        mbox.flush()
+    finally:
+        mbox.close()
+    written["mbox"] = {"files": 1, "messages": messages, "bytes": mbox_path.stat().st_size}
+    return dict(written)
+
+
+class StageTimings:
+    """
+    Seconds and calls per stage, accumulated from any thread.
+    """
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.seconds[stage] += seconds
+            self.calls[stage] += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self.seconds)
+
+
+timings = StageTimings()
+
+
+class Timed:
+    """
+    Stands in for `target`, timing calls of `methods` under `stage`; everything else passes through.
+    Calls the target makes on itself are not seen, so nested methods are not counted twice.
+    """
+
+    def __init__(self, target, stage: str, methods: set):
+        self._target = target
+        self._stage = stage
+        self._methods = methods
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        if name not in self._methods:
+            return attribute
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                timings.add(self._stage, time.perf_counter() - start)
+        return timed
+
+    def __len__(self):
+        return len(self._target)
+
+
+def _timed_sqlite(method: Callable) -> Callable:
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timings.add("sqlite", time.perf_counter() - start)
+    return timed
+
+
+class TimedCursor(sqlite3.Cursor):
+    execute = _timed_sqlite(sqlite3.Cursor.execute)
+    executemany = _timed_sqlite(sqlite3.Cursor.executemany)
+    fetchone = _timed_sqlite(sqlite3.Cursor.fetchone)
+    fetchmany = _timed_sqlite(sqlite3.Cursor.fetchmany)
+    fetchall = _timed_sqlite(sqlite3.Cursor.fetchall)
+
+
+class TimedConnection(sqlite3.Connection):
+    """
+    Connection whose statements, fetches and commits count as SQLite time.
+    """
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    # The shortcuts on Connection bypass an overridden cursor(), so route them through it
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
+    commit = _timed_sqlite(sqlite3.Connection.commit)
+    rollback = _timed_sqlite(sqlite3.Connection.rollback)
+
+
+def time_metadata_db(db_path: Path) -> None:
+    """
+    Open connections to the metadata DB at `db_path` as TimedConnection; other databases
+    (the embedding cache, the local vector store's meta) are left alone.
+    """
+    connect = sqlite3.connect
+
+    def timed_connect(database, *args, **kwargs):
+        if Path(database) == db_path:
+            kwargs.setdefault("factory", TimedConnection)
+        return connect(database, *args, **kwargs)
+
+    sqlite3.connect = timed_connect
+
+
+def quiet_loggers() -> None:
+    """
+    Sources and extractors log every file at DEBUG; keep only warnings and the benchmark's own output.
+    """
+    logging.getLogger().setLevel(logging.WARNING)
+    logger.setLevel(logging.INFO)
+    for name, item in list(logging.root.manager.loggerDict.items()):
+        if isinstance(item, logging.Logger) and name != logger.name:
+            item.setLevel(logging.WARNING)
+
+
+def per_second(count: float, seconds: float, digits: int = 1) -> float:
+    return round(count / seconds, digits) if seconds > 0 else 0.0
+
+
+def discover(source, scope, run_id: str, batch_size: int) -> Dict[str, dict]:
+    """
+    Iterate `source` and queue its parts in batches of `batch_size`, as the client does.
+    Returns the extraction figures per file type; queueing time accumulates under "queue".
+    """
+    from api.app.routes.queue import QueueAddBatchRequest, add_batch_to_queue
+    from ingest.queue_client import _part_payload
+    from loseme_core.models import DocumentPart
+
+    def enqueue(parts):
+        start = time.perf_counter()
+        # The payload the client posts, parsed into the model the route receives
+        request = QueueAddBatchRequest(parts=[DocumentPart(**_part_payload(part, scope)) for part in parts], run_id=run_id)
+        add_batch_to_queue(request)
+        timings.add("queue", time.perf_counter() - start)
+
+    extracted = defaultdict(lambda: {"documents": 0, "parts": 0, "text_bytes": 0, "seconds": 0.0})
+    pending = []
+    documents = iter(source.iter_documents())
+    while True:
+        start = time.perf_counter()
+        document = next(documents, None)
+        elapsed = time.perf_counter() - start
+        if document is None:
+            break
+        kind = extracted["mbox" if document.source_type == "thunderbird" else Path(document.source_path).suffix.lstrip(".")]
+        kind["documents"] += 1
+        kind["parts"] += len(document.parts)
+        kind["text_bytes"] += sum(len((part.text or "").encode("utf-8")) for part in document.parts)
+        kind["seconds"] += elapsed
+        pending.extend(document.parts)
+        if len(pending) >= batch_size:
+            enqueue(pending)
+            pending = []
+    if pending:
+        enqueue(pending)
+    return extracted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure ingestion throughput from files on disk to the vector store.")
+    parser.add_argument("--documents", type=int, default=100, help="Files of each type (txt, html, pdf, eml).")
+    parser.add_argument("--messages", type=int, default=400, help="E-mails in the Thunderbird mbox.")
+    parser.add_argument("--words", type=int, default=600, help="Approximate words per document and e-mail.")
+    parser.add_argument("--store", default="in-memory", help="in-memory, local, local-ivf, qdrant[:<profile>] or qdrant-hybrid[:<profile>].")
+    parser.add_argument("--embedding", choices=["dummy", "real"], default="dummy", help="Hash-based dummy vectors or LOSEME_EMBEDDING_MODEL.")
+    parser.add_argument("--embedding-cache", action="store_true", help="Embed through an (initially empty) embedding cache.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--qdrant-url", help="Index into a Qdrant server instead of local mode.")
+    parser.add_argument("--workdir", help="Generate the corpus and databases here and keep them (default: a temporary directory).")
+    parser.add_argument("--verbose", action="store_true", help="Keep the log output of the sources and the server.")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/ingestion-<commit>.json).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="loseme-bench-") as tempdir:
+        workdir = Path(args.workdir or tempdir)
+        workdir.mkdir(parents=True, exist_ok=True)
+        # Read when loseme_core.config is first imported
+        os.environ["LOSEME_EMBEDDING_CACHE_MAX_BYTES"] = str(2 * 1024 ** 3 if args.embedding_cache else 0)
+        os.environ["LOSEME_EMBEDDING_CACHE_PATH"] = str(workdir / "embedding_cache.db")
+        results = run(args, workdir, parser)
+
+    path = write_results("ingestion", results, args.output)
+    logger.info("Results written to %s", path)
+
+
+def run(args, workdir: Path, parser: argparse.ArgumentParser) -> dict:
+    from fastapi import BackgroundTasks
+    from api.app.routes import ingest
+    from api.app.routes.runs import create_indexing_run, mark_discovering_stopped, run_indexing_process, start_indexing_run
+    from benchmarks.vector_search import StoreFactory
+    from cli.config import BATCH_SIZE
+    from loseme_core.config import CHUNKER_TYPE, EMBEDDING_BATCH_SIZE, EMBEDDING_MODEL, INGEST_PART_BATCH_SIZE
+    from loseme_core.filesystem_model import FilesystemIndexingScope
+    from loseme_core.thunderbird_model import ThunderbirdIndexingScope
+    from pipeline.embeddings.dummy import DummyEmbeddingProvider
+    from pipeline.embeddings.registry import model_registry
+    from sources.base.docker_path_translation import is_running_in_docker
+    from sources.filesystem.filesystem_source import FilesystemIngestionSource
+    from sources.thunderbird.thunderbird_source import ThunderbirdIngestionSource
+    from storage.metadata_db import db
+    from storage.metadata_db.indexing_runs import load_run_by_id
+    from storage.vector_db import runtime
+    from wiring import build_chunker
+
+    if args.store.startswith("qdrant-hybrid") and args.embedding == "dummy":
+        parser.error("qdrant-hybrid needs sparse and ColBERT vectors; use --embedding real with LOSEME_EMBEDDING_MODEL=bge-m3")
+    if not args.verbose:
+        quiet_loggers()
+    if is_running_in_docker():
+        # The sources translate host paths to container paths; the corpus is the same path in both
+        os.environ["LOSEME_HOST_ROOT"] = os.environ["LOSEME_CONTAINER_ROOT"] = str(workdir)
+
+    logger.info("Generating %d files per type and %d e-mails of ~%d words", args.documents, args.messages, args.words)
+    start = time.perf_counter()
+    corpus = generate_corpus(workdir / "corpus", args.documents, args.messages, args.words, args.seed)
+    generate_seconds = time.perf_counter() - start
+
+    db.DB_PATH = workdir / "metadata.db"
+    time_metadata_db(db.DB_PATH)
+    db.init_db()
+
+    start = time.perf_counter()
+    provider = model_registry.get_embedding_provider() if args.embedding == "real" else DummyEmbeddingProvider(model_registry.dimension())
+    model_registry.register(EMBEDDING_MODEL, provider)
+    # Built before the provider is wrapped, so a chunker's own model calls count as chunking
+    ingest._chunker = Timed(build_chunker(), "chunking", {"chunk_batch"})
+    model_load_seconds = time.perf_counter() - start
+    model_registry.register(EMBEDDING_MODEL, Timed(provider, "embedding", {"embed_documents", "embed_document"}))
+
+    factory = StoreFactory(workdir, args.qdrant_url, qdrant_path=None)
+    store = factory.open(args.store, model_registry.dimension())
+    runtime._vector_store = Timed(store, "vector_store", {"add_batch", "remove_chunks", "remove_by_document_part_ids"})
+
+    sources = [
+        ("filesystem", FilesystemIndexingScope(directories=[workdir / "corpus" / "files"]), FilesystemIngestionSource),
+        ("thunderbird", ThunderbirdIndexingScope(mbox_path=str(workdir / "corpus" / "thunderbird" / "Inbox")), ThunderbirdIngestionSource),
+    ]
+    run_ids = []
+    extracted = {}
+    before = timings.snapshot()
+    for source_type, scope, source_class in sources:
+        run_id = create_indexing_run({"source_type": source_type, "scope_json": scope.serialize()})["run_id"]
+        # Its background task is never run; indexing starts below, once discovery is done
+        start_indexing_run(run_id, BackgroundTasks())
+        if source_class is FilesystemIngestionSource:
+            # Without the server API to ask for previously ingested tails
+            source = source_class(scope, should_stop=lambda: False, read_tails=False)
+        else:
+            source = source_class(scope, should_stop=lambda: False)
+        logger.info("Extracting and queueing %s documents", source_type)
+        extracted.update(discover(source, scope, run_id, BATCH_SIZE))
+        mark_discovering_stopped(run_id)
+        run_ids.append(run_id)
+    discovery = {stage: seconds - before.get(stage, 0.0) for stage, seconds in timings.snapshot().items()}
+    discovery_rss = peak_rss_mb()
+
+    queued = sum(kind["parts"] for kind in extracted.values())
+    logger.info("Indexing %d queued parts into %s", queued, args.store)
+    before = timings.snapshot()
+    start = time.perf_counter()
+    for run_id in run_ids:
+        run_indexing_process(run_id)
+    index_seconds = time.perf_counter() - start
+    spent = {stage: seconds - before.get(stage, 0.0) for stage, seconds in timings.snapshot().items()}
+    index_rss = peak_rss_mb()
+
+    runs = [load_run_by_id(run_id) for run_id in run_ids]
+    indexed = sum(run.indexed_document_count for run in runs)
+    if indexed != queued or any(run.status != "completed" for run in runs):
+        logger.warning("Indexed %d of %d parts; run status %s", indexed, queued, ", ".join(run.status for run in runs))
+    chunks = store.count_chunks() if hasattr(store, "count_chunks") else len(store)
+
+    for kind, figures in extracted.items():
+        figures.update(
+            documents_per_second=per_second(figures["documents"], figures["seconds"]),
+            mb_per_second=per_second(figures["text_bytes"] / 1024 ** 2, figures["seconds"], digits=2),
+            seconds=round(figures["seconds"], 3),
+        )
+        logger.info(
+            "extract %-5s %6d documents  %8.1f docs/s  %6.2f MB/s",
+            kind, figures["documents"], figures["documents_per_second"], figures["mb_per_second"],
+        )
+    queue_seconds = discovery.get("queue", 0.0)
+    logger.info("queue         %6d parts      %8.1f parts/s  (SQLite %.2fs)", queued, per_second(queued, queue_seconds), discovery.get("sqlite", 0.0))
+    breakdown = {stage: round(spent.get(stage, 0.0), 3) for stage in ("chunking", "embedding", "vector_store", "sqlite")}
+    breakdown["other"] = round(index_seconds - sum(breakdown.values()), 3)
+    logger.info(
+        "index         %6d parts      %8.1f parts/s  %.1f chunks/s  in %.2fs",
+        indexed, per_second(indexed, index_seconds), per_second(chunks, index_seconds), index_seconds,
+    )
+    logger.info("index time    %s", "  ".join(f"{stage} {seconds:.2f}s" for stage, seconds in breakdown.items()))
+    logger.info("peak RSS      %.1f MiB after discovery, %.1f MiB after indexing", discovery_rss, index_rss)
+
+    return {
+        "corpus": {"documents_per_type": args.documents, "messages": args.messages, "words": args.words, "seed": args.seed, "files": corpus},
+        "settings": {
+            "store": args.store,
+            "embedding": EMBEDDING_MODEL if args.embedding == "real" else "dummy",
+            "dimension": model_registry.dimension(),
+            "chunker": CHUNKER_TYPE,
+            "embedding_cache": args.embedding_cache,
+            "queue_batch_size": BATCH_SIZE,
+            "ingest_part_batch_size": INGEST_PART_BATCH_SIZE,
+            "embedding_batch_size": EMBEDDING_BATCH_SIZE,
+        },
+        "stages": {
+            "generate": {"seconds": round(generate_seconds, 3)},
+            "model_load": {"seconds": round(model_load_seconds, 3)},
+            "extract": extracted,
+            "queue": {
+                "parts": queued,
+                "seconds": round(queue_seconds, 3),
+                "parts_per_second": per_second(queued, queue_seconds),
+                "sqlite_seconds": round(discovery.get("sqlite", 0.0), 3),
+            },
+            "index": {
+                "parts": indexed,
+                "chunks": chunks,
+                "seconds": round(index_seconds, 3),
+                "parts_per_second": per_second(indexed, index_seconds),
+                "chunks_per_second": per_second(chunks, index_seconds),
+                "breakdown_seconds": breakdown,
+                "statuses": [run.status for run in runs],
+            },
+        },
+        "peak_rss_mb": {"discovery": discovery_rss, "index": index_rss},
+    }
+
+
+if __name__ == "__main__":
+    main()
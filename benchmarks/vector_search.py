@@ -0,0 +1,349 @@
+"""
+Vector search benchmark: recall@k against exact search, latency percentiles and QPS
+for each VectorStore implementation.
+
+Loads a synthetic corpus (or a recorded one from an .npz file) into every selected
+store, runs the query set once per concurrency level and writes the results as JSON,
+by default to benchmarks/results/vector_search-<commit>.json, for comparing commits.
+
+Stores: in-memory, local, local-ivf, qdrant[:<profile>], qdrant-hybrid[:<profile>],
+where <profile> is a LOSEME_QDRANT_PROFILE name (default, scalar, binary, ...).
+Qdrant runs in local mode (in process, no server) unless --qdrant-url is given. Local
+mode always searches exactly, so the recall cost of HNSW and quantization only shows
+against a Qdrant server. The benchmark uses its own bench_* collections there.
+
+qdrant-hybrid needs LOSEME_EMBEDDING_MODEL=bge-m3 and a synthetic corpus, which then
+also gets sparse and ColBERT vectors; its recall is measured against exact ColBERT
+MaxSim over the whole corpus, the score its fused candidate pool is re-ranked by.
+
+A recorded corpus is an .npz file with a `vectors` array (one embedding per row) and
+optionally a `queries` array; without one, the last --queries vectors are held out
+as queries.
+
+Usage (from project root):
+    PYTHONPATH=server:client:core python -m benchmarks.vector_search
+    PYTHONPATH=server:client:core python -m benchmarks.vector_search --stores qdrant,qdrant:scalar,qdrant:binary \\
+        --qdrant-url http://localhost:6333 --size 200000
+    LOSEME_EMBEDDING_MODEL=bge-m3 PYTHONPATH=server:client:core python -m benchmarks.vector_search \\
+        --stores in-memory,qdrant-hybrid --size 5000
+    PYTHONPATH=server:client:core python -m benchmarks.vector_search --corpus embeddings.npz --stores local,local-ivf
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.common import latency_summary, run_concurrently, write_results
+from loseme_core import Chunk
+from loseme_core.domain import EmbeddingOutput
+from storage.vector_db.in_memory import normalize_rows
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s  %(levelname)-8s  %(message)s",
+    datefmt="%H:%M:%S",
+)
+logger = logging.getLogger("benchmark")
+
+LOAD_BATCH_SIZE = 256
+# Dense size of the hybrid collection (BGE-M3)
+HYBRID_DIMENSION = 1024
+# Synthetic sparse vectors: vocabulary size, terms per cluster topic, terms per chunk and query
+SPARSE_VOCABULARY = 30_000
+SPARSE_TOPIC_TERMS = 64
+SPARSE_CHUNK_TERMS = 16
+SPARSE_QUERY_TERMS = 8
+# ColBERT token vectors per synthetic chunk and query
+COLBERT_TOKENS = 4
+
+
+@dataclass
+class Corpus:
+    """
+    Normalized chunk and query vectors; sparse and ColBERT vectors only for hybrid runs.
+    """
+    vectors: np.ndarray
+    queries: np.ndarray
+    sparse: Optional[List[Dict[int, float]]] = None
+    query_sparse: Optional[List[Dict[int, float]]] = None
+    colbert: Optional[np.ndarray] = None
+    query_colbert: Optional[np.ndarray] = None
+
+    @property
+    def hybrid(self) -> bool:
+        return self.colbert is not None
+
+    def chunk(self, i: int) -> Chunk:
+        return Chunk(
+            id=chunk_id(i),
+            source_type="benchmark",
+            source_path=f"/benchmark/{i}",
+            text=f"synthetic chunk {i}",
+            document_part_id=f"benchmark-part-{i}",
+            device_id="benchmark",
+            unit_locator=f"benchmark:{i}",
+            index=0,
+        )
+
+    def embedding(self, i: int) -> EmbeddingOutput:
+        if not self.hybrid:
+            return EmbeddingOutput(dense=self.vectors[i].tolist())
+        return EmbeddingOutput(dense=self.vectors[i].tolist(), sparse=self.sparse[i], colbert_vec=self.colbert[i].tolist())
+
+    def query(self, i: int) -> EmbeddingOutput:
+        if not self.hybrid:
+            return EmbeddingOutput(dense=self.queries[i].tolist())
+        return EmbeddingOutput(
+            dense=self.queries[i].tolist(), sparse=self.query_sparse[i], colbert_vec=self.query_colbert[i].tolist()
+        )
+
+    def exact_top_k(self, k: int, colbert: bool = False) -> np.ndarray:
+        """
+        Row indices of the k best chunks per query by exact dense similarity, or by ColBERT MaxSim.
+        """
+        truth = np.empty((len(self.queries), k), dtype=np.int64)
+        for i in range(len(self.queries)):
+            if colbert:
+                # Sum over query tokens of the best matching chunk token
+                scores = np.einsum("td,nsd->nts", self.query_colbert[i], self.colbert).max(axis=2).sum(axis=1)
+            else:
+                scores = self.vectors @ self.queries[i]
+            best = np.argpartition(-scores, k - 1)[:k]
+            truth[i] = best[np.argsort(-scores[best], kind="stable")]
+        return truth
+
+
+def chunk_id(i: int) -> str:
+    return f"benchmark-{i:09d}"
+
+
+def synthetic_corpus(size: int, queries: int, dimension: int, clusters: int, hybrid: bool, seed: int) -> Corpus:
+    """
+    Chunks and queries drawn around the same random cluster centres, so each query has
+    near neighbours like a real topic would; the noise added to a centre is as long as the centre.
+    """
+    rng = np.random.default_rng(seed)
+    centres = normalize_rows(rng.normal(size=(clusters, dimension)))
+    chunk_clusters = rng.integers(0, clusters, size)
+    query_clusters = rng.integers(0, clusters, queries)
+
+    def around(cluster_ids):
+        noise = rng.normal(scale=1 / np.sqrt(dimension), size=(len(cluster_ids), dimension))
+        return normalize_rows(centres[cluster_ids] + noise)
+
+    corpus = Corpus(vectors=around(chunk_clusters), queries=around(query_clusters))
+    if hybrid:
+        topics = rng.integers(0, SPARSE_VOCABULARY, (clusters, SPARSE_TOPIC_TERMS))
+
+        def sparse(cluster_id, terms):
+            ids = np.concatenate([
+                rng.choice(topics[cluster_id], terms * 3 // 4, replace=False),
+                rng.integers(0, SPARSE_VOCABULARY, terms - terms * 3 // 4),
+            ])
+            return {int(term): float(weight) for term, weight in zip(ids, rng.uniform(0.05, 0.5, len(ids)))}
+
+        def tokens(vectors):
+            noise = rng.normal(scale=1 / np.sqrt(dimension), size=(len(vectors), COLBERT_TOKENS, dimension))
+            return normalize_rows(vectors[:, None, :] + noise)
+
+        corpus.sparse = [sparse(c, SPARSE_CHUNK_TERMS) for c in chunk_clusters]
+        corpus.query_sparse = [sparse(c, SPARSE_QUERY_TERMS) for c in query_clusters]
+        corpus.colbert = tokens(corpus.vectors)
+        corpus.query_colbert = tokens(corpus.queries)
+    return corpus
+
+
+def recorded_corpus(path: str, queries: int) -> Corpus:
+    with np.load(path) as data:
+        vectors = normalize_rows(data["vectors"])
+        if "queries" in data:
+            return Corpus(vectors=vectors, queries=normalize_rows(data["queries"])[:queries])
+    return Corpus(vectors=vectors[:-queries], queries=vectors[-queries:])
+
+
+class StoreFactory:
+    """
+    Opens the store for a --stores entry; Qdrant stores share one client and the metadata DB in `workdir`.
+    """
+
+    def __init__(self, workdir: Path, qdrant_url: Optional[str], qdrant_path: Optional[str]):
+        self.workdir = workdir
+        self.qdrant_url = qdrant_url
+        self.qdrant_path = qdrant_path
+        self._client = None
+
+    def client(self):
+        if self._client is None:
+            from qdrant_client import QdrantClient
+            from storage.metadata_db import db
+            # Rebuild bookkeeping and vector migrations go to a throwaway metadata DB
+            db.DB_PATH = self.workdir / "metadata.db"
+            db.init_db()
+            if self.qdrant_url:
+                self._client = QdrantClient(url=self.qdrant_url)
+            elif self.qdrant_path:
+                self._client = QdrantClient(path=self.qdrant_path)
+            else:
+                self._client = QdrantClient(":memory:")
+        return self._client
+
+    def open(self, spec: str, dimension: int):
+        kind, _, profile_name = spec.partition(":")
+        if kind == "in-memory":
+            from storage.vector_db.in_memory import InMemoryVectorStore
+            return InMemoryVectorStore(dimension)
+        if kind in ("local", "local-ivf"):
+            from storage.vector_db.ivf import IVFParams
+            from storage.vector_db.local_store import LocalVectorStore
+            index = IVFParams() if kind == "local-ivf" else None
+            return LocalVectorStore(str(self.workdir / kind), dimension, background_compaction=False, index=index)
+        if kind in ("qdrant", "qdrant-hybrid"):
+            from storage.vector_db.qdrant_profiles import get_collection_profile
+            if kind == "qdrant":
+                from storage.vector_db.qdrant_store import QdrantVectorStore as store_class
+            else:
+                from storage.vector_db.qdrant_store_hybrid import QdrantVectorStoreHybrid as store_class
+            collection = "bench_" + spec.replace("-", "_").replace(":", "_")
+            # Start from an empty collection, also after a run with --keep
+            self.drop(self.client(), collection)
+            return store_class(self.client(), collection=collection, profile=get_collection_profile(profile_name or None))
+        raise ValueError(f"Unknown store '{spec}', expected in-memory, local, local-ivf, qdrant[:profile] or qdrant-hybrid[:profile]")
+
+    @staticmethod
+    def drop(client, alias: str) -> None:
+        from storage.vector_db.qdrant_collections import resolve_collection
+        collection_name = resolve_collection(client, alias)
+        if collection_name is not None:
+            # Deleting the collection also removes the alias
+            client.delete_collection(collection_name)
+
+
+def load(store, corpus: Corpus) -> float:
+    start = time.perf_counter()
+    for offset in range(0, len(corpus.vectors), LOAD_BATCH_SIZE):
+        rows = range(offset, min(offset + LOAD_BATCH_SIZE, len(corpus.vectors)))
+        store.add_batch([corpus.chunk(i) for i in rows], [corpus.embedding(i) for i in rows])
+    if hasattr(store, "compact"):
+        # Merge segments and train the IVF index before searching, as the background compaction would
+        store.compact()
+    if hasattr(store, "client"):
+        wait_until_indexed(store)
+    return time.perf_counter() - start
+
+
+def wait_until_indexed(store, timeout: float = 600.0) -> None:
+    """
+    A Qdrant server builds HNSW graphs in the background; searches before that scan segments exactly.
+    """
+    from qdrant_client.models import CollectionStatus
+    from storage.vector_db.qdrant_collections import resolve_collection
+    collection_name = resolve_collection(store.client, store.collection)
+    deadline = time.monotonic() + timeout
+    while store.client.get_collection(collection_name).status != CollectionStatus.GREEN:
+        if time.monotonic() > deadline:
+            logger.warning("Collection '%s' still optimizing after %.0fs; measuring anyway", collection_name, timeout)
+            return
+        time.sleep(1.0)
+
+
+def benchmark_store(store, spec: str, corpus: Corpus, k: int, concurrency: List[int]) -> dict:
+    logger.info("%s: loading %d vectors", spec, len(corpus.vectors))
+    load_seconds = load(store, corpus)
+    logger.info("%s: loaded in %.1fs (%.0f vectors/s)", spec, load_seconds, len(corpus.vectors) / load_seconds)
+
+    queries = [corpus.query(i) for i in range(len(corpus.queries))]
+    search = lambda query: store.search(query, top_k=k)
+    # Warm caches and lazily built structures before measuring
+    run_concurrently(search, queries[:10], 1)
+
+    truth = corpus.exact_top_k(k, colbert=spec.startswith("qdrant-hybrid"))
+    rows = {chunk_id(i): i for i in range(len(corpus.vectors))}
+    levels = []
+    recall = None
+    for threads in concurrency:
+        results, latencies, wall = run_concurrently(search, queries, threads)
+        if recall is None:
+            found = [{rows[chunk.id] for chunk, _ in hits} for hits in results]
+            recall = float(np.mean([len(hits & set(expected)) / k for hits, expected in zip(found, truth)]))
+        level = {"threads": threads, "qps": round(len(queries) / wall, 1), **latency_summary(latencies)}
+        levels.append(level)
+        logger.info(
+            "%s: %2d threads  %8.1f qps  p50 %.2fms  p95 %.2fms  p99 %.2fms",
+            spec, threads, level["qps"], level["p50_ms"], level["p95_ms"], level["p99_ms"],
+        )
+    logger.info("%s: recall@%d %.4f", spec, k, recall)
+
+    result = {
+        "store": spec,
+        "points": len(corpus.vectors),
+        "load_seconds": round(load_seconds, 3),
+        f"recall_at_{k}": round(recall, 4),
+        "concurrency": levels,
+    }
+    if hasattr(store, "profile"):
+        result["profile"] = store.profile.name
+    if getattr(store, "index", None) is not None:
+        result["index"] = vars(store.index)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure recall, latency and QPS of the vector stores.")
+    parser.add_argument("--stores", default="in-memory,local,qdrant", help="Comma-separated stores to benchmark.")
+    parser.add_argument("--corpus", help="Recorded corpus (.npz with `vectors` and optionally `queries`).")
+    parser.add_argument("--size", type=int, default=20_000, help="Synthetic corpus size.")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per concurrency level.")
+    parser.add_argument("--dimension", type=int, help="Synthetic vector size (default: the embedding model's).")
+    parser.add_argument("--clusters", type=int, default=100, help="Topics the synthetic vectors are drawn around.")
+    parser.add_argument("--top-k", type=int, default=10, help="Results per query; recall is measured at this k.")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated numbers of searching threads.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--qdrant-url", help="Benchmark a Qdrant server instead of local mode.")
+    parser.add_argument("--qdrant-path", help="Run Qdrant local mode on disk in this directory instead of in memory.")
+    parser.add_argument("--keep", action="store_true", help="Keep the bench_* Qdrant collections afterwards.")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/vector_search-<commit>.json).")
+    args = parser.parse_args()
+
+    from pipeline.embeddings.registry import model_registry
+    specs = [spec.strip() for spec in args.stores.split(",") if spec.strip()]
+    concurrency = [int(threads) for threads in args.concurrency.split(",")]
+    hybrid = any(spec.startswith("qdrant-hybrid") for spec in specs)
+    dimension = args.dimension or model_registry.dimension()
+    if hybrid and (dimension != HYBRID_DIMENSION or model_registry.dimension() != HYBRID_DIMENSION):
+        parser.error("qdrant-hybrid needs LOSEME_EMBEDDING_MODEL=bge-m3 (1024-dimensional vectors)")
+    if any(spec.startswith("qdrant") for spec in specs) and dimension != model_registry.dimension():
+        parser.error(f"Qdrant collections hold {model_registry.dimension()}-dimensional vectors of the configured model")
+    if hybrid and args.corpus:
+        parser.error("qdrant-hybrid needs the synthetic corpus; recorded corpora hold dense vectors only")
+
+    if args.corpus:
+        corpus = recorded_corpus(args.corpus, args.queries)
+        corpus_info = {"recorded": args.corpus}
+    else:
+        corpus = synthetic_corpus(args.size, args.queries, dimension, args.clusters, hybrid, args.seed)
+        corpus_info = {"synthetic": True, "clusters": args.clusters, "seed": args.seed, "hybrid": hybrid}
+    corpus_info.update(size=len(corpus.vectors), queries=len(corpus.queries), dimension=corpus.vectors.shape[1])
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="loseme-bench-") as workdir:
+        factory = StoreFactory(Path(workdir), args.qdrant_url, args.qdrant_path)
+        for spec in specs:
+            store = factory.open(spec, corpus.vectors.shape[1])
+            try:
+                results.append(benchmark_store(store, spec, corpus, args.top_k, concurrency))
+            finally:
+                if hasattr(store, "client") and not args.keep:
+                    factory.drop(store.client, store.collection)
+
+    path = write_results("vector_search", {"corpus": corpus_info, "top_k": args.top_k, "results": results}, args.output)
+    logger.info("Results written to %s", path)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,11 @@ import httpx
  
 API_URL = os.environ.get("LOSEME_API_URL", "http://localhost:8000").rstrip("/")
 BATCH_SIZE = 20
+# Further limits on buffered document parts before they are sent to /queue/add_batch
+QUEUE_BATCH_MAX_BYTES = int(os.environ.get("LOSEME_QUEUE_BATCH_MAX_BYTES", str(4 * 1024 * 1024)))
+QUEUE_BATCH_MAX_SECONDS = float(os.environ.get("LOSEME_QUEUE_BATCH_MAX_SECONDS", "2.0"))
+# Plain text files of at least this size are re-read only from where the last ingest stopped, if they only grew
+TAIL_MIN_BYTES = int(os.environ.get("LOSEME_TAIL_MIN_BYTES", str(1024 * 1024)))
  
 def _build_headers() -> dict:
     _API_KEY: str = os.environ.get("LOSEME_API_KEY", "").strip()
@@ -3,7 +3,8 @@ from pathlib import Path
 from typing import List
 from sources.filesystem import FilesystemIngestionSource, FilesystemIndexingScope
 from sources.thunderbird import ThunderbirdIngestionSource, ThunderbirdIndexingScope
-from ingest.queue_client import queue_document_part
+from ingest.queue_client import DocumentPartQueueBatcher
+from ingest.run_control import RunControlSubscriber
 import logging
 logger = logging.getLogger(__name__)
 
@@ -52,7 +53,8 @@ def queue_filesystem_logic(
         exclude_patterns=exclude_patterns,
     )
 
-    source = FilesystemIngestionSource(scope, should_stop=lambda: False)
+    # A forced reprocess needs the whole text of growing files, not just their new end
+    source = FilesystemIngestionSource(scope, should_stop=lambda: False, read_tails=not force_reprocess)
     logger.debug(f"Created FilesystemIngestionSource with scope: {scope}")
 
     with get_client() as client:
@@ -89,23 +91,20 @@ def queue_filesystem_logic(
             logger.warning(f"Run {run_id} is marked as 'not discovering' at the start of queuing.")
             return
 
-        for doc in source.iter_documents():
-            if is_stop_requested(run_id):
-                logger.info(f"Stop requested for run {run_id}. Stopping queuing.")
-                break
+        with RunControlSubscriber(run_id) as control, DocumentPartQueueBatcher(run_id, scope) as batcher:
+            source.should_stop = lambda: control.stop_requested
+            for doc in source.iter_documents():
+                if control.stop_requested:
+                    logger.info(f"Stop requested for run {run_id}. Stopping queuing.")
+                    break
 
-            for part in doc.parts:
-                try:
+                for part in doc.parts:
                     logger.debug(
                         f"Ingesting text: {part.text[:30]}... from file {part.source_path} "
                         f"(Document Part ID: {part.document_part_id})"
                     )
-                    queue_document_part(run_id, part, scope)
-                except Exception as e:
-                    logger.warning(
-                        f"Skipping document part {part.document_part_id} "
-                        f"({part.source_path}): {e}"
-                    )
+                    # Raises only once retries failed; the run is then marked failed below
+                    batcher.add(part)
 
         if not is_stop_requested(run_id):
             with get_client() as client:
@@ -185,17 +184,19 @@ def queue_thunderbird_logic(
             logger.warning(f"Run {run_id} is marked as 'not discovering' at the start of queuing.")
             return
 
-        for doc in source.iter_documents():
-            if is_stop_requested(run_id):
-                logger.info(f"Stop requested for run {run_id}. Stopping queuing.")
-                break
-
-            for part in doc.parts:
-                logger.debug(
-                    f"Ingesting text: {part.text[:30]}... from email {part.source_path} "
-                    f"(Document Part ID: {part.document_part_id})"
-                )
-                queue_document_part(run_id, part, scope)
+        with RunControlSubscriber(run_id) as control, DocumentPartQueueBatcher(run_id, scope) as batcher:
+            source.should_stop = lambda: control.stop_requested
+            for doc in source.iter_documents():
+                if control.stop_requested:
+                    logger.info(f"Stop requested for run {run_id}. Stopping queuing.")
+                    break
+
+                for part in doc.parts:
+                    logger.debug(
+                        f"Ingesting text: {part.text[:30]}... from email {part.source_path} "
+                        f"(Document Part ID: {part.document_part_id})"
+                    )
+                    batcher.add(part)
 
         if not is_stop_requested(run_id):
             with get_client() as client:
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Optional
 from .extractor import DocumentExtractor, DocumentExtractionResult
 from .registry import extractor_registry
  
@@ -9,7 +10,7 @@ class PlainTextExtractor(DocumentExtractor):
     version: str = "0.1"
 
     def can_extract(self, path: Path) -> bool:
-        return path.suffix.lower() in {".txt", ".md", ".rst"}
+        return path.suffix.lower() in {".txt", ".md", ".rst", ".log"}
    
     def can_extract_content_type(self, content_type: str) -> bool:
         return content_type.lower() in self.supported_mime_types
@@ -32,6 +33,9 @@ class PlainTextExtractor(DocumentExtractor):
             extractor_names=[self.name],
             extractor_versions=[self.version],
         )
+    def unit_locator(self, path: Path) -> str:
+        return f"filesystem:{path.resolve()}"
+
     def extract(self, path: Path) -> DocumentExtractionResult:
         # if we are running inside Docker, we need to remove the SOURCE_ROOT prefix
         text = path.read_text(encoding="utf-8", errors="ignore")
@@ -42,7 +46,35 @@ class PlainTextExtractor(DocumentExtractor):
                 "filename": path.name,
                 "suffix": path.suffix,
             }],
-            unit_locators=[f"filesystem:{path.resolve()}"],
+            unit_locators=[self.unit_locator(path)],
+            extractor_names=[self.name],
+            extractor_versions=[self.version],
+        )
+
+    def extract_range(self, path: Path, start: int = 0) -> Optional[DocumentExtractionResult]:
+        """
+        Extract the file from byte `start` to its current end, without newline translation,
+        so character offsets in the text map back to byte offsets in the file.
+        The metadata records the byte range read. Returns None if the range is not valid UTF-8,
+        e.g. because `start` or the end of the file falls inside a multi-byte character.
+        """
+        with path.open("rb") as f:
+            f.seek(start)
+            data = f.read()
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+        return DocumentExtractionResult(
+            texts=[text],
+            content_types=["text/plain"],
+            metadata=[{
+                "filename": path.name,
+                "suffix": path.suffix,
+                "byte_start": start,
+                "byte_end": start + len(data),
+            }],
+            unit_locators=[self.unit_locator(path)],
             extractor_names=[self.name],
             extractor_versions=[self.version],
         )
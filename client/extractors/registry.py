@@ -14,6 +14,12 @@ class ExtractorRegistry:
             extractors, key=lambda e: e.priority, reverse=True
         )
 
+    def get_extractor_for_path(self, path: Path) -> Optional[DocumentExtractor]:
+        for extractor in self.extractors:
+            if extractor.can_extract(path):
+                return extractor
+        return None
+
     def extract(self, path: Path) -> Optional[DocumentExtractionResult]:
         for extractor in self.extractors:
             if extractor.can_extract(path):
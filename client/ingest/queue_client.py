@@ -1,35 +1,188 @@
+import json
 import logging
+import threading
+import time
+import httpx
 from loseme_core.models import DocumentPart, IndexingScope
-from cli.config import get_client
+from cli.config import get_client, BATCH_SIZE, QUEUE_BATCH_MAX_BYTES, QUEUE_BATCH_MAX_SECONDS
 
 logger = logging.getLogger(__name__)
 
 
+def _part_payload(part: DocumentPart, scope: IndexingScope) -> dict:
+    return {
+        "document_part_id": part.document_part_id,
+        "source_type": part.source_type,
+        "checksum": part.checksum,
+        "device_id": part.device_id,
+        "source_path": str(part.source_path),
+        "source_instance_id": part.source_instance_id,
+        "unit_locator": part.unit_locator,
+        "content_type": part.content_type,
+        "extractor_name": part.extractor_name,
+        "extractor_version": part.extractor_version,
+        "metadata_json": part.metadata_json,
+        "created_at": part.created_at.isoformat(),
+        "updated_at": part.updated_at.isoformat(),
+        "text": part.text,
+        "scope_json": scope.serialize(),
+    }
+
+
 def queue_document_part(run_id: str, part: DocumentPart, scope: IndexingScope):
     with get_client() as client:
         response = client.post(
             "/queue/add",
             json={
-                "part": {
-                    "document_part_id": part.document_part_id,
-                    "source_type": part.source_type,
-                    "checksum": part.checksum,
-                    "device_id": part.device_id,
-                    "source_path": str(part.source_path),
-                    "source_instance_id": part.source_instance_id,
-                    "unit_locator": part.unit_locator,
-                    "content_type": part.content_type,
-                    "extractor_name": part.extractor_name,
-                    "extractor_version": part.extractor_version,
-                    "metadata_json": part.metadata_json,
-                    "created_at": part.created_at.isoformat(),
-                    "updated_at": part.updated_at.isoformat(),
-                    "text": part.text,
-                    "scope_json": scope.serialize(),
-                },
+                "part": _part_payload(part, scope),
                 "run_id": run_id,
             },
             timeout=5.0,
         )
     response.raise_for_status()
     logger.info(f"Queued document part {part.unit_locator} (run {run_id})")
+
+
+class DocumentPartQueueBatcher:
+    """
+    Buffers document parts and sends them to /queue/add_batch in bulk.
+
+    A batch is flushed once it holds `max_parts` parts, once its serialized size
+    reaches `max_bytes`, or once its oldest part has waited `max_seconds`. A background
+    thread checks the age, so parts are sent even while the next document is slow to extract.
+    Failed requests are retried `retries` times; parts stay buffered until the server accepted them.
+    Use it as a context manager so the thread runs and the remaining parts are sent at the end,
+    also when the loop ends with an exception.
+
+    Usage:
+        with DocumentPartQueueBatcher(run_id, scope) as batcher:
+            for part in parts:
+                batcher.add(part)
+    """
+
+    def __init__(
+        self,
+        run_id: str,
+        scope: IndexingScope,
+        max_parts: int = BATCH_SIZE,
+        max_bytes: int = QUEUE_BATCH_MAX_BYTES,
+        max_seconds: float = QUEUE_BATCH_MAX_SECONDS,
+        retries: int = 3,
+        retry_delay: float = 1.0,
+    ):
+        self.run_id = run_id
+        self.scope = scope
+        self.max_parts = max_parts
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._client = get_client()
+        self._buffer: list[dict] = []
+        self._buffer_bytes = 0
+        self._oldest_at: float | None = None
+        # Held while the buffer changes or is sent; add() and flush() run on the caller's and the timer thread
+        self._lock = threading.RLock()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._flush_when_due, name=f"queue-batcher-{run_id}", daemon=True)
+
+    def start(self) -> "DocumentPartQueueBatcher":
+        self._thread.start()
+        return self
+
+    def add(self, part: DocumentPart) -> None:
+        payload = _part_payload(part, self.scope)
+        size = len(json.dumps(payload))
+
+        with self._lock:
+            # Keep a single large part from pushing an existing batch over the byte limit
+            if self._buffer and self._buffer_bytes + size > self.max_bytes:
+                self.flush()
+
+            self._buffer.append(payload)
+            self._buffer_bytes += size
+            if self._oldest_at is None:
+                self._oldest_at = time.monotonic()
+
+            if len(self._buffer) >= self.max_parts or self._buffer_bytes >= self.max_bytes or self._is_due():
+                self.flush()
+
+    def _is_due(self) -> bool:
+        return self._oldest_at is not None and time.monotonic() - self._oldest_at >= self.max_seconds
+
+    def _flush_when_due(self) -> None:
+        while True:
+            with self._lock:
+                wait = self.max_seconds if self._oldest_at is None else self._oldest_at + self.max_seconds - time.monotonic()
+            if self._closed.wait(max(wait, 0)):
+                return
+            with self._lock:
+                if not self._is_due():
+                    continue
+                try:
+                    self.flush()
+                    continue
+                except Exception as e:
+                    # The parts stay buffered; the next add(), timer round or close() sends them again
+                    logger.warning(f"Could not send {len(self._buffer)} queued document parts for run {self.run_id}: {e}")
+            # Back off before sending the same batch again
+            if self._closed.wait(self.max_seconds):
+                return
+
+    def flush(self) -> None:
+        """
+        Send all buffered parts, retrying failed requests.
+        The buffer is only emptied once the server accepted the parts, so a flush that raises can be repeated.
+        """
+        with self._lock:
+            if not self._buffer:
+                return
+
+            parts = self._buffer
+            # Sending a batch again is safe: the queue holds each part at most once per run
+            for attempt in range(1, self.retries + 1):
+                try:
+                    response = self._client.post(
+                        "/queue/add_batch",
+                        json={"parts": parts, "run_id": self.run_id},
+                    )
+                    response.raise_for_status()
+                    break
+                except httpx.HTTPError as e:
+                    if attempt == self.retries:
+                        logger.error(f"Failed to queue {len(parts)} document parts for run {self.run_id} after {self.retries} attempts: {e}")
+                        raise
+                    logger.warning(f"Error queuing {len(parts)} document parts for run {self.run_id} (attempt {attempt}): {e}. Retrying...")
+                    time.sleep(self.retry_delay * attempt)
+
+            self._buffer = []
+            self._buffer_bytes = 0
+            self._oldest_at = None
+
+        result = response.json()
+        logger.info(
+            f"Queued {result.get('added', len(parts))} document parts "
+            f"({result.get('already_in_queue', 0)} already queued) for run {self.run_id}"
+        )
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        try:
+            self.flush()
+        finally:
+            self._client.close()
+
+    def __enter__(self) -> "DocumentPartQueueBatcher":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        # The parts read before the failure are still sent; the original exception is the one raised
+        try:
+            self.close()
+        except Exception as e:
+            logger.error(f"Failed to queue {len(self._buffer)} buffered document parts for run {self.run_id}: {e}")
@@ -0,0 +1,71 @@
+import json
+import logging
+import threading
+from cli.config import get_client
+
+logger = logging.getLogger(__name__)
+
+STOPPED_RUN_STATUSES = {"interrupted", "failed"}
+
+
+class RunControlSubscriber:
+    """
+    Follows the server's /runs/events/{run_id} stream in a background thread and
+    keeps the latest run state locally, so discovery loops can check a flag
+    instead of asking the server once per document.
+
+    Usage:
+        with RunControlSubscriber(run_id) as control:
+            for doc in source.iter_documents():
+                if control.stop_requested:
+                    break
+    """
+
+    def __init__(self, run_id: str, reconnect_delay: float = 1.0):
+        self.run_id = run_id
+        self.reconnect_delay = reconnect_delay
+        self.state: dict = {}
+        self._stop_requested = threading.Event()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._follow, name=f"run-control-{run_id}", daemon=True)
+
+    @property
+    def stop_requested(self) -> bool:
+        return self._stop_requested.is_set()
+
+    def start(self) -> "RunControlSubscriber":
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        # The thread may be blocked reading the stream; as a daemon it does not hold up exit
+        self._closed.set()
+
+    def _handle_state(self, state: dict) -> None:
+        self.state = state
+        if state.get("stop_requested") or state.get("status") in STOPPED_RUN_STATUSES:
+            logger.info(f"Run {self.run_id} was stopped on the server (status {state.get('status')}).")
+            self._stop_requested.set()
+
+    def _follow(self) -> None:
+        while not self._closed.is_set():
+            try:
+                with get_client(timeout=None) as client:
+                    with client.stream("GET", f"/runs/events/{self.run_id}") as response:
+                        response.raise_for_status()
+                        for line in response.iter_lines():
+                            if self._closed.is_set():
+                                return
+                            if line.startswith("data:"):
+                                self._handle_state(json.loads(line[len("data:"):]))
+                # The server ends the stream once the run is stopped or finished
+                return
+            except Exception as e:
+                logger.debug(f"Run control stream for run {self.run_id} dropped: {e}. Reconnecting.")
+                self._closed.wait(self.reconnect_delay)
+
+    def __enter__(self) -> "RunControlSubscriber":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -1,12 +1,14 @@
 import os
 from pathlib import Path
-from typing import List, Optional, Callable
+from typing import List, Optional, Callable, Tuple
 import hashlib
+import json
 from datetime import datetime
 from loseme_core.filesystem_model import FilesystemIndexingScope
 from loseme_core.models import IngestionSource, Document, OpenDescriptor, DocumentPart
 from loseme_core.ids import make_logical_document_part_id, make_source_instance_id
-from cli.config import get_client
+from cli.config import get_client, TAIL_MIN_BYTES
+from extractors.extractor import DocumentExtractionResult
 from extractors.registry import extractor_registry, ExtractorRegistry, ingestion_source_registry
 from sources.base.docker_path_translation import host_path_to_container, container_path_to_host, is_running_in_docker
 from fnmatch import fnmatch
@@ -34,15 +36,47 @@ suffix_command_dict = {
     '.fallback': 'cat',
 }
 
+# Bytes hashed at the start of a growing file and before its last ingested offset
+TAIL_PREFIX_SAMPLE_BYTES = 64 * 1024
+
+
+def prefix_checksum(path: Path, end: int) -> str:
+    """
+    Checksum of the first `end` bytes of `path`, sampled: their length, the first and the
+    last TAIL_PREFIX_SAMPLE_BYTES bytes. Rewriting a file almost always changes one of them,
+    and checking whether a multi-GB log only grew does not read the whole log.
+    """
+    digest = hashlib.sha256(str(end).encode("utf-8"))
+    with path.open("rb") as f:
+        digest.update(f.read(min(end, TAIL_PREFIX_SAMPLE_BYTES)))
+        if end > TAIL_PREFIX_SAMPLE_BYTES:
+            start = max(end - TAIL_PREFIX_SAMPLE_BYTES, TAIL_PREFIX_SAMPLE_BYTES)
+            f.seek(start)
+            digest.update(f.read(end - start))
+    return digest.hexdigest()
+
+
+def append_checksum(checksum: str, appended: bytes) -> str:
+    """
+    Checksum of a document after `appended` was added to the document with `checksum`.
+    """
+    if not appended:
+        return checksum
+    return hashlib.sha256((checksum + hashlib.sha256(appended).hexdigest()).encode("utf-8")).hexdigest()
+
+
 class FilesystemIngestionSource(IngestionSource):
     _extractor_registry = extractor_registry
+    # Read only the new end of plain text files that grew since the last ingest
+    read_tails: bool = True
 
     def __init__(self, 
                  scope: FilesystemIndexingScope,
                  should_stop: Optional[Callable[[], bool]] = None,
-                 update_if_changed_after: Optional[datetime] = None
+                 update_if_changed_after: Optional[datetime] = None,
+                 read_tails: bool = True,
                  ):
-        super().__init__(scope = scope, should_stop=should_stop, update_if_changed_after=update_if_changed_after)
+        super().__init__(scope = scope, should_stop=should_stop, update_if_changed_after=update_if_changed_after, read_tails=read_tails)
         self.scope = scope
         self.should_stop = should_stop
         logger.debug(f"Initialized FilesystemIngestionSource with scope: {self.scope.serialize()}")
@@ -86,6 +120,71 @@ class FilesystemIngestionSource(IngestionSource):
     def extractor_registry(self) -> ExtractorRegistry:
         return self._extractor_registry
 
+    def _get_document_part(self, document_part_id: str) -> Optional[dict]:
+        with get_client() as client:
+            response = client.get(f"/documents/by_id/{document_part_id}")
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def _read_growing_file(self, docker_path: Path, source_instance_id: str) -> Optional[Tuple[DocumentExtractionResult, str]]:
+        """
+        Read a large plain text file, or only its end if it grew by appending since the last ingest.
+        Returns the extraction and the document checksum, or None to extract the file as usual.
+
+        The tail state in the part's metadata records how many bytes were read, a prefix
+        checksum of them and (set by the server) where its last chunk starts. If the file is at
+        least that long and the prefix checksum still matches, it is read from the last chunk on.
+        """
+        extractor = self.extractor_registry.get_extractor_for_path(docker_path)
+        if not hasattr(extractor, "extract_range") or docker_path.stat().st_size < TAIL_MIN_BYTES:
+            return None
+
+        part_id = make_logical_document_part_id(
+            source_instance_id=source_instance_id,
+            unit_locator=extractor.unit_locator(docker_path),
+        )
+        try:
+            record = self._get_document_part(part_id)
+        except Exception as e:
+            logger.warning(f"Could not look up document part {part_id}, reading {docker_path} in full: {e}")
+            record = None
+
+        stored = None
+        if record and record.get("metadata_json"):
+            stored = json.loads(record["metadata_json"]).get("tail")
+
+        if (
+            stored
+            and "overlap_offset" in stored
+            and record["extractor_name"] == extractor.name
+            and record["extractor_version"] == extractor.version
+            and docker_path.stat().st_size >= stored["byte_offset"]
+            and prefix_checksum(docker_path, stored["byte_offset"]) == stored["prefix_checksum"]
+        ):
+            extracted = extractor.extract_range(docker_path, stored["overlap_offset"])
+            if extracted is not None:
+                byte_end = extracted.metadata[0]["byte_end"]
+                appended = extracted.text().encode("utf-8")[stored["byte_offset"] - stored["overlap_offset"]:]
+                logger.debug(f"{docker_path} grew by {len(appended)} bytes since the last ingest, reading only its end.")
+                extracted.metadata[0]["tail"] = {
+                    "byte_offset": byte_end,
+                    "prefix_checksum": prefix_checksum(docker_path, byte_end),
+                    "append_from": {"checksum": record["checksum"], "overlap_offset": stored["overlap_offset"]},
+                }
+                return extracted, append_checksum(record["checksum"], appended)
+
+        extracted = extractor.extract_range(docker_path)
+        if extracted is None:
+            return None
+        byte_end = extracted.metadata[0]["byte_end"]
+        extracted.metadata[0]["tail"] = {
+            "byte_offset": byte_end,
+            "prefix_checksum": prefix_checksum(docker_path, byte_end),
+        }
+        return extracted, hashlib.sha256(extracted.text().strip().encode("utf-8")).hexdigest()
+
     def iter_documents(self) -> List[Document]:
         """ 
         Iterate over documents in the scope. This should not simply recycle list_documents()
@@ -122,7 +221,21 @@ class FilesystemIngestionSource(IngestionSource):
                     ):
                         continue
                     
-                    extracted = self.extractor_registry.extract(docker_path)
+                    tail_checksum = None
+                    growing = None
+                    if self.read_tails:
+                        growing = self._read_growing_file(
+                            docker_path,
+                            make_source_instance_id(
+                                source_type="filesystem",
+                                source_path=container_path_to_host(str(docker_path)),
+                                device_id=device_id,
+                            ),
+                        )
+                    if growing is not None:
+                        extracted, tail_checksum = growing
+                    else:
+                        extracted = self.extractor_registry.extract(docker_path)
                     
                     if extracted is None:
                         logger.warning(f"No suitable extractor found for file: {docker_path}, skipping.")
@@ -190,7 +303,7 @@ class FilesystemIngestionSource(IngestionSource):
                     else:
                         logger.debug(f"Extracted content from {docker_path} with content type {extracted.content_types[0]}")
 
-                        document_checksum = hashlib.sha256(
+                        document_checksum = tail_checksum or hashlib.sha256(
                                extracted.text().strip().encode("utf-8")
                                ).hexdigest()
 
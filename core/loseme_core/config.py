@@ -1,6 +1,8 @@
 import os
 
-CHUNKER_TYPE = os.getenv("LOSEME_CHUNKER", "simple")  # simple | semantic
+CHUNKER_TYPE = os.getenv("LOSEME_CHUNKER", "simple")  # simple | sentence | semantic | token | content
+# Token limit per chunk for the token chunker; 0 = the embedding model's full input window
+CHUNK_MAX_TOKENS = int(os.getenv("LOSEME_CHUNK_MAX_TOKENS", "0"))
 EMBEDDING_MODEL = os.getenv(
     "LOSEME_EMBEDDING_MODEL",
     "sentence-transformer:all-MiniLM-L6-v2",
@@ -14,5 +16,57 @@ CROSS_ENCODER_MODEL = os.getenv(
 VECTOR_STORAGE = os.getenv(
         "LOSEME_VECTOR_STORAGE", "qdrant"
         )
+# Directory of the local vector store (LOSEME_VECTOR_STORAGE=local)
+LOCAL_VECTOR_PATH = os.getenv("LOSEME_LOCAL_VECTOR_PATH", "/var/lib/loseme/vectors")
+# Search index of the local vector store: flat (exact scan) | ivf (approximate, for large stores)
+LOCAL_VECTOR_INDEX = os.getenv("LOSEME_LOCAL_VECTOR_INDEX", "flat")
+# IVF lists; 0 = about 4·sqrt(vector count), retrained as the store grows
+LOCAL_IVF_NLIST = int(os.getenv("LOSEME_LOCAL_IVF_NLIST", "0"))
+# IVF lists scanned per search
+LOCAL_IVF_NPROBE = int(os.getenv("LOSEME_LOCAL_IVF_NPROBE", "16"))
+# Candidates re-scored with exact vectors per requested result
+LOCAL_IVF_OVERSAMPLING = float(os.getenv("LOSEME_LOCAL_IVF_OVERSAMPLING", "20"))
+
+# Vector dimension of LOSEME_EMBEDDING_MODEL, only needed for models the server does not know; 0 = look it up
+EMBEDDING_DIMENSION = int(os.getenv("LOSEME_EMBEDDING_DIMENSION", "0"))
+
+# Maximum number of chunk texts passed to the embedding model in one call
+EMBEDDING_BATCH_SIZE = int(os.getenv("LOSEME_EMBEDDING_BATCH_SIZE", "32"))
+
+# Persistent cache of document embeddings keyed by model and chunk text; 0 disables it
+EMBEDDING_CACHE_PATH = os.getenv("LOSEME_EMBEDDING_CACHE_PATH", "/var/lib/loseme/metadata/embedding_cache.db")
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("LOSEME_EMBEDDING_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+# Number of queued document parts the indexing loop chunks and embeds together
+INGEST_PART_BATCH_SIZE = int(os.getenv("LOSEME_INGEST_PART_BATCH_SIZE", "8"))
+
+# Upper bound on the estimated size of one vector store upsert request
+VECTOR_UPSERT_MAX_BYTES = int(os.getenv("LOSEME_VECTOR_UPSERT_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# Qdrant alias all stores and scripts use; it points at the current versioned collection (<alias>_v<n>)
+QDRANT_COLLECTION = os.getenv("LOSEME_QDRANT_COLLECTION", "chunks")
+# Layout of newly created Qdrant collections: default | scalar | binary | product | low-memory
+QDRANT_PROFILE = os.getenv("LOSEME_QDRANT_PROFILE", "default")
+# Candidates fetched with quantized vectors per requested result before rescoring; 0 = the profile's value
+QDRANT_OVERSAMPLING = float(os.getenv("LOSEME_QDRANT_OVERSAMPLING", "0"))
+# Rescore quantized candidates with the original vectors
+QDRANT_RESCORE = os.getenv("LOSEME_QDRANT_RESCORE", "true").lower() == "true"
+
+# Seconds a worker holds a claimed queue part before other workers may take it over
+QUEUE_LEASE_SECONDS = int(os.getenv("LOSEME_QUEUE_LEASE_SECONDS", "600"))
+
+# Claims after which a queued part that keeps failing is dropped from the queue
+QUEUE_MAX_ATTEMPTS = int(os.getenv("LOSEME_QUEUE_MAX_ATTEMPTS", "3"))
+
+# Longest an idle indexing loop blocks before re-checking the queue without being notified
+QUEUE_WAIT_SECONDS = float(os.getenv("LOSEME_QUEUE_WAIT_SECONDS", "5"))
+
+# Drain the queue inside the API process; disable when standalone workers (python -m worker) run
+INPROCESS_INDEXING = os.getenv("LOSEME_INPROCESS_INDEXING", "true").lower() == "true"
+
+# Load the vector store, chunker and embedding model in the background right after startup
+PRELOAD_MODELS = os.getenv("LOSEME_PRELOAD_MODELS", "true").lower() == "true"
+# Run one throwaway query embedding after loading so the first /search is not a cold one
+WARMUP_INFERENCE = os.getenv("LOSEME_WARMUP_INFERENCE", "true").lower() == "true"
 
 USE_CUDA = os.getenv("LOSEME_USE_CUDA", "false").lower() 
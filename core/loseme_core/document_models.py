@@ -127,6 +127,8 @@ class Chunk(BaseModel):
     unit_locator: str
     index: int
     metadata: Dict[str, Any] = Field(default_factory=dict)
+    created_at: Optional[datetime] = None  # of the document part
+    scope_id: Optional[str] = None  # make_scope_id of the indexing scope
 
     @field_validator('id', 'document_part_id')
     def ids_must_not_be_empty(cls, v):
@@ -22,3 +22,34 @@ class EmbeddingProvider(ABC):
     @abstractmethod
     def embed_query(self, text: str) -> EmbeddingOutput:
         """Embed a search query (query-time)."""
+        pass
+
+    @abstractmethod
+    def embed_document(self, text: str) -> EmbeddingOutput:
+        """Embed a single document chunk (index-time)."""
+        pass
+
+    # Fallback implementation
+    def embed_documents(self, texts: List[str]) -> List[EmbeddingOutput]:
+        """
+        Embed several document chunks in one call (index-time).
+        Providers backed by a model should override this with a single batched
+        forward pass; the fallback calls embed_document in a loop.
+        The returned list has the same length and order as `texts`.
+        """
+        return [self.embed_document(text) for text in texts]
+
+    def max_sequence_length(self) -> Optional[int]:
+        """
+        Longest input, in tokens, the model embeds without truncating it.
+        None if the provider does not know.
+        """
+        return None
+
+    def count_tokens(self, texts: List[str]) -> Optional[List[int]]:
+        """
+        Exact token counts of document texts as the model sees them at index time,
+        including special tokens and any prefix the provider adds.
+        None if the provider has no tokenizer.
+        """
+        return None
@@ -1,5 +1,6 @@
 from pathlib import Path
 import hashlib
+import json
 from uuid import UUID, uuid5
 
 # Fixed namespace for the entire project.
@@ -45,6 +46,28 @@ def make_chunk_id(
     name = f"{document_part_id}:{document_checksum}:{index}"
     return hashlib.sha256(name.encode("utf-8")).hexdigest()
 
+def make_content_chunk_id(
+    document_part_id: str,
+    chunk_text: str,
+    occurrence: int = 0,
+) -> str:
+    """
+    Chunk ID derived from the chunk's own text instead of the whole document,
+    so unchanged chunks keep their ID when other parts of the document are edited.
+    `occurrence` tells apart identical chunk texts within one document part.
+    """
+    text_hash = hashlib.sha256(chunk_text.encode("utf-8")).hexdigest()
+    name = f"{document_part_id}:content:{text_hash}:{occurrence}"
+    return hashlib.sha256(name.encode("utf-8")).hexdigest()
+
+def make_scope_id(scope: dict) -> str:
+    """
+    Stable ID of an indexing scope, stored with each chunk so a whole source can be
+    deleted from the vector store with one filter. Key order does not matter.
+    """
+    canonical = json.dumps(scope, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
 def make_thunderbird_source_id(
     # We require a unique identifier for the Thunderbird source instance, which can be derived from the device ID and the mbox path **without** reading the actual message content
     device_id: str,
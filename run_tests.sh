@@ -39,6 +39,7 @@ UNIT_FILES="
   tests/test_document_models.py
   tests/test_scope_models.py
   tests/test_cache.py
+  tests/test_queue_events.py
   tests/test_docker_path_translation.py
 "
 
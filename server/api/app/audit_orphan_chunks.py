@@ -31,6 +31,8 @@ import logging
 import sys
 from collections import defaultdict
 
+from loseme_core.config import QDRANT_COLLECTION
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s  %(levelname)-8s  %(message)s",
@@ -38,7 +40,7 @@ logging.basicConfig(
 )
 logger = logging.getLogger("audit")
 
-COLLECTION = "chunks"
+COLLECTION = QDRANT_COLLECTION
 SCROLL_BATCH = 500
 
 
@@ -15,7 +15,7 @@ from starlette.middleware.base import BaseHTTPMiddleware
 _API_KEY = os.environ.get("LOSEME_API_KEY", "").strip()
 
 # Paths that are always allowed without a key (health check, docs)
-_EXEMPT = {"/health", "/docs", "/openapi.json", "/redoc", "/"}
+_EXEMPT = {"/health", "/health/ready", "/docs", "/openapi.json", "/redoc", "/"}
 
 
 class APIKeyMiddleware(BaseHTTPMiddleware):
@@ -1,3 +1,6 @@
+import time
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
@@ -10,13 +13,22 @@ from api.app.routes import (
 from api.app.core.auth import APIKeyMiddleware
 from contextlib import asynccontextmanager
 from storage.metadata_db.db import init_db
+from api.app.warmup import warmup
+from loseme_core.config import PRELOAD_MODELS, WARMUP_INFERENCE
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup actions
     logger.info("Starting up the API...")
+    started = time.perf_counter()
     init_db()
+    logger.info(f"Startup: metadata DB ready in {time.perf_counter() - started:.2f}s")
+    if PRELOAD_MODELS:
+        # Loads in the background so /health answers while the models are still loading
+        warmup.start(inference=WARMUP_INFERENCE)
+    else:
+        warmup.skip()
     yield
     # Shutdown actions
     logger.info("Shutting down the API...")
@@ -55,7 +67,7 @@ app.include_router(sources_router)
 app.include_router(queue_router)
 app.include_router(database_router)
     
-logger.info("API initialized with routers.")
+logger.info(f"API initialized with routers (imports took {time.perf_counter() - _import_started:.2f}s).")
 
 @app.get("/")
 def root():
@@ -0,0 +1,49 @@
+import threading
+import time
+
+from storage.metadata_db.db import data_version
+
+class QueueNotifier:
+    """
+    Wakes indexing loops when the queue or a run's state changes.
+
+    Routes in this process call notify(); loops block in wait() instead of polling.
+    Writes made by other processes (the API vs. standalone workers) are noticed
+    through SQLite's data_version, which is checked every `check_interval` seconds.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        with self._condition:
+            return self._generation
+
+    def notify(self) -> None:
+        with self._condition:
+            self._generation += 1
+            self._condition.notify_all()
+
+    def wait(self, generation: int, timeout: float, check_interval: float = 0.25) -> bool:
+        """
+        Block until notify() has been called since `generation` was read, another
+        process committed to the metadata DB, or `timeout` seconds passed.
+        Returns False on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        version = data_version()
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            with self._condition:
+                if self._condition.wait_for(lambda: self._generation != generation, min(remaining, check_interval)):
+                    return True
+            if data_version() != version:
+                return True
+
+
+# Singleton — imported by routes and the indexing loops
+queue_notifier = QueueNotifier()
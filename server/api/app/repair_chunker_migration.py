@@ -28,6 +28,8 @@ import logging
 import sys
 from datetime import datetime
 
+from loseme_core.config import QDRANT_COLLECTION
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s  %(levelname)-8s  %(message)s",
@@ -35,7 +37,7 @@ logging.basicConfig(
 )
 logger = logging.getLogger("repair")
 
-COLLECTION = "chunks"
+COLLECTION = QDRANT_COLLECTION
 SCROLL_BATCH = 100
 
 
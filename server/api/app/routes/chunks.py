@@ -3,6 +3,7 @@ from pydantic import BaseModel
 from typing import List, Dict, Any
 from api.app.cache import distribution_cache
 
+from loseme_core.config import QDRANT_COLLECTION
 from loseme_core.models import Chunk
 from storage.vector_db.runtime import get_vector_store
 
@@ -118,7 +119,6 @@ def get_chunk_distribution(chunker_name: str = None):
         return cached
 
     client = QdrantClient(url=os.getenv("QDRANT_URL", "http://qdrant:6333"))
-    COLLECTION = "chunks"
 
     # We also need source_path to compute chunks-per-doc
     char_lens = []
@@ -137,7 +137,7 @@ def get_chunk_distribution(chunker_name: str = None):
     offset = None
     while True:
         result, next_offset = client.scroll(
-            collection_name=COLLECTION,
+            collection_name=QDRANT_COLLECTION,
             limit=500,
             offset=offset,
             with_payload=True,
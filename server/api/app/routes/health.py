@@ -1,4 +1,7 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from api.app.warmup import warmup
 
 router = APIRouter(tags=["health"])
 
@@ -6,3 +9,11 @@ router = APIRouter(tags=["health"])
 def health():
     return {"status": "ok"}
 
+@router.get("/health/ready")
+def ready():
+    """
+    503 until the vector store and models have been loaded, e.g. for load balancer checks.
+    With LOSEME_PRELOAD_MODELS=false it is ready as soon as the API has started.
+    """
+    body = {"ready": warmup.ready.is_set(), "timings": warmup.timings, "error": warmup.error}
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
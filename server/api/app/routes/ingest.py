@@ -3,22 +3,41 @@ from api.app.cache import distribution_cache
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from pathlib import Path
+from typing import List, Optional, Tuple
 
 from loseme_core.models import DocumentPart
+from loseme_core.domain import EmbeddingOutput
+from loseme_core.config import EMBEDDING_BATCH_SIZE, EMBEDDING_MODEL
 from storage.metadata_db.indexing_runs import show_runs, increment_indexed_count
 from storage.metadata_db.document_parts import upsert_document_part, get_document_part_by_id, mark_document_part_processed
-from storage.vector_db.runtime import get_vector_store
-from wiring import build_embedding_provider, build_chunker
+from storage.metadata_db.db import transaction
+from storage.vector_db.runtime import get_vector_store, get_embedding_provider
+from storage.embedding_cache import get_embedding_cache, embed_texts_cached
+from pipeline.chunking.chunk_batch import ChunkBatch
+from wiring import build_chunker
+import json
 import logging
+import threading
 import os
 
 API_URL = os.environ.get("LOSEME_API_URL", "http://localhost:8000")
 
 logger = logging.getLogger(__name__)
 
-store = get_vector_store()
-chunker = build_chunker()
-embedding_provider = build_embedding_provider()
+_chunker = None
+_chunker_lock = threading.Lock()
+
+def get_chunker():
+    """
+    Build the chunker on first use; the semantic chunker needs the embedding model.
+    Thread-safe, as the startup warmup and the first requests may ask at the same time.
+    """
+    global _chunker
+    if _chunker is None:
+        with _chunker_lock:
+            if _chunker is None:
+                _chunker = build_chunker()
+    return _chunker
 
 def get_data_root() -> Path:
     return Path(
@@ -49,129 +68,344 @@ class IngestDocumentPartRequest(BaseModel):
 @router.post("/document_part")
 def ingest_document_part(req: IngestDocumentPartRequest, force_reprocess: bool = False):
     logger.debug(f"Received ingest request for document part ID {req.document_part_id} in run ID {req.run_id}")
-    all_runs = show_runs()
-    if req.run_id not in [run.id for run in all_runs]:
-        raise HTTPException(status_code=404, detail=f"Run with ID {req.run_id} not found")
-    
-    skip_part = False
-    old_part = get_document_part_by_id(req.document_part_id)
-    
-    if old_part:
-        logger.debug(f"Document part with ID {req.document_part_id} exists. Comparing extractor_names and versions.")
-        skip_part = True
-        if old_part["extractor_name"] != req.extractor_name:
-            logger.info(f"Extractor name changed from {old_part['extractor_name']} to {req.extractor_name}. Re-processing suggested.")
-            skip_part = False
-        if old_part["extractor_version"] != req.extractor_version:
-            logger.info(f"Extractor version changed from {old_part['extractor_version']} to {req.extractor_version}. Re-processing suggested.")
-            skip_part = False
-        if old_part["chunker_name"] != chunker.name:
-            logger.info(f"Chunker name changed from {old_part['chunker_name']} to {chunker.name}. Re-processing suggested.")
-            skip_part = False
-        if old_part["chunker_version"] != chunker.version:
-            logger.info(f"Chunker version changed from {old_part['chunker_version']} to {chunker.version}. Re-processing suggested.")
-            skip_part = False
-        if old_part.get("checksum") != req.checksum:
-            logger.info(f"Checksum changed for document part ID {req.document_part_id}. Re-processing suggested.")
-            skip_part = False
-
-    if skip_part and not force_reprocess:
-        logger.info(f"Skipping ingestion for document part ID {req.document_part_id} (already processed).")
-        mark_document_part_processed(run_id=req.run_id, document_part_id=req.document_part_id)
-        increment_indexed_count(run_id=req.run_id)
-        return {"accepted": True, "skipped": True}
+    return ingest_document_parts([req], force_reprocess=force_reprocess)[0]
+
+
+def _is_unchanged(req: IngestDocumentPartRequest, old_part: Optional[dict]) -> bool:
+    """
+    Return True if the stored part was produced from the same content by the same extractor and chunker.
+    """
+    if not old_part:
+        return False
+
+    chunker = get_chunker()
+    logger.debug(f"Document part with ID {req.document_part_id} exists. Comparing extractor_names and versions.")
+    skip_part = True
+    if old_part["extractor_name"] != req.extractor_name:
+        logger.info(f"Extractor name changed from {old_part['extractor_name']} to {req.extractor_name}. Re-processing suggested.")
+        skip_part = False
+    if old_part["extractor_version"] != req.extractor_version:
+        logger.info(f"Extractor version changed from {old_part['extractor_version']} to {req.extractor_version}. Re-processing suggested.")
+        skip_part = False
+    if old_part["chunker_name"] != chunker.name:
+        logger.info(f"Chunker name changed from {old_part['chunker_name']} to {chunker.name}. Re-processing suggested.")
+        skip_part = False
+    if old_part["chunker_version"] != chunker.version:
+        logger.info(f"Chunker version changed from {old_part['chunker_version']} to {chunker.version}. Re-processing suggested.")
+        skip_part = False
+    if old_part.get("checksum") != req.checksum:
+        logger.info(f"Checksum changed for document part ID {req.document_part_id}. Re-processing suggested.")
+        skip_part = False
+    if old_part.get("chunk_ids") is None:
+        logger.info(f"Document part ID {req.document_part_id} has no recorded chunks. Re-processing suggested.")
+        skip_part = False
+    return skip_part
 
-    if skip_part and force_reprocess:
-        logger.info(f"Force reprocess enabled. Re-processing document part ID {req.document_part_id} despite no changes.")
 
-    # Ingest or re-process the part
+def _stored_tail(old_part: Optional[dict]) -> Optional[dict]:
+    """
+    The tail state recorded for a part at its last ingest, if any.
+    """
+    if not old_part or not old_part.get("metadata_json"):
+        return None
     try:
-        logger.info(f"Ingesting document part ID {req.document_part_id} for run_id {req.run_id}")
-
-        if old_part:
-            if old_part["chunk_ids"] is None:
-                #raise ValueError(f"Existing document part with ID {req.document_part_id} has no chunk_ids. Cannot remove old chunks.")
-                logger.warning(f"Existing document part with ID {req.document_part_id} has no chunk_ids. Skipping chunk removal.")
-            else:
-                store.remove_chunks(chunk_ids=old_part["chunk_ids"])
-        else:
-            logger.debug(f"No existing document part with ID {req.document_part_id} found. Proceeding with ingestion.")
-
-        upsert_document_part(
-            part={
-                "document_part_id": req.document_part_id,
-                "checksum": req.checksum,
-                "source_type": req.source_type,
-                "source_instance_id": req.source_instance_id,
-                "device_id": req.device_id,
-                "source_path": req.source_path,
-                "unit_locator": req.unit_locator,
-                "content_type": req.content_type,
-                "extractor_name": req.extractor_name,
-                "extractor_version": req.extractor_version,
-                "chunker_name": chunker.name,
-                "chunker_version": chunker.version,
-                "metadata_json": req.metadata_json,
-                "created_at": req.created_at,
-                "updated_at": req.updated_at,
-                "text": req.text,
-                "scope_json": req.scope_json,
-            },
-            run_id=req.run_id,
-        )
+        return json.loads(old_part["metadata_json"]).get("tail")
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def _can_append(req: IngestDocumentPartRequest, old_part: Optional[dict], chunker) -> bool:
+    """
+    Return True if the request text continues the stored part: the client read it from the
+    overlap offset recorded at the last ingest, and that ingest used the same extractor and chunker.
+    """
+    append_from = req.metadata_json["tail"]["append_from"]
+    stored = _stored_tail(old_part)
+    return (
+        stored is not None
+        and old_part["chunk_ids"] is not None
+        and old_part["checksum"] == append_from.get("checksum")
+        and stored.get("overlap_offset") == append_from.get("overlap_offset")
+        and old_part["extractor_name"] == req.extractor_name
+        and old_part["extractor_version"] == req.extractor_version
+        and old_part["chunker_name"] == chunker.name
+        and old_part["chunker_version"] == chunker.version
+    )
+
+
+def _overlap_state(batch: ChunkBatch, byte_origin: int) -> dict:
+    """
+    Where the next append has to start re-chunking: at the last chunk, which the end of
+    the file may have cut short. `byte_origin` is the file offset of the first byte of part.text.
+    """
+    text = batch.part.text
+    start = batch.starts[-1] if len(batch) else len(text)
+    return {
+        "overlap_offset": byte_origin + len(text[:start].encode("utf-8")),
+        "overlap_char_offset": batch.origin + start,
+        "overlap_chunk_ids": batch.ids[-1:],
+    }
 
-        part = DocumentPart(
-            document_part_id=req.document_part_id,
-            checksum=req.checksum,
-            source_type=req.source_type,
-            source_instance_id=req.source_instance_id,
-            device_id=req.device_id,
-            source_path=req.source_path,
-            unit_locator=req.unit_locator,
-            content_type=req.content_type,
-            extractor_name=req.extractor_name,
-            extractor_version=req.extractor_version,
-            metadata_json=req.metadata_json,
-            created_at=req.created_at,
-            updated_at=req.updated_at,
-            text=req.text,
-            scope_json=req.scope_json,
+
+def _record_document_part(req: IngestDocumentPartRequest, chunker, metadata: dict) -> None:
+    upsert_document_part(
+        part={
+            "document_part_id": req.document_part_id,
+            "checksum": req.checksum,
+            "source_type": req.source_type,
+            "source_instance_id": req.source_instance_id,
+            "device_id": req.device_id,
+            "source_path": req.source_path,
+            "unit_locator": req.unit_locator,
+            "content_type": req.content_type,
+            "extractor_name": req.extractor_name,
+            "extractor_version": req.extractor_version,
+            "chunker_name": chunker.name,
+            "chunker_version": chunker.version,
+            "metadata_json": metadata,
+            "created_at": req.created_at,
+            "updated_at": req.updated_at,
+            "text": req.text,
+            "scope_json": req.scope_json,
+        },
+        run_id=req.run_id,
+    )
+
+
+def _prepare_document_part(
+    req: IngestDocumentPartRequest, old_part: Optional[dict], force_reprocess: bool = False
+) -> Tuple[List[str], ChunkBatch, dict, List[str]]:
+    """
+    Chunk the part's text and work out which stored vectors it replaces.
+    Returns the chunk IDs of the whole part, the chunks that still have to be embedded and stored,
+    the metadata to record for the part and the IDs of old chunks to remove.
+    Nothing is recorded or removed here: the caller does both once the new chunks are stored,
+    so a failed store write leaves the old part row and vectors for the retry.
+    With content-defined chunk IDs, chunks whose ID is already stored are kept as they are:
+    only their IDs are stable. Their `index` and start/end metadata are not rewritten, so after
+    an edit they can disagree with the part's new chunk order; the part's chunk_ids, which
+    are recorded in order, are the authoritative sequence.
+
+    Parts of growing text files carry a "tail" entry in metadata_json. If it has an
+    "append_from" entry, req.text is only the end of the file, starting at the last chunk of
+    the previous ingest; then only that text is chunked and the chunks before it are kept.
+    """
+    logger.info(f"Ingesting document part ID {req.document_part_id} for run_id {req.run_id}")
+
+    chunker = get_chunker()
+    part = DocumentPart(
+        document_part_id=req.document_part_id,
+        checksum=req.checksum,
+        source_type=req.source_type,
+        source_instance_id=req.source_instance_id,
+        device_id=req.device_id,
+        source_path=req.source_path,
+        unit_locator=req.unit_locator,
+        content_type=req.content_type,
+        extractor_name=req.extractor_name,
+        extractor_version=req.extractor_version,
+        metadata_json=req.metadata_json,
+        created_at=req.created_at,
+        updated_at=req.updated_at,
+        text=req.text,
+        scope_json=req.scope_json,
+    )
+
+    batch = chunker.chunk_batch(part)
+    if len(batch) == 0:
+        logger.warning(f"Chunker returned no chunks for document part ID {req.document_part_id}. Generating a single empty chunk.")
+
+    tail = req.metadata_json.get("tail")
+    old_chunk_ids = json.loads(old_part["chunk_ids"]) if old_part and old_part["chunk_ids"] else None
+
+    if tail and "append_from" in tail:
+        if not _can_append(req, old_part, chunker):
+            # Without the rest of the text the part cannot be re-chunked here. Keep its chunks and
+            # drop the tail state, so the next scan sends the whole file.
+            logger.warning(
+                f"Cannot append to document part ID {req.document_part_id}: it changed since the client read it. "
+                "Keeping its chunks until the next scan re-reads the whole file."
+            )
+            return old_chunk_ids or [], ChunkBatch(part), {k: v for k, v in req.metadata_json.items() if k != "tail"}, []
+
+        stored = _stored_tail(old_part)
+        overlap_ids = set(stored["overlap_chunk_ids"])
+        kept = [chunk_id for chunk_id in old_chunk_ids if chunk_id not in overlap_ids]
+        batch.rebase(stored["overlap_char_offset"], len(kept), taken=set(kept))
+        unchanged = set() if force_reprocess else overlap_ids.intersection(batch.ids)
+        state = {k: v for k, v in tail.items() if k != "append_from"}
+        state.update(_overlap_state(batch, tail["append_from"]["overlap_offset"]))
+        logger.info(
+            f"Appending {len(batch) - len(unchanged)} chunks to document part ID {req.document_part_id}; "
+            f"keeping {len(kept) + len(unchanged)}."
         )
+        stale = [chunk_id for chunk_id in stored["overlap_chunk_ids"] if chunk_id not in unchanged]
+        return kept + batch.ids, batch.without(unchanged) if unchanged else batch, {**req.metadata_json, "tail": state}, stale
+
+    metadata = req.metadata_json
+    if tail:
+        metadata = {**metadata, "tail": {**tail, **_overlap_state(batch, 0)}}
 
-        chunks, _ = chunker.chunk(part)
-        if chunks is None or len(chunks) == 0:
-            logger.warning(f"Chunker returned no chunks for document part ID {req.document_part_id}. Generating a single empty chunk.")
+    if not old_part:
+        logger.debug(f"No existing document part with ID {req.document_part_id} found. Proceeding with ingestion.")
+        return batch.ids, batch, metadata, []
 
-        for chunk in chunks:
-            text_to_embed = chunk.text or ""
-            if not chunk.text:
-                logger.warning(f"Chunk with ID {chunk.id} has no text. Generating empty embedding.")
-            embeddings = embedding_provider.embed_document(text_to_embed)
+    if old_chunk_ids is None:
+        # Which chunks are stored is unknown, so drop them all by part ID now; the part row
+        # keeps its NULL chunk_ids until the new chunks are stored
+        get_vector_store().remove_by_document_part_ids([req.document_part_id])
+        return batch.ids, batch, metadata, []
 
-            max_retries = 3
+    # Chunk IDs include the part checksum (or the chunk text), so old IDs that are not
+    # new IDs are exactly the vectors this part no longer has
+    new_ids = set(batch.ids)
+    stale = [chunk_id for chunk_id in old_chunk_ids if chunk_id not in new_ids]
+    kept = set()
+    if batch.content_ids and not force_reprocess:
+        # Same ID means same text, so the stored vector is still valid
+        kept = set(old_chunk_ids).intersection(new_ids)
+    if not kept:
+        return batch.ids, batch, metadata, stale
 
+    logger.info(f"Keeping {len(kept)} of {len(batch)} chunks of document part ID {req.document_part_id}; they are unchanged.")
+    return batch.ids, batch.without(kept), metadata, stale
+
+
+def embed_chunk_batches(batches: List[ChunkBatch]) -> List[EmbeddingOutput]:
+    """
+    Embed the chunks of the given batches, in order, in model calls of at most EMBEDDING_BATCH_SIZE texts.
+    Chunks the chunker already embedded and texts already in the embedding cache
+    are not sent to the model again.
+    """
+    embeddings: List[Optional[EmbeddingOutput]] = []
+    texts = []
+    for batch in batches:
+        precomputed = batch.embeddings or [None] * len(batch)
+        for index, embedding in enumerate(precomputed):
+            embeddings.append(embedding)
+            if embedding is None:
+                text = batch.text_at(index)
+                if not text:
+                    logger.warning(f"Chunk with ID {batch.ids[index]} has no text. Generating empty embedding.")
+                texts.append(text)
+
+    if not texts:
+        return embeddings
+
+    embedded = iter(embed_texts_cached(
+        get_embedding_provider(),
+        EMBEDDING_MODEL,
+        texts,
+        batch_size=EMBEDDING_BATCH_SIZE,
+        cache=get_embedding_cache(),
+    ))
+    return [embedding if embedding is not None else next(embedded) for embedding in embeddings]
+
+def _record_skipped_parts(reqs: List[IngestDocumentPartRequest]) -> None:
+    for req in reqs:
+        mark_document_part_processed(run_id=req.run_id, document_part_id=req.document_part_id)
+        increment_indexed_count(run_id=req.run_id)
+
+def ingest_document_parts(reqs: List[IngestDocumentPartRequest], force_reprocess: bool = False) -> List[dict]:
+    """
+    Ingest several document parts at once.
+    The chunks of all parts that need (re-)processing are embedded together, so small
+    parts such as single e-mails share forward passes. Returns one response per request, in order.
+    """
+    known_run_ids = {run.id for run in show_runs()}
+    for req in reqs:
+        if req.run_id not in known_run_ids:
+            raise HTTPException(status_code=404, detail=f"Run with ID {req.run_id} not found")
+
+    responses: List[Optional[dict]] = [None] * len(reqs)
+    # Unchanged parts; they are only counted together with the rest of the batch, so a failed batch counts nothing
+    skipped: List[IngestDocumentPartRequest] = []
+    # (position, request, chunk IDs of the whole part, chunks to embed and store, metadata to record, old chunk IDs to remove)
+    pending: List[Tuple[int, IngestDocumentPartRequest, List[str], ChunkBatch, dict, List[str]]] = []
+
+    for position, req in enumerate(reqs):
+        old_part = get_document_part_by_id(req.document_part_id)
+        skip_part = _is_unchanged(req, old_part)
+
+        if skip_part and not force_reprocess:
+            logger.info(f"Skipping ingestion for document part ID {req.document_part_id} (already processed).")
+            skipped.append(req)
+            responses[position] = {"accepted": True, "skipped": True}
+            continue
+
+        if skip_part and force_reprocess:
+            logger.info(f"Force reprocess enabled. Re-processing document part ID {req.document_part_id} despite no changes.")
+
+        try:
+            prepared = _prepare_document_part(req, old_part, force_reprocess=force_reprocess)
+        except Exception as e:
+            logger.error(f"Error ingesting document part ID {req.document_part_id}: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Ingestion error: {str(e)}")
+        pending.append((position, req, *prepared))
+
+    if not pending:
+        with transaction():
+            _record_skipped_parts(skipped)
+        return responses
+
+    # Ingest or re-process the parts
+    try:
+        embeddings = embed_chunk_batches([to_store for _, _, _, to_store, _, _ in pending])
+        # Chunk models (with their text) are only built here, for the vector store
+        all_chunks = [chunk for _, _, _, to_store, _, _ in pending for chunk in to_store.to_chunks()]
+        max_retries = 3
+        store = get_vector_store()
+
+        # Nothing to write when every chunk was already stored
+        if all_chunks:
+            # One batched upsert for the chunks of all pending parts; retries resend the whole batch
             for attempt in range(1, max_retries + 1):
                 try:
-                    store.add(chunk, embeddings)
+                    store.add_batch(all_chunks, embeddings)
                     break  # Success! Exit the loop
                 except Exception as e:
                     if attempt == max_retries:
-                        logger.error(f"Failed to add chunk with ID {chunk.id} after {max_retries} attempts: {str(e)}")
+                        logger.error(f"Failed to add batch of {len(all_chunks)} chunks after {max_retries} attempts: {str(e)}")
                         raise
                     else:
-                        logger.warning(f"Error adding chunk with ID {chunk.id} (attempt {attempt}): {str(e)}. Retrying...")
+                        logger.warning(f"Error adding batch of {len(all_chunks)} chunks (attempt {attempt}): {str(e)}. Retrying...")
 
+        # Old vectors go only once their replacements are stored
+        stale = [chunk_id for *_, stale_ids in pending for chunk_id in stale_ids]
+        if stale:
+            store.remove_chunks(chunk_ids=stale)
+
+        chunker = get_chunker()
+        with transaction():
+            _record_skipped_parts(skipped)
+            for position, req, chunk_ids, _, metadata, _ in pending:
+                # The new checksum is recorded only now, so a part whose chunks failed to store is re-processed
+                _record_document_part(req, chunker, metadata)
+                mark_document_part_processed(run_id=req.run_id, document_part_id=req.document_part_id, chunk_ids=list(chunk_ids))
+                increment_indexed_count(run_id=req.run_id)
+                responses[position] = {
+                    "accepted": True,
+                    "skipped": False,
+                }
 
-        # Always mark as processed after successful ingestion
-        mark_document_part_processed(run_id=req.run_id, document_part_id=req.document_part_id, chunk_ids=[c.id for c in chunks])
-        increment_indexed_count(run_id=req.run_id)
         distribution_cache.invalidate_prefix("distribution:")
-        return {
-            "accepted": True,
-            "skipped": False,
-        }
+        return responses
 
     except Exception as e:
-        logger.error(f"Error ingesting document part ID {req.document_part_id}: {str(e)}")
+        failed_ids = ", ".join(req.document_part_id for _, req, *_ in pending)
+        logger.error(f"Error ingesting document part IDs {failed_ids}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Ingestion error: {str(e)}")
 
+@router.get("/embedding_cache/stats")
+def embedding_cache_stats():
+    cache = get_embedding_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+@router.post("/embedding_cache/clear")
+def clear_embedding_cache():
+    cache = get_embedding_cache()
+    if cache is not None:
+        cache.clear()
+    return {"status": "cleared"}
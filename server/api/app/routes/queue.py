@@ -1,13 +1,15 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from loseme_core.models import DocumentPart
-from typing import Optional
+from typing import List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
-from storage.metadata_db.document_parts_queue import add_document_part_to_queue, get_next_document_part_from_queue, get_all_document_parts_in_queue_for_run, clear_queue_for_run, get_all_document_parts_in_queue, clear_all_queues
+from storage.metadata_db.document_parts_queue import add_document_part_to_queue, add_document_parts_to_queue, get_next_document_part_from_queue, get_all_document_parts_in_queue_for_run, clear_queue_for_run, get_all_document_parts_in_queue, clear_all_queues
 from storage.metadata_db.indexing_runs import increment_discovered_count
+from storage.metadata_db.db import transaction
+from api.app.queue_events import queue_notifier
 
 router = APIRouter(prefix="/queue", tags=["queue"])
 
@@ -15,6 +17,10 @@ class QueueAddRequest(BaseModel):
     part: DocumentPart
     run_id: str
 
+class QueueAddBatchRequest(BaseModel):
+    parts: List[DocumentPart]
+    run_id: str
+
 class QueueGetResponse(BaseModel):
     run_id: str
     document_part_id: str
@@ -36,18 +42,42 @@ class QueueGetResponse(BaseModel):
 @router.post("/add")
 def add_to_queue(request: QueueAddRequest):
     try:
-        response = add_document_part_to_queue(part=request.part.model_dump(), run_id=request.run_id)
-        if response.get("status") == "already_in_queue": 
-            logger.debug(f"Document part {request.part.document_part_id} is already in the queue for run_id {request.run_id}. Skipping adding to queue.")
-            return {"status": "already_in_queue"}
-        
-        increment_discovered_count(run_id=request.run_id)
+        with transaction():
+            response = add_document_part_to_queue(part=request.part.model_dump(), run_id=request.run_id)
+            if response.get("status") == "already_in_queue": 
+                logger.debug(f"Document part {request.part.document_part_id} is already in the queue for run_id {request.run_id}. Skipping adding to queue.")
+                return {"status": "already_in_queue"}
+            
+            increment_discovered_count(run_id=request.run_id)
+        queue_notifier.notify()
         logger.debug(f"Document part {request.part.document_part_id} added to queue successfully")
         return {"status": "success"}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/add_batch")
+def add_batch_to_queue(request: QueueAddBatchRequest):
+    try:
+        with transaction():
+            added = add_document_parts_to_queue(
+                parts=[part.model_dump() for part in request.parts],
+                run_id=request.run_id,
+            )
+            if added:
+                increment_discovered_count(run_id=request.run_id, count=added)
+        if added:
+            queue_notifier.notify()
+        logger.debug(f"Added {added} of {len(request.parts)} document parts to queue for run_id {request.run_id}")
+        return {
+            "status": "success",
+            "added": added,
+            "already_in_queue": len(request.parts) - added,
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/next/{run_id}", response_model=QueueGetResponse)
 def get_next_from_queue(run_id: str):
     try:
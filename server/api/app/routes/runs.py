@@ -1,19 +1,42 @@
-from fastapi import APIRouter, BackgroundTasks
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from storage.metadata_db.indexing_runs import (create_run, load_latest_run_by_type, request_stop,
 show_runs, increment_discovered_count, load_latest_interrupted, load_run_by_id, stop_indexing,
-update_status, stop_discovery, set_run_resume, StoredScope)
-from storage.metadata_db.document_parts_queue import get_next_document_part_from_queue, remove_document_part_from_queue
+update_status, stop_discovery, set_run_resume, start_indexing, claim_run_completion, StoredScope)
+from storage.metadata_db.document_parts_queue import (claim_document_parts_from_queue, complete_claimed_document_part,
+count_document_parts_in_queue)
 from storage.metadata_db.document_parts import get_stale_parts, remove_document_parts_by_id
-from api.app.routes.ingest import ingest_document_part, IngestDocumentPartRequest
+from storage.metadata_db.db import transaction
+from api.app.routes.ingest import ingest_document_parts, IngestDocumentPartRequest
+from api.app.queue_events import queue_notifier
+from loseme_core.config import INGEST_PART_BATCH_SIZE, QUEUE_LEASE_SECONDS, QUEUE_MAX_ATTEMPTS, QUEUE_WAIT_SECONDS, INPROCESS_INDEXING
+import asyncio
+from typing import Optional
 import json
 import logging
-import time
-import torch
+import os
+import sys
+import threading
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/runs", tags=["runs"])
 
+
+def _empty_cuda_cache():
+    # torch is only present once a model has been loaded; importing it here would slow down startup
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+# Run control event stream: how often notifications are checked, how often the run row
+# is re-read regardless (to see changes made by other processes), and keep-alive spacing
+RUN_EVENTS_TICK_SECONDS = 0.1
+RUN_EVENTS_RECHECK_SECONDS = 1.0
+RUN_EVENTS_KEEPALIVE_SECONDS = 15.0
+FINAL_RUN_STATUSES = {"completed", "failed", "interrupted"}
+
 @router.post("/create")
 def create_indexing_run(req: dict):
     source_type: str = req["source_type"]
@@ -43,6 +66,7 @@ def stop_latest_indexing_run(source_type: str):
         }
 
     request_stop(run.id)
+    queue_notifier.notify()
     logger.info(f"Stop requested for indexing run {run.id} of type {source_type}")
 
     return {
@@ -50,6 +74,67 @@ def stop_latest_indexing_run(source_type: str):
         "status": "stop_requested",
     }
 
+def _run_control_state(run_id: str) -> Optional[dict]:
+    run = load_run_by_id(run_id)
+    if run is None:
+        return None
+    return {
+        "run_id": run.id,
+        "status": run.status,
+        "stop_requested": run.stop_requested,
+        "is_discovering": run.is_discovering,
+    }
+
+def _is_final_control_state(state: dict) -> bool:
+    return state["stop_requested"] or state["status"] in FINAL_RUN_STATUSES
+
+@router.get("/events/{run_id}")
+async def stream_run_events(run_id: str, request: Request):
+    """
+    Server-sent events with the run's control state (status, stop_requested, is_discovering).
+    The current state is sent immediately and again whenever it changes. The stream ends
+    after a stop request or once the run reaches a final status.
+    """
+    state = await run_in_threadpool(_run_control_state, run_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Run with ID {run_id} not found")
+
+    async def event_stream():
+        last_state = state
+        yield f"data: {json.dumps(last_state)}\n\n"
+
+        loop = asyncio.get_running_loop()
+        generation = queue_notifier.generation
+        last_check = last_send = loop.time()
+        while not _is_final_control_state(last_state):
+            await asyncio.sleep(RUN_EVENTS_TICK_SECONDS)
+            if await request.is_disconnected():
+                return
+
+            now = loop.time()
+            current_generation = queue_notifier.generation
+            if current_generation == generation and now - last_check < RUN_EVENTS_RECHECK_SECONDS:
+                if now - last_send >= RUN_EVENTS_KEEPALIVE_SECONDS:
+                    yield ": keep-alive\n\n"
+                    last_send = now
+                continue
+
+            generation = current_generation
+            last_check = now
+            current_state = await run_in_threadpool(_run_control_state, run_id)
+            if current_state is None:
+                return
+            if current_state != last_state:
+                last_state = current_state
+                last_send = now
+                yield f"data: {json.dumps(last_state)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
 @router.get("/is_stop_requested/{run_id}")
 def is_stop_requested_endpoint(run_id: str):
     from storage.metadata_db.indexing_runs import is_stop_requested
@@ -73,6 +158,7 @@ def delete_indexing_run(run_id: str):
 def request_stop_endpoint(run_id: str):
     request_stop(run_id)
     update_status(run_id, "interrupted")
+    queue_notifier.notify()
     logger.info(f"Stop requested for indexing run {run_id}")
     return {
         "run_id": run_id,
@@ -139,6 +225,7 @@ def stop_all_indexing_runs():
         stop_indexing(run.id)
         update_status(run.id, "interrupted")
         logger.info(f"Stop requested for indexing run {run.id}.")
+    queue_notifier.notify()
 
     return {
         "status": "stop_requested_for_all",
@@ -162,6 +249,7 @@ def mark_run_finished(run_id: str):
 def mark_run_failed(run_id: str):
     from storage.metadata_db.indexing_runs import update_status
     update_status(run_id, "failed")
+    queue_notifier.notify()
     logger.info(f"Marked run {run_id} as failed")
     return {"run_id": run_id, "status": "failed"}
 
@@ -169,6 +257,7 @@ def mark_run_failed(run_id: str):
 def mark_run_interrupted(run_id: str):
     from storage.metadata_db.indexing_runs import update_status
     update_status(run_id, "interrupted")
+    queue_notifier.notify()
     logger.info(f"Marked run {run_id} as interrupted")
     return {"run_id": run_id, "status": "interrupted"}
 
@@ -177,8 +266,10 @@ def start_indexing_run(run_id: str, background_tasks: BackgroundTasks, force_rep
     logger.info(f"Starting indexing process for run {run_id}")
     set_run_resume(run_id)
     update_status(run_id, "running")
+    start_indexing(run_id, force_reprocess=force_reprocess)
     # Create a background task to run the indexing process
-    background_tasks.add_task(run_indexing_process, run_id, force_reprocess)
+    if INPROCESS_INDEXING:
+        background_tasks.add_task(run_indexing_process, run_id, force_reprocess)
     
     # Immediately return a response to the client
     return {
@@ -191,8 +282,10 @@ def resume_indexing_run(run_id: str, background_tasks: BackgroundTasks):
     logger.info(f"Resuming indexing process for run {run_id}")
     set_run_resume(run_id)
     update_status(run_id, "running")
+    start_indexing(run_id)
     # Create a background task to run the indexing process
-    background_tasks.add_task(run_indexing_process, run_id)
+    if INPROCESS_INDEXING:
+        background_tasks.add_task(run_indexing_process, run_id)
     
     # Immediately return a response to the client
     return {
@@ -203,6 +296,7 @@ def resume_indexing_run(run_id: str, background_tasks: BackgroundTasks):
 @router.post("/discovering_stopped/{run_id}")
 def mark_discovering_stopped(run_id: str):
     stop_discovery(run_id)
+    queue_notifier.notify()
 
 @router.get("/is_discovering/{run_id}")
 def is_discovering(run_id: str):
@@ -213,79 +307,137 @@ def is_discovering(run_id: str):
         "is_discovering": discovering,
     }
 
+def _request_from_queue_row(run_id: str, document_part: dict) -> IngestDocumentPartRequest:
+    return IngestDocumentPartRequest(
+        run_id=run_id,
+        document_part_id=document_part["document_part_id"],
+        checksum=document_part["checksum"],
+        source_type=document_part["source_type"],
+        device_id=document_part["device_id"],
+        source_path=document_part["source_path"],
+        source_instance_id=document_part["source_instance_id"],
+        unit_locator=document_part["unit_locator"],
+        content_type=document_part["content_type"],
+        extractor_name=document_part["extractor_name"],
+        extractor_version=document_part["extractor_version"],
+        metadata_json=document_part.get("metadata_json", {}),
+        created_at=document_part["created_at"],
+        updated_at=document_part["updated_at"],
+        text=document_part.get("text", ""),
+        scope_json=json.loads(document_part.get("scope_json", "{}")),
+    )
+
+def _ingest_isolating_failures(run_id: str, document_parts: list, force_reprocess: bool) -> list:
+    """
+    Ingest queue rows together; if that fails, ingest each half again, until a failing part is on its own.
+    Returns (queue row, response) for the rows that were ingested.
+    """
+    try:
+        responses = ingest_document_parts(
+            [_request_from_queue_row(run_id, document_part) for document_part in document_parts],
+            force_reprocess=force_reprocess,
+        )
+        return list(zip(document_parts, responses))
+    except Exception as e:
+        if len(document_parts) == 1:
+            logger.error(f"Failed to ingest document part {document_parts[0]['document_part_id']} in run {run_id}: {e}. It will be retried after its lease expires.")
+            return []
+        logger.warning(f"Failed to ingest {len(document_parts)} document parts in run {run_id}: {e}. Retrying them in two halves.")
+        middle = len(document_parts) // 2
+        return (
+            _ingest_isolating_failures(run_id, document_parts[:middle], force_reprocess)
+            + _ingest_isolating_failures(run_id, document_parts[middle:], force_reprocess)
+        )
+
+def process_claimed_parts(run_id: str, claimed_parts: list, worker_id: str, force_reprocess: bool = False) -> int:
+    """
+    Ingest document parts claimed from the queue and remove them once processed.
+    Parts that failed QUEUE_MAX_ATTEMPTS claims are dropped. A part that fails keeps its
+    claim, so it is retried once its lease expires; the other parts of its batch are not held back.
+    Returns the number of parts processed.
+    """
+    document_parts = []
+    for document_part in claimed_parts:
+        if document_part["attempts"] > QUEUE_MAX_ATTEMPTS:
+            logger.error(f"Dropping document part {document_part['document_part_id']} in run {run_id} after {QUEUE_MAX_ATTEMPTS} failed attempts.")
+            complete_claimed_document_part(document_part["id"], worker_id)
+        else:
+            document_parts.append(document_part)
+
+    if not document_parts:
+        return 0
+
+    ingested = _ingest_isolating_failures(run_id, document_parts, force_reprocess)
+    if not ingested:
+        return 0
+
+    with transaction():
+        for document_part, r in ingested:
+            if r.get("accepted") == False:
+                logger.error(f"Failed to ingest document part {document_part['document_part_id']} in run {run_id}: {r.get('reason', 'Unknown error')}")
+
+            else:
+                logger.debug(f"Successfully ingested document part {document_part['document_part_id']} in run {run_id}")
+
+            # Remove the part from the queue after processing
+            if not complete_claimed_document_part(document_part["id"], worker_id):
+                logger.warning(f"Lease on document part {document_part['document_part_id']} in run {run_id} expired before it was processed.")
+
+    return len(ingested)
+
 def run_indexing_process(run_id: str, force_reprocess: bool = False):
     logger.info(f"Background indexing process started for run {run_id}")
+    worker_id = f"api:{os.getpid()}:{threading.get_ident()}"
     processed_count = 0
     while True:
+        # Read before checking the queue so a notification arriving in between is not lost
+        generation = queue_notifier.generation
         run = load_run_by_id(run_id)
         if run.stop_requested:
             update_status(run_id, "interrupted")
             logger.info(f"Indexing run {run_id} interrupted by user request.")
-            torch.cuda.empty_cache()
+            _empty_cuda_cache()
             break
        
-        logger.debug(f"Checking for next document part in queue for run {run_id}")
-        document_part = get_next_document_part_from_queue(run_id)
-        if document_part is None:
-            logger.debug(f"No document parts in queue for run {run_id}. Checking if run is still discovering.")
+        logger.debug(f"Claiming next document parts in queue for run {run_id}")
+        document_parts = claim_document_parts_from_queue(
+            worker_id,
+            [run_id],
+            limit=INGEST_PART_BATCH_SIZE,
+            lease_seconds=QUEUE_LEASE_SECONDS,
+        )
+        if not document_parts:
+            logger.debug(f"No claimable document parts in queue for run {run_id}. Checking if run is still discovering.")
             # Check if the run is still discovering documents or if it has completed
-            if run.is_discovering == False:
+            if run.is_discovering == False and count_document_parts_in_queue(run_id) == 0:
                 # If the run is not discovering anymore and there are no document parts in the queue, we can assume the run is completed
                 logger.info(f"No more document parts to process and run {run_id} is not discovering anymore. Marking run as completed.")
                 cleanup_run(run_id)
                 break
             else:
-                # If the run is still discovering, wait and check again later
-                logger.debug(f"Run {run_id} is still discovering. Waiting for new document parts.")
-                time.sleep(0.01)
+                # If the run is still discovering or other workers hold the remaining parts, wait and check again later
+                logger.debug(f"Run {run_id} is still discovering or being processed elsewhere. Waiting for new document parts.")
+                queue_notifier.wait(generation, timeout=QUEUE_WAIT_SECONDS)
                 continue
 
-        r = ingest_document_part(IngestDocumentPartRequest(
-            run_id=run_id,
-            document_part_id=document_part["document_part_id"],
-            checksum=document_part["checksum"],
-            source_type=document_part["source_type"],
-            device_id=document_part["device_id"],
-            source_path=document_part["source_path"],
-            source_instance_id=document_part["source_instance_id"],
-            unit_locator=document_part["unit_locator"],
-            content_type=document_part["content_type"],
-            extractor_name=document_part["extractor_name"],
-            extractor_version=document_part["extractor_version"],
-            metadata_json=document_part.get("metadata_json", {}),
-            created_at=document_part["created_at"],
-            updated_at=document_part["updated_at"],
-            text=document_part.get("text", ""),
-            scope_json=json.loads(document_part.get("scope_json", "{}")),
-        ),
-        force_reprocess=force_reprocess)
-        processed_count += 1
-        
-        if processed_count % 50 == 0:
-            torch.cuda.empty_cache()
-
-        if r.get("accepted") == False:
-            logger.error(f"Failed to ingest document part {document_part['document_part_id']} in run {run_id}: {r.get('reason', 'Unknown error')}")
+        previous_count = processed_count
+        processed_count += process_claimed_parts(run_id, document_parts, worker_id, force_reprocess=force_reprocess)
+        if processed_count // 50 > previous_count // 50:
+            _empty_cuda_cache()
 
-        else:
-            logger.debug(f"Successfully ingested document part {document_part['document_part_id']} in run {run_id}")
-        
-        # Remove the part from the queue after processing
-        remove_document_part_from_queue(run_id, document_part["document_part_id"])
-        
-        del document_part
+        del document_parts
 
 def cleanup_run(run_id: str):
-    stop_indexing(run_id)
-    run = load_run_by_id(run_id)
-    stale_document_ids, stale_chunk_ids = get_stale_parts(run_id = run_id)
+    # Several workers may see the drained queue at the same time; only one finalizes the run
+    if not claim_run_completion(run_id):
+        logger.debug(f"Indexing run {run_id} is already being finalized.")
+        return
+    stale_document_ids = get_stale_parts(run_id = run_id)
     from storage.vector_db.runtime import get_vector_store
     store = get_vector_store()
-    chunk_ids_flattened = [chunk_id for sublist in stale_chunk_ids for chunk_id in sublist]
-    if len(chunk_ids_flattened) > 0:
-        store.remove_chunks(chunk_ids_flattened)
+    if stale_document_ids:
+        store.remove_by_document_part_ids(stale_document_ids)
         remove_document_parts_by_id(stale_document_ids)
     update_status(run_id, "completed")
-    torch.cuda.empty_cache()
+    _empty_cuda_cache()
     logger.info(f"Indexing run {run_id} completed.")
-
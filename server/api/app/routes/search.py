@@ -6,14 +6,22 @@ from storage.vector_db.runtime import (
     get_vector_store,
     get_embedding_provider,
 )
+from storage.vector_db.vector_store import SearchFilter
 
 router = APIRouter(prefix="/search", tags=["search"])
 
 
-class SearchRequest(BaseModel):
+class SearchRequest(SearchFilter):
+    """
+    Query text and result count; the optional SearchFilter fields restrict the
+    search to matching chunks inside the vector store.
+    """
     query: str
     top_k: int = 5
 
+    def search_filter(self) -> SearchFilter:
+        return SearchFilter(**self.model_dump(include=set(SearchFilter.model_fields)))
+
 
 class SearchResult(BaseModel):
     chunk_id: str
@@ -34,7 +42,7 @@ def search(req: SearchRequest) -> SearchResponse:
     Semantic search over indexed documents.
     
     Args:
-        req: Search request with query text and top_k
+        req: Search request with query text, top_k and optional filters
         
     Returns:
         Search results with chunks, scores, and metadata
@@ -47,7 +55,7 @@ def search(req: SearchRequest) -> SearchResponse:
     query_vector = embedder.embed_query(req.query)
 
     # Search returns List[Tuple[Chunk, float]]
-    results = store.search(query_vector, top_k=req.top_k)
+    results = store.search(query_vector, top_k=req.top_k, filters=req.search_filter())
 
     query = req.query    
     # Rerank results using cross-encoder
@@ -0,0 +1,63 @@
+import threading
+import time
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """
+    Loads the vector store, chunker and embedding model off the startup path.
+
+    The API starts serving (and /health answers) immediately; requests that need a
+    model before the background load finished simply wait for the shared registry lock.
+    /health/ready reports when everything is loaded.
+    """
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.timings: dict = {}
+        self.error: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, inference: bool = True) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self.run, args=(inference,), name="loseme-warmup", daemon=True)
+        self._thread.start()
+
+    def skip(self) -> None:
+        """
+        Preloading is disabled: everything loads lazily on first use, so there is nothing to wait for.
+        """
+        self.ready.set()
+
+    def run(self, inference: bool = True) -> None:
+        # Same lookups as the routes use, so the loaded objects are the ones they get
+        from api.app.routes.ingest import get_chunker
+        from storage.vector_db.runtime import get_embedding_provider, get_vector_store
+
+        steps = [
+            ("vector_store", get_vector_store),
+            ("embedding_model", get_embedding_provider),
+            ("chunker", get_chunker),
+        ]
+        if inference:
+            steps.append(("warmup_inference", lambda: get_embedding_provider().embed_query("warmup")))
+
+        try:
+            for name, step in steps:
+                started = time.perf_counter()
+                step()
+                self.timings[name] = round(time.perf_counter() - started, 3)
+                logger.info(f"Startup: {name} ready in {self.timings[name]:.2f}s")
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"Startup warmup failed: {e}")
+            return
+        self.ready.set()
+
+
+# Singleton — shared by the whole process
+warmup = Warmup()
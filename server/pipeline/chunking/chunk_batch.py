@@ -0,0 +1,173 @@
+import re
+from array import array
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from loseme_core.models import Chunk, DocumentPart
+from loseme_core.domain import EmbeddingOutput
+from loseme_core.ids import make_chunk_id, make_content_chunk_id, make_scope_id
+
+
+class ChunkBatch:
+    """
+    Columnar, offset-based chunks of one document part.
+
+    Chunkers only record [start, end) offsets into the part text, so chunking a
+    large document neither copies its text nor allocates one pydantic model per chunk.
+    Chunk texts are sliced when they are embedded (texts()) and Chunk models are
+    built only for the vector store (to_chunks()).
+
+    With content_ids=True, chunk IDs are derived from the chunk text rather than
+    the document checksum and position, so ingest can diff old and new IDs.
+    """
+
+    __slots__ = (
+        "part", "starts", "ends", "indices", "ids", "columns", "embeddings", "content_ids", "origin", "_occurrences",
+    )
+
+    def __init__(self, part: DocumentPart, columns: tuple = (), content_ids: bool = False):
+        self.part = part
+        self.starts = array("q")
+        self.ends = array("q")
+        # Position of each chunk in the part; differs from the row number after without()
+        self.indices = array("q")
+        self.ids: List[str] = []
+        self.content_ids = content_ids
+        # Character offset of part.text within the whole part, when the text is only its appended tail
+        self.origin = 0
+        self._occurrences: Dict[str, int] = {}
+        # Extra integer metadata per chunk, e.g. the sentence count of the sentence chunker
+        self.columns: Dict[str, array] = {name: array("q") for name in columns}
+        # Embeddings the chunker already computed, one per chunk (None where it has none)
+        self.embeddings: Optional[List[Optional[EmbeddingOutput]]] = None
+
+    def append(self, start: int, end: int, **columns: int) -> None:
+        self.starts.append(start)
+        self.ends.append(end)
+        self.indices.append(len(self.ids))
+        self.ids.append(self._make_id(start, end, len(self.ids)))
+        for name, values in self.columns.items():
+            values.append(columns[name])
+
+    def _make_id(self, start: int, end: int, index: int, taken: Set[str] = frozenset()) -> str:
+        if not self.content_ids:
+            return make_chunk_id(
+                document_part_id=self.part.document_part_id,
+                document_checksum=self.part.checksum,
+                index=index,
+            )
+        # Only content IDs need the chunk text
+        text = self.part.text[start:end]
+        occurrence = self._occurrences.get(text, 0)
+        chunk_id = make_content_chunk_id(self.part.document_part_id, text, occurrence)
+        while chunk_id in taken:
+            occurrence += 1
+            chunk_id = make_content_chunk_id(self.part.document_part_id, text, occurrence)
+        self._occurrences[text] = occurrence + 1
+        return chunk_id
+
+    def rebase(self, origin: int, first_index: int, taken: Set[str] = frozenset()) -> None:
+        """
+        Place the chunks of an appended tail after the `first_index` chunks already stored
+        for the part; part.text starts at character `origin` of the whole part.
+        Content IDs skip the IDs in `taken`, so repeated text does not reuse a stored ID.
+        """
+        self.origin = origin
+        self._occurrences = {}
+        for row, (start, end) in enumerate(zip(self.starts, self.ends)):
+            self.indices[row] = first_index + row
+            self.ids[row] = self._make_id(start, end, first_index + row, taken)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def without(self, chunk_ids: Set[str]) -> "ChunkBatch":
+        """
+        A batch of the same part holding only the chunks whose IDs are not in `chunk_ids`.
+        """
+        subset = ChunkBatch(self.part, tuple(self.columns), self.content_ids)
+        subset.origin = self.origin
+        keep = [row for row, chunk_id in enumerate(self.ids) if chunk_id not in chunk_ids]
+        for row in keep:
+            subset.starts.append(self.starts[row])
+            subset.ends.append(self.ends[row])
+            subset.indices.append(self.indices[row])
+            subset.ids.append(self.ids[row])
+            for name, values in self.columns.items():
+                subset.columns[name].append(values[row])
+        if self.embeddings is not None:
+            subset.embeddings = [self.embeddings[row] for row in keep]
+        return subset
+
+    def text_at(self, row: int) -> str:
+        return self.part.text[self.starts[row]:self.ends[row]]
+
+    def iter_texts(self) -> Iterator[str]:
+        text = self.part.text
+        for start, end in zip(self.starts, self.ends):
+            yield text[start:end]
+
+    def texts(self) -> List[str]:
+        return list(self.iter_texts())
+
+    def metadata_at(self, row: int) -> dict:
+        start, end = self.origin + self.starts[row], self.origin + self.ends[row]
+        metadata = {"start": start, "end": end, "char_len": end - start}
+        for name, values in self.columns.items():
+            metadata[name] = values[row]
+        return metadata
+
+    def to_chunks(self) -> List[Chunk]:
+        part = self.part
+        scope_id = make_scope_id(part.scope_json) if part.scope_json else None
+        return [
+            Chunk(
+                id=chunk_id,
+                source_type=part.source_type,
+                source_path=part.source_path,
+                document_part_id=part.document_part_id,
+                document_checksum=part.checksum,
+                device_id=part.device_id,
+                unit_locator=part.unit_locator,
+                index=self.indices[row],
+                text=text,
+                created_at=part.created_at,
+                scope_id=scope_id,
+                metadata=self.metadata_at(row),
+            )
+            for row, (chunk_id, text) in enumerate(zip(self.ids, self.iter_texts()))
+        ]
+
+
+# Paragraph break: two line breaks in a row, in any line ending convention
+PARAGRAPH_BREAK_RE = re.compile(r"(?:\r\n|\r|\n){2}")
+LINE_BREAK_RE = re.compile(r"\r\n|\r|\n")
+# Whitespace after sentence-ending punctuation; the punctuation stays with the preceding sentence
+SENTENCE_BREAK_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def strip_span(text: str, start: int, end: int) -> Tuple[int, int]:
+    """
+    Offsets of text[start:end].strip() within `text`, without copying the slice.
+    """
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def split_spans(text: str, separator: re.Pattern, start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Stripped, non-empty spans of text[start:end] between matches of `separator`.
+    """
+    end = len(text) if end is None else end
+    spans = []
+    for match in separator.finditer(text, start, end):
+        span = strip_span(text, start, match.start())
+        if span[0] < span[1]:
+            spans.append(span)
+        start = match.end()
+    span = strip_span(text, start, end)
+    if span[0] < span[1]:
+        spans.append(span)
+    return spans
@@ -0,0 +1,81 @@
+import zlib
+from typing import List, Tuple
+
+from loseme_core.models import Chunk, DocumentPart
+from pipeline.chunking.chunk_batch import ChunkBatch, PARAGRAPH_BREAK_RE, SENTENCE_BREAK_RE, split_spans
+
+
+class ContentDefinedChunker:
+    """
+    Chunker whose boundaries and IDs depend only on nearby content.
+
+    A chunk ends after a sentence whose hash selects it as an anchor, or at the
+    end of a paragraph, once the chunk has at least `min_chars` characters; it is
+    cut early only to stay within `max_chars`. Because every decision looks at the
+    sentence at hand, editing one paragraph changes only the chunks around the edit,
+    and chunk IDs are derived from the chunk text. On re-ingest, chunks whose ID
+    is already stored are neither embedded nor written again, so their stored
+    `index` and start/end offsets stay those of the ingest that wrote them.
+
+    Parameters
+    ----------
+    min_chars : int
+        No boundary is placed before a chunk reaches this length (except at the end of the text).
+    max_chars : int
+        Hard upper limit; longer sentences are cut into `max_chars` pieces.
+    anchor_every : int
+        On average every n-th sentence is an anchor.
+    """
+
+    name = "content"
+    version = "1.0"
+
+    def __init__(self, min_chars: int = 300, max_chars: int = 1200, anchor_every: int = 4):
+        if min_chars > max_chars:
+            raise ValueError("min_chars must not exceed max_chars")
+        if anchor_every < 1:
+            raise ValueError("anchor_every must be >= 1")
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.anchor_every = anchor_every
+
+    def chunk(self, part: DocumentPart) -> Tuple[List[Chunk], List[str]]:
+        batch = self.chunk_batch(part)
+        return batch.to_chunks(), batch.texts()
+
+    def chunk_batch(self, part: DocumentPart) -> ChunkBatch:
+        batch = ChunkBatch(part, content_ids=True)
+        text = part.text or ""
+        start = end = None
+
+        for paragraph_start, paragraph_end in split_spans(text, PARAGRAPH_BREAK_RE):
+            for sentence_start, sentence_end in self._sentences(text, paragraph_start, paragraph_end):
+                if start is not None and sentence_end - start > self.max_chars:
+                    batch.append(start, end)
+                    start = None
+                if start is None:
+                    start = sentence_start
+                end = sentence_end
+                if end - start >= self.min_chars and self._is_anchor(text, sentence_start, sentence_end):
+                    batch.append(start, end)
+                    start = None
+
+            if start is not None and end - start >= self.min_chars:
+                batch.append(start, end)
+                start = None
+
+        if start is not None:
+            batch.append(start, end)
+        return batch
+
+    def _sentences(self, text: str, start: int, end: int) -> List[Tuple[int, int]]:
+        sentences = []
+        for sentence_start, sentence_end in split_spans(text, SENTENCE_BREAK_RE, start, end):
+            # Cut overlong sentences relative to their own start, so the cuts move with the sentence
+            for cut in range(sentence_start, sentence_end, self.max_chars):
+                sentences.append((cut, min(cut + self.max_chars, sentence_end)))
+        return sentences
+
+    def _is_anchor(self, text: str, start: int, end: int) -> bool:
+        # crc32 rather than hash(): it must not change between processes
+        return zlib.crc32(text[start:end].encode("utf-8")) % self.anchor_every == 0
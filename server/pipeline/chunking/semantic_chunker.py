@@ -2,8 +2,8 @@ from typing import List, Tuple
 import numpy as np
 
 from loseme_core.models import Chunk, DocumentPart
-from server.wiring import build_embedding_provider
-from loseme_core.ids import make_chunk_id
+from loseme_core.domain import EmbeddingOutput, EmbeddingProvider
+from pipeline.chunking.chunk_batch import ChunkBatch, LINE_BREAK_RE, PARAGRAPH_BREAK_RE, split_spans
 
 
 
@@ -13,113 +13,108 @@ class SemanticChunker:
 
     Algorithm:
     1. Split text into base units (paragraphs)
-    2. Embed each unit
+    2. Embed all units in one batched call
     3. Merge adjacent units if cosine similarity >= threshold
     4. Enforce max_chars hard limit
 
+    The unit embeddings are handed back with the chunk batch, so ingest
+    does not embed the same text a second time.
+
     Deterministic, order-preserving, resumable-safe.
     """
 
     name = "semantic"
-    version = "1.0"
+    version = "1.2"
 
     def __init__(
         self,
-        embedder: build_embedding_provider(),
+        embedder: EmbeddingProvider,
         similarity_threshold: float = 0.75,
         max_chars: int = 1200,
+        pool_merged_chunks: bool = True,
         ):
         self.similarity_threshold = similarity_threshold
         self.max_chars = max_chars
         self.embedder = embedder
+        # Mean-pool the unit vectors of merged chunks instead of embedding the merged text again
+        self.pool_merged_chunks = pool_merged_chunks
 
     def chunk(self, part: DocumentPart) -> Tuple[List[Chunk], List[str]]:
-
-        units = self._split_paragraphs(part.text)
+        batch = self.chunk_batch(part)
+        return batch.to_chunks(), batch.texts()
+
+    def chunk_batch(self, part: DocumentPart) -> ChunkBatch:
+        """
+        Chunk `part`. batch.embeddings holds, per chunk, an embedding derived from the
+        unit embeddings, or None where the chunk text still has to be embedded.
+        """
+        batch = ChunkBatch(part)
+        batch.embeddings = []
+        text = part.text or ""
+        units = self._split_paragraphs(text)
         if not units:
-            return [], []
-
-        # Embed each unit
-        embeddings = [self.embedder.embed_query(u) for u in units]
+            return batch
 
-        chunks: List[Chunk] = []
-        chunk_texts: List[str] = []
-
-        buffer = units[0]
-        buffer_len = len(buffer)
-        index = 0
+        embeddings = self.embedder.embed_documents([text[start:end] for start, end in units])
+        vectors = np.asarray([e.dense for e in embeddings], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1.0, norms)
+        # Cosine similarity of every unit with its predecessor, as one row-wise dot product
+        similarities = np.einsum("ij,ij->i", vectors[:-1], vectors[1:])
 
+        first = 0
         for i in range(1, len(units)):
-            # Extract dense vectors before computing similarity
-            vec_prev = np.array(embeddings[i - 1].dense)
-            vec_curr = np.array(embeddings[i].dense)
-            sim = float(np.dot(vec_prev, vec_curr))
-
-            if sim >= self.similarity_threshold and buffer_len + len(units[i]) <= self.max_chars:
-                buffer += "\n\n" + units[i]
-                buffer_len += len(units[i])
-            else:
-                self._emit_chunk(part, buffer, index, chunks, chunk_texts)
-                index += 1
-                buffer = units[i]
-                buffer_len = len(buffer)
+            if similarities[i - 1] < self.similarity_threshold or units[i][1] - units[first][0] > self.max_chars:
+                self._emit_group(batch, units, embeddings, vectors, first, i)
+                first = i
 
         # Emit last buffer
-        self._emit_chunk(part, buffer, index, chunks, chunk_texts)
-        return chunks, chunk_texts
-
+        self._emit_group(batch, units, embeddings, vectors, first, len(units))
+        return batch
 
-    def _emit_chunk(
+    def _emit_group(
         self,
-        document_part: DocumentPart,
-        text: str,
-        index: int,
-        chunks: List[Chunk],
-        chunk_texts: List[str],
-
+        batch: ChunkBatch,
+        units: List[Tuple[int, int]],
+        embeddings: List[EmbeddingOutput],
+        vectors: np.ndarray,
+        first: int,
+        end: int,
     ):
-        chunk_id = make_chunk_id(
-            document_part_id=document_part.document_part_id,
-            document_checksum=document_part.checksum,
-            index=index,
-        )
-
-        chunks.append(
-            Chunk(
-                id=chunk_id,
-                document_part_id=document_part.document_part_id,
-                source_type=document_part.source_type,
-                source_path=document_part.source_path,
-                document_checksum=document_part.checksum,
-                device_id=document_part.device_id,
-                index=index,
-                unit_locator=document_part.unit_locator,
-                metadata={
-                    "char_len": len(text),
-                },
-                text=text
-            )
-        )
-        chunk_texts.append(text)
-
-    def _split_paragraphs(self, text: str, hard_max: int = 2000) -> List[str]:
+        batch.append(units[first][0], units[end - 1][1])
+
+        if end - first == 1:
+            # The chunk is exactly one unit, so its embedding is exact
+            batch.embeddings.append(embeddings[first])
+        elif self.pool_merged_chunks and all(e.sparse is None and e.colbert_vec is None for e in embeddings[first:end]):
+            # Sparse and multi-vector outputs cannot be pooled, only plain dense vectors
+            pooled = vectors[first:end].mean(axis=0)
+            norm = np.linalg.norm(pooled)
+            if norm > 0:
+                pooled = pooled / norm
+            batch.embeddings.append(EmbeddingOutput(dense=pooled.tolist()))
+        else:
+            batch.embeddings.append(None)
+
+    def _split_paragraphs(self, text: str, hard_max: int = 2000) -> List[Tuple[int, int]]:
+        """
+        Unit spans: paragraphs, with oversized paragraphs split on line breaks.
+        """
         units = []
-        for paragraph in text.split("\n\n"):
-            paragraph = paragraph.strip()
-            if not paragraph:
+        for start, end in split_spans(text, PARAGRAPH_BREAK_RE):
+            if end - start <= hard_max:
+                units.append((start, end))
                 continue
-            # Hard-split oversized paragraphs on single newlines first
-            if len(paragraph) > hard_max:
-                lines = [l.strip() for l in paragraph.split("\n") if l.strip()]
-                buffer = ""
-                for line in lines:
-                    if buffer and len(buffer) + len(line) + 1 > hard_max:
-                        units.append(buffer)
-                        buffer = line
-                    else:
-                        buffer = (buffer + "\n" + line).strip() if buffer else line
-                if buffer:
-                    units.append(buffer)
-            else:
-                units.append(paragraph)
+            # Hard-split oversized paragraphs on single newlines
+            buffer_start = None
+            buffer_end = None
+            for line_start, line_end in split_spans(text, LINE_BREAK_RE, start, end):
+                if buffer_start is not None and line_end - buffer_start > hard_max:
+                    units.append((buffer_start, buffer_end))
+                    buffer_start = None
+                if buffer_start is None:
+                    buffer_start = line_start
+                buffer_end = line_end
+            if buffer_start is not None:
+                units.append((buffer_start, buffer_end))
         return units
@@ -1,13 +1,7 @@
-import re
 from typing import List, Tuple
 
 from loseme_core.models import Chunk, DocumentPart
-from loseme_core.ids import make_chunk_id
-
-
-# Regex that splits on sentence-ending punctuation followed by whitespace or end-of-string.
-# Keeps the delimiter attached to the preceding sentence (positive lookbehind).
-_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+from pipeline.chunking.chunk_batch import ChunkBatch, PARAGRAPH_BREAK_RE, SENTENCE_BREAK_RE, split_spans
 
 
 class SentenceAwareChunker:
@@ -37,7 +31,7 @@ class SentenceAwareChunker:
     """
     
     name = "sentence"
-    version = "1.0"
+    version = "1.1"
 
 
     def __init__(
@@ -55,104 +49,54 @@ class SentenceAwareChunker:
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
-    def _split_sentences(self, text: str) -> List[str]:
-        text = text.replace("\r\n", "\n").replace("\r", "\n")
-
-        sentences: List[str] = []
-        for paragraph in text.split("\n\n"):
-            paragraph = paragraph.strip()
-            if not paragraph:
-                continue
-            para_sentences = []
-            for sent in _SENTENCE_SPLIT_RE.split(paragraph):
-                sent = sent.strip()
-                if sent:
-                    para_sentences.append(sent)
-            if para_sentences:
-                sentences.append(para_sentences)  # keep paragraphs grouped
-
-        return sentences  # now List[List[str]] — one list per paragraph
+    def _split_sentences(self, text: str) -> List[List[Tuple[int, int]]]:
+        """
+        Sentence spans of `text`, one list per paragraph (paragraphs are never merged).
+        """
+        sentences = []
+        for paragraph_start, paragraph_end in split_spans(text, PARAGRAPH_BREAK_RE):
+            paragraph_sentences = split_spans(text, SENTENCE_BREAK_RE, paragraph_start, paragraph_end)
+            if paragraph_sentences:
+                sentences.append(paragraph_sentences)
+        return sentences
 
     def chunk(self, part: DocumentPart) -> Tuple[List[Chunk], List[str]]:
-        paragraphs = self._split_sentences(part.text)
-        if not paragraphs:
-            return [], []
-
-        chunks: List[Chunk] = []
-        chunk_texts: List[str] = []
-        index = 0
+        batch = self.chunk_batch(part)
+        return batch.to_chunks(), batch.texts()
 
-        for para_sentences in paragraphs:
-            groups = self._group_sentences(para_sentences)
-            for group in groups:
-                text = " ".join(group)
-                chunk_id = make_chunk_id(
-                    document_part_id=part.document_part_id,
-                    document_checksum=part.checksum,
-                    index=index,
-                )
-                chunks.append(
-                    Chunk(
-                        id=chunk_id,
-                        source_type=part.source_type,
-                        source_path=part.source_path,
-                        document_part_id=part.document_part_id,
-                        document_checksum=part.checksum,
-                        device_id=part.device_id,
-                        unit_locator=part.unit_locator,
-                        index=index,
-                        text=text,
-                        metadata={
-                            "char_len": len(text),
-                            "sentence_count": len(group),
-                        },
-                    )
-                )
-                chunk_texts.append(text)
-                index += 1
+    def chunk_batch(self, part: DocumentPart) -> ChunkBatch:
+        batch = ChunkBatch(part, columns=("sentence_count",))
+        for sentences in self._split_sentences(part.text or ""):
+            for first, last in self._group_sentences(sentences):
+                batch.append(sentences[first][0], sentences[last][1], sentence_count=last - first + 1)
+        return batch
 
-        return chunks, chunk_texts
-
-
-    def _group_sentences(self, sentences: List[str]) -> List[List[str]]:
+    def _group_sentences(self, sentences: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
         """
-        Greedily pack sentences into groups bounded by `max_chars`, with
+        Greedily pack sentence spans into groups bounded by `max_chars`, with
         sentence-level overlap between adjacent groups.
+        Returns (first, last) sentence indices per group, both inclusive.
         """
-        groups: List[List[str]] = []
-        current: List[str] = []
-        current_len = 0
-
-        i = 0
-        while i < len(sentences):
-            sent = sentences[i]
-            sent_len = len(sent)
-
-            fits = current_len + (1 if current else 0) + sent_len <= self.max_chars
-
-            if fits or not current:
-                # Always accept if current is empty (avoids infinite loop on
-                # single sentences longer than max_chars).
-                current.append(sent)
-                current_len += (1 if len(current) > 1 else 0) + sent_len
-                i += 1
-            else:
-                # Flush current group
-                groups.append(current)
-                # Seed next group with overlap tail of the flushed group
-                overlap = current[-self.overlap_sentences:] if self.overlap_sentences else []
-                current = list(overlap)
-                current_len = sum(len(s) for s in current) + max(0, len(current) - 1)
-                # Do NOT advance i — re-evaluate the same sentence in the new group
-
-        # Flush the last group
-        if current:
-            # Merge tiny trailing chunks into the previous group
-            if groups and self.min_chars and len(" ".join(current)) < self.min_chars:
-                groups[-1].extend(
-                    s for s in current if s not in groups[-1][-self.overlap_sentences:]
-                )
-            else:
-                groups.append(current)
+        groups: List[Tuple[int, int]] = []
+        first = 0
+        for i in range(1, len(sentences)):
+            if sentences[i][1] - sentences[first][0] <= self.max_chars:
+                continue
+            # Flush the group before sentence i. A sentence longer than max_chars
+            # still forms its own group rather than being dropped.
+            groups.append((first, i - 1))
+            # Seed the next group with the overlap tail of the flushed group, as far as it fits
+            seed = max(i - self.overlap_sentences, first + 1)
+            while seed < i and sentences[i][1] - sentences[seed][0] > self.max_chars:
+                seed += 1
+            first = seed
+        groups.append((first, len(sentences) - 1))
+
+        # Merge a tiny trailing chunk into the previous group
+        if len(groups) > 1 and self.min_chars:
+            last_first, last_last = groups[-1]
+            if sentences[last_last][1] - sentences[last_first][0] < self.min_chars:
+                groups.pop()
+                groups[-1] = (groups[-1][0], last_last)
 
         return groups
@@ -1,7 +1,7 @@
 from typing import List, Tuple
 
 from loseme_core.models import Chunk, DocumentPart
-from loseme_core.ids import make_chunk_id
+from pipeline.chunking.chunk_batch import ChunkBatch
 
 
 class SimpleTextChunker:
@@ -24,46 +24,15 @@ class SimpleTextChunker:
         self.overlap = overlap
 
     def chunk(self, part: DocumentPart) -> Tuple[List[Chunk], List[str]]:
-        if not part.text:
-            return [], []
+        batch = self.chunk_batch(part)
+        return batch.to_chunks(), batch.texts()
 
-        chunks = []
-        chunk_texts = []
-        start = 0
-        index = 0
+    def chunk_batch(self, part: DocumentPart) -> ChunkBatch:
+        batch = ChunkBatch(part)
+        length = len(part.text or "")
         step = self.chunk_size - self.overlap
 
-        while start < len(part.text):
-            end = start + self.chunk_size
-            chunk_text = part.text[start:end]
+        for start in range(0, length, step):
+            batch.append(start, min(start + self.chunk_size, length))
 
-            chunk_id = make_chunk_id(
-                document_part_id=part.document_part_id,
-                document_checksum=part.checksum,
-                index=index,
-            )
-
-            chunks.append(
-                Chunk(
-                    id=chunk_id,
-                    source_type=part.source_type,
-                    source_path=part.source_path,
-                    document_part_id=part.document_part_id,
-                    document_checksum=part.checksum,
-                    device_id=part.device_id,
-                    unit_locator=part.unit_locator,
-                    index=index,
-                    text=chunk_text,
-                    metadata={
-                        "start": start,
-                        "end": min(end, len(part.text)),
-                        "char_len": len(chunk_text),
-                    },
-                )
-            )
-            chunk_texts.append(chunk_text)
-
-            index += 1
-            start += step
-
-        return chunks, chunk_texts
+        return batch
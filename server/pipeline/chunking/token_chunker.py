@@ -0,0 +1,150 @@
+from typing import List, Optional, Tuple
+
+from loseme_core.models import Chunk, DocumentPart
+from loseme_core.domain import EmbeddingProvider
+from loseme_core.config import EMBEDDING_MODEL
+from pipeline.chunking.chunk_batch import ChunkBatch, PARAGRAPH_BREAK_RE, SENTENCE_BREAK_RE, split_spans
+from pipeline.chunking.token_counter import PIECE_RE, ApproximateTokenCounter, get_token_counter
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Window assumed for providers that do not report their max sequence length
+DEFAULT_MAX_TOKENS = 256
+
+# Rounds of re-splitting chunks that the exact tokenizer still finds too long
+_MAX_FIT_ROUNDS = 3
+
+
+class TokenBudgetChunker:
+    """
+    Packs whole sentences into chunks that fill, but never exceed, the embedding
+    model's input window, so no chunk text is silently truncated by the model.
+
+    Sentences are measured with an approximate token counter calibrated once per
+    model against the provider's tokenizer. The packed chunks are then checked
+    with the real tokenizer in one batched call, and the rare chunk that is still
+    too long is split further. Sentences longer than the window are split between words.
+
+    Parameters
+    ----------
+    embedder : EmbeddingProvider
+        Provides the tokenizer and max sequence length of the active model.
+    model_name : str
+        Key under which the token counter calibration is cached.
+    max_tokens : int, optional
+        Upper limit below the model window, e.g. to get smaller chunks. 0 or None uses the full window.
+    """
+
+    name = "token"
+    version = "1.0"
+
+    def __init__(
+        self,
+        embedder: EmbeddingProvider,
+        model_name: str = EMBEDDING_MODEL,
+        max_tokens: Optional[int] = None,
+    ):
+        self.embedder = embedder
+        self.model_name = model_name
+        window = embedder.max_sequence_length() or DEFAULT_MAX_TOKENS
+        self.max_tokens = min(max_tokens, window) if max_tokens else window
+
+    def chunk(self, part: DocumentPart) -> Tuple[List[Chunk], List[str]]:
+        batch = self.chunk_batch(part)
+        return batch.to_chunks(), batch.texts()
+
+    def chunk_batch(self, part: DocumentPart) -> ChunkBatch:
+        batch = ChunkBatch(part)
+        text = part.text or ""
+        sentences = [
+            sentence
+            for paragraph_start, paragraph_end in split_spans(text, PARAGRAPH_BREAK_RE)
+            for sentence in split_spans(text, SENTENCE_BREAK_RE, paragraph_start, paragraph_end)
+        ]
+        if not sentences:
+            return batch
+
+        counter = get_token_counter(self.model_name, self.embedder, [text[s:e] for s, e in sentences[:64]])
+        spans = self._pack(text, sentences, counter, self._max_pieces(counter, self.max_tokens))
+        for start, end in self._fit_exact(text, spans, counter):
+            batch.append(start, end)
+        return batch
+
+    def _max_pieces(self, counter: ApproximateTokenCounter, max_tokens: int) -> int:
+        return max(1, int((max_tokens - counter.special_tokens) / counter.tokens_per_piece))
+
+    def _pack(
+        self, text: str, sentences: List[Tuple[int, int]], counter: ApproximateTokenCounter, max_pieces: int
+    ) -> List[Tuple[int, int]]:
+        """
+        Greedily group adjacent sentences while their piece count stays within `max_pieces`.
+        """
+        spans: List[Tuple[int, int]] = []
+        current_start = current_end = None
+        current_pieces = 0
+
+        for start, end in sentences:
+            pieces = counter.count_pieces(text, start, end)
+            if current_start is not None and current_pieces + pieces > max_pieces:
+                spans.append((current_start, current_end))
+                current_start = None
+            if pieces > max_pieces:
+                spans.extend(self._split_words(text, start, end, max_pieces))
+                continue
+            if current_start is None:
+                current_start, current_pieces = start, 0
+            current_end = end
+            current_pieces += pieces
+
+        if current_start is not None:
+            spans.append((current_start, current_end))
+        return spans
+
+    def _split_words(self, text: str, start: int, end: int, max_pieces: int) -> List[Tuple[int, int]]:
+        """
+        Split text[start:end] into spans of at most `max_pieces` pieces, between pieces.
+        """
+        spans = []
+        span_start = span_end = None
+        count = 0
+        for match in PIECE_RE.finditer(text, start, end):
+            if count == max_pieces:
+                spans.append((span_start, span_end))
+                span_start, count = None, 0
+            if span_start is None:
+                span_start = match.start()
+            span_end = match.end()
+            count += 1
+        if span_start is not None:
+            spans.append((span_start, span_end))
+        return spans or [(start, end)]
+
+    def _fit_exact(self, text: str, spans: List[Tuple[int, int]], counter: ApproximateTokenCounter) -> List[Tuple[int, int]]:
+        """
+        Re-split spans the provider's tokenizer counts as longer than max_tokens.
+        Without a tokenizer the approximate packing is kept as is.
+        """
+        for _ in range(_MAX_FIT_ROUNDS):
+            lengths = self.embedder.count_tokens([text[s:e] for s, e in spans])
+            if lengths is None or all(n <= self.max_tokens for n in lengths):
+                return spans
+
+            fitted = []
+            for (start, end), n in zip(spans, lengths):
+                if n <= self.max_tokens:
+                    fitted.append((start, end))
+                    continue
+                # Shrink in proportion to the overshoot, using this span's own token density
+                fraction = (self.max_tokens - counter.special_tokens) / max(n - counter.special_tokens, 1)
+                pieces = counter.count_pieces(text, start, end)
+                if pieces > 1:
+                    fitted.extend(self._split_words(text, start, end, max(1, int(pieces * fraction))))
+                else:
+                    # A single unbroken piece (e.g. base64) can only be cut by characters
+                    step = max(1, int((end - start) * fraction))
+                    fitted.extend((i, min(i + step, end)) for i in range(start, end, step))
+            spans = fitted
+
+        logger.warning(f"Some chunks still exceed {self.max_tokens} tokens after {_MAX_FIT_ROUNDS} rounds of splitting.")
+        return spans
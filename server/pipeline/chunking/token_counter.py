@@ -0,0 +1,88 @@
+import math
+import re
+import threading
+from typing import Dict, List, Optional
+
+from loseme_core.domain import EmbeddingProvider
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Words, numbers and single punctuation marks: roughly what a subword tokenizer splits on first
+PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+# Used when the provider has no tokenizer to calibrate against
+DEFAULT_TOKENS_PER_PIECE = 1.3
+DEFAULT_SPECIAL_TOKENS = 2
+
+# Texts sampled from the first document to calibrate a model
+_CALIBRATION_SAMPLES = 64
+
+
+class ApproximateTokenCounter:
+    """
+    Fast token count estimate for one model: the number of word and punctuation
+    pieces times a tokens-per-piece ratio measured with the model's real tokenizer.
+    Counts are additive over adjacent spans, so chunkers can sum them while packing.
+    """
+
+    def __init__(self, tokens_per_piece: float = DEFAULT_TOKENS_PER_PIECE, special_tokens: int = DEFAULT_SPECIAL_TOKENS):
+        self.tokens_per_piece = tokens_per_piece
+        self.special_tokens = special_tokens
+
+    def count_pieces(self, text: str, start: int = 0, end: Optional[int] = None) -> int:
+        end = len(text) if end is None else end
+        return sum(1 for _ in PIECE_RE.finditer(text, start, end))
+
+    def estimate(self, pieces: int) -> int:
+        """
+        Estimated tokens of a text with `pieces` pieces, without special tokens.
+        """
+        return math.ceil(pieces * self.tokens_per_piece)
+
+
+_counters: Dict[str, ApproximateTokenCounter] = {}
+_counters_lock = threading.Lock()
+
+
+def calibrate(provider: EmbeddingProvider, samples: List[str]) -> ApproximateTokenCounter:
+    """
+    Measure the tokens-per-piece ratio of `provider` on `samples`.
+    Falls back to the default ratio if the provider has no tokenizer.
+    """
+    samples = [s for s in samples if s.strip()][:_CALIBRATION_SAMPLES]
+    exact = provider.count_tokens([""] + samples) if samples else None
+    if not exact:
+        return ApproximateTokenCounter()
+
+    special_tokens = exact[0]
+    counter = ApproximateTokenCounter(special_tokens=special_tokens)
+    pieces = sum(counter.count_pieces(s) for s in samples)
+    tokens = sum(n - special_tokens for n in exact[1:])
+    if pieces:
+        counter.tokens_per_piece = max(tokens / pieces, 0.1)
+    return counter
+
+
+def get_token_counter(model_name: str, provider: EmbeddingProvider, samples: List[str]) -> ApproximateTokenCounter:
+    """
+    The calibrated counter of `model_name`, calibrated on `samples` the first time it is requested.
+    """
+    counter = _counters.get(model_name)
+    if counter is not None:
+        return counter
+    with _counters_lock:
+        counter = _counters.get(model_name)
+        if counter is None:
+            counter = calibrate(provider, samples)
+            _counters[model_name] = counter
+            logger.info(
+                f"Calibrated token counter for {model_name}: {counter.tokens_per_piece:.3f} tokens per piece, "
+                f"{counter.special_tokens} special tokens."
+            )
+    return counter
+
+
+def clear_token_counters() -> None:
+    with _counters_lock:
+        _counters.clear()
@@ -1,9 +1,10 @@
 from FlagEmbedding import BGEM3FlagModel
 import numpy as np
 import torch
+from typing import List, Optional
 
 from loseme_core.domain import EmbeddingProvider, EmbeddingOutput
-from loseme_core.config import USE_CUDA
+from loseme_core.config import USE_CUDA, EMBEDDING_BATCH_SIZE
 
 import logging
 logger = logging.getLogger(__name__)
@@ -32,17 +33,34 @@ class BGEM3EmbeddingProvider(EmbeddingProvider):
         return result
     
     def embed_document(self, text: str) -> EmbeddingOutput:
-        with torch.no_grad(): 
+        return self.embed_documents([text])[0]
+
+    def embed_documents(self, texts: List[str]) -> List[EmbeddingOutput]:
+        if not texts:
+            return []
+        with torch.no_grad():
             embedding = self.model.encode(
-                [text],
+                texts,
+                batch_size=EMBEDDING_BATCH_SIZE,
                 return_dense=True,
                 return_sparse=True,
                 return_colbert_vecs=True,
             )
         dense, sparse, colbert = embedding["dense_vecs"], embedding["lexical_weights"], embedding["colbert_vecs"]
-        result = EmbeddingOutput(dense=self._to_numpy(dense[0]), sparse=sparse[0], colbert_vec=self._to_numpy(colbert[0]))
+        results = [
+            EmbeddingOutput(dense=self._to_numpy(dense[i]), sparse=sparse[i], colbert_vec=self._to_numpy(colbert[i]))
+            for i in range(len(texts))
+        ]
         del embedding, dense, colbert
-        return result
+        return results
+
+    def max_sequence_length(self) -> Optional[int]:
+        # BGEM3FlagModel.encode truncates documents at max_length=8192 by default
+        return 8192
+
+    def count_tokens(self, texts: List[str]) -> Optional[List[int]]:
+        encoded = self.model.tokenizer(texts, add_special_tokens=True, truncation=False, verbose=False)
+        return [len(ids) for ids in encoded["input_ids"]]
 
     def _to_numpy(self, x):
         if isinstance(x, torch.Tensor):
@@ -20,6 +20,9 @@ class DummyEmbeddingProvider(EmbeddingProvider):
     def embed_document(self, text: str) -> EmbeddingOutput:
         return self._embed_text(text)
 
+    def embed_documents(self, texts: List[str]) -> List[EmbeddingOutput]:
+        return [self._embed_text(text) for text in texts]
+
     def dimension(self) -> int:
         return self._dimension
     
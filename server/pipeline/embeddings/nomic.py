@@ -1,6 +1,7 @@
-from typing import List
+from typing import List, Optional
 from sentence_transformers import SentenceTransformer
 from loseme_core.domain import EmbeddingProvider, EmbeddingOutput
+from loseme_core.config import EMBEDDING_BATCH_SIZE
 
 class NomicEmbeddingProvider(EmbeddingProvider):
     def __init__(self, model_name: str = "nomic-ai/nomic-embed-text-v1"):
@@ -11,12 +12,7 @@ class NomicEmbeddingProvider(EmbeddingProvider):
         )
 
     def embed_document(self, text: str) -> EmbeddingOutput:
-        annotated_text = "search_document: " + text
-        embedding = self._model.encode(
-            annotated_text,
-            normalize_embeddings=True,
-        ).tolist()
-        return EmbeddingOutput(dense=embedding)
+        return self.embed_documents([text])[0]
 
     def embed_query(self, text: str) -> EmbeddingOutput:
         annotated_text = "search_query: " + text
@@ -26,14 +22,26 @@ class NomicEmbeddingProvider(EmbeddingProvider):
         ).tolist()
         return EmbeddingOutput(dense=embedding)
     
-    def batch_embed_documents(self, texts: List[str]) -> List[EmbeddingOutput]:
+    def embed_documents(self, texts: List[str]) -> List[EmbeddingOutput]:
+        if not texts:
+            return []
         annotated_texts = ["search_document: " + text for text in texts]
         embeddings = self._model.encode(
             annotated_texts,
+            batch_size=EMBEDDING_BATCH_SIZE,
             normalize_embeddings=True,
+            show_progress_bar=False,
         )
         return [EmbeddingOutput(dense=embedding.tolist()) for embedding in embeddings]
 
     def dimension(self) -> int:
         return self._model.get_sentence_embedding_dimension()
 
+    def max_sequence_length(self) -> Optional[int]:
+        return self._model.max_seq_length
+
+    def count_tokens(self, texts: List[str]) -> Optional[List[int]]:
+        # Documents are embedded with their prefix, so it counts towards the window
+        annotated_texts = ["search_document: " + text for text in texts]
+        encoded = self._model.tokenizer(annotated_texts, add_special_tokens=True, truncation=False, verbose=False)
+        return [len(ids) for ids in encoded["input_ids"]]
@@ -0,0 +1,88 @@
+import threading
+from typing import Dict
+
+from loseme_core.config import EMBEDDING_DIMENSION, EMBEDDING_MODEL
+from loseme_core.domain import EmbeddingProvider
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Output dimensions of the supported models, so vector stores can size collections
+# without loading weights. LOSEME_EMBEDDING_DIMENSION overrides this for other models.
+KNOWN_DIMENSIONS: Dict[str, int] = {
+    "sentence-transformer:all-MiniLM-L6-v2": 384,
+    "sentence-transformer:all-MiniLM-L12-v2": 384,
+    "sentence-transformer:all-mpnet-base-v2": 768,
+    "nomic-ai/nomic-embed-text-v1": 768,
+    "bge-m3": 1024,
+}
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of embedding providers.
+
+    Each model is loaded at most once, on first use, and shared by search, ingest,
+    the semantic chunker and the vector stores. Loading is thread-safe: concurrent
+    first requests wait for a single load instead of each building their own copy.
+    """
+
+    def __init__(self):
+        self._providers: Dict[str, EmbeddingProvider] = {}
+        self._dimensions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get_embedding_provider(self, model_name: str = EMBEDDING_MODEL) -> EmbeddingProvider:
+        provider = self._providers.get(model_name)
+        if provider is not None:
+            return provider
+
+        with self._lock:
+            provider = self._providers.get(model_name)
+            if provider is None:
+                # Looked up at call time so wiring.build_embedding_provider stays patchable
+                import wiring
+                logger.info(f"Loading embedding model {model_name}")
+                provider = wiring.build_embedding_provider(model_name)
+                self._providers[model_name] = provider
+                self._dimensions[model_name] = provider.dimension()
+        return provider
+
+    def is_loaded(self, model_name: str = EMBEDDING_MODEL) -> bool:
+        return model_name in self._providers
+
+    def dimension(self, model_name: str = EMBEDDING_MODEL) -> int:
+        """
+        Vector dimension of `model_name`. Only loads the model if the dimension is not known otherwise.
+        """
+        dimension = self._dimensions.get(model_name)
+        if dimension is not None:
+            return dimension
+
+        if EMBEDDING_DIMENSION and model_name == EMBEDDING_MODEL:
+            dimension = EMBEDDING_DIMENSION
+        else:
+            dimension = KNOWN_DIMENSIONS.get(model_name)
+
+        if dimension is None:
+            return self.get_embedding_provider(model_name).dimension()
+
+        self._dimensions[model_name] = dimension
+        return dimension
+
+    def register(self, model_name: str, provider: EmbeddingProvider) -> None:
+        """
+        Use an already constructed provider for `model_name`, e.g. a dummy provider in tests.
+        """
+        with self._lock:
+            self._providers[model_name] = provider
+            self._dimensions[model_name] = provider.dimension()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._providers.clear()
+            self._dimensions.clear()
+
+
+# Singleton — shared by the whole process
+model_registry = ModelRegistry()
@@ -1,6 +1,8 @@
+from typing import List, Optional
 from sentence_transformers import SentenceTransformer
 
 from loseme_core.domain import EmbeddingProvider, EmbeddingOutput
+from loseme_core.config import EMBEDDING_BATCH_SIZE
 
 class SentenceTransformerEmbeddingProvider(EmbeddingProvider):
     def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
@@ -18,3 +20,25 @@ class SentenceTransformerEmbeddingProvider(EmbeddingProvider):
         )
 
         output = EmbeddingOutput(dense=embedding.tolist())
+        return output
+
+    def embed_document(self, text: str) -> EmbeddingOutput:
+        return self.embed_documents([text])[0]
+
+    def embed_documents(self, texts: List[str]) -> List[EmbeddingOutput]:
+        if not texts:
+            return []
+        embeddings = self.model.encode(
+            texts,
+            batch_size=EMBEDDING_BATCH_SIZE,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return [EmbeddingOutput(dense=embedding.tolist()) for embedding in embeddings]
+
+    def max_sequence_length(self) -> Optional[int]:
+        return self.model.max_seq_length
+
+    def count_tokens(self, texts: List[str]) -> Optional[List[int]]:
+        encoded = self.model.tokenizer(texts, add_special_tokens=True, truncation=False, verbose=False)
+        return [len(ids) for ids in encoded["input_ids"]]
@@ -19,9 +19,10 @@ import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
 
 from qdrant_client import QdrantClient
+from loseme_core.config import QDRANT_COLLECTION
 
 QDRANT_URL  = os.getenv("QDRANT_URL", "http://qdrant:6333")
-COLLECTION  = "chunks"
+COLLECTION  = QDRANT_COLLECTION
 OUTPUT_PATH = "/mnt/userdata/chunk_stats.png"
 
 
@@ -0,0 +1,73 @@
+"""
+Rebuild the Qdrant collection behind the LOSEME_QDRANT_COLLECTION alias while
+the server keeps ingesting and searching, e.g. to apply a new LOSEME_QDRANT_PROFILE.
+
+The points are copied into the next versioned collection (chunks_v2, chunks_v3, ...),
+writes made meanwhile are mirrored into it, and the alias is swapped in one request.
+Run it with the same environment as the server, so the new collection gets the
+configured profile.
+
+Usage (from project root):
+    docker compose exec server python -m scripts.rebuild_collection
+    docker compose exec server python -m scripts.rebuild_collection --workers 8 --keep-old
+    docker compose exec server python -m scripts.rebuild_collection --abort   # after a crashed rebuild
+"""
+
+import argparse
+import logging
+
+from loseme_core.config import QDRANT_COLLECTION
+from storage.metadata_db.db import init_db
+from storage.metadata_db.vector_rebuilds import finish_rebuild, get_active_rebuild
+from storage.vector_db.rebuild import REBUILD_BATCH_SIZE, REBUILD_SETTLE_SECONDS, REBUILD_WORKERS, CollectionRebuild
+from storage.vector_db.runtime import get_vector_store
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s  %(levelname)-8s  %(message)s",
+    datefmt="%H:%M:%S",
+)
+logger = logging.getLogger("rebuild")
+
+
+def abort() -> None:
+    rebuild = get_active_rebuild(QDRANT_COLLECTION)
+    if rebuild is None:
+        logger.info("No rebuild of '%s' is running.", QDRANT_COLLECTION)
+        return
+    store = get_vector_store()
+    finish_rebuild(rebuild["id"], "aborted")
+    store.client.delete_collection(rebuild["target_collection"])
+    logger.info("Aborted rebuild %s and deleted '%s'.", rebuild["id"], rebuild["target_collection"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the Qdrant chunk collection without downtime.")
+    parser.add_argument("--batch-size", type=int, default=REBUILD_BATCH_SIZE, help="Points per scroll and upsert.")
+    parser.add_argument("--workers", type=int, default=REBUILD_WORKERS, help="Concurrent upserts.")
+    parser.add_argument(
+        "--settle-seconds",
+        type=float,
+        default=REBUILD_SETTLE_SECONDS,
+        help="Wait for running writers to notice the rebuild before copying.",
+    )
+    parser.add_argument("--keep-old", action="store_true", help="Keep the previous collection after the swap.")
+    parser.add_argument("--abort", action="store_true", help="End a rebuild left behind by a crashed run.")
+    args = parser.parse_args()
+
+    init_db()
+    if args.abort:
+        abort()
+        return
+
+    CollectionRebuild(
+        get_vector_store(),
+        batch_size=args.batch_size,
+        workers=args.workers,
+        settle_seconds=args.settle_seconds,
+        keep_old=args.keep_old,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from loseme_core.config import EMBEDDING_CACHE_MAX_BYTES, EMBEDDING_CACHE_PATH
+from loseme_core.domain import EmbeddingOutput
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Evicting down to this fraction of the limit avoids running an eviction on every insert
+_EVICT_TO_FRACTION = 0.9
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalization applied before hashing, so whitespace-only and Unicode-composition
+    differences between otherwise identical chunks share one cache entry.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(model_name: str, text: str) -> bytes:
+    return hashlib.sha256(f"{model_name}\0{normalize_text(text)}".encode("utf-8")).digest()
+
+
+def _pack(embedding: EmbeddingOutput) -> tuple:
+    dense = None
+    if embedding.dense is not None:
+        dense = np.asarray(embedding.dense, dtype=np.float16).tobytes()
+
+    sparse_indices = sparse_values = None
+    if embedding.sparse is not None:
+        sparse_indices = np.fromiter(embedding.sparse.keys(), dtype=np.int32, count=len(embedding.sparse)).tobytes()
+        sparse_values = np.fromiter(embedding.sparse.values(), dtype=np.float16, count=len(embedding.sparse)).tobytes()
+
+    colbert = None
+    colbert_dim = None
+    if embedding.colbert_vec is not None:
+        matrix = np.asarray(embedding.colbert_vec, dtype=np.float16)
+        colbert = matrix.tobytes()
+        colbert_dim = matrix.shape[1] if matrix.ndim == 2 else 0
+
+    return dense, sparse_indices, sparse_values, colbert, colbert_dim
+
+
+def _unpack(dense, sparse_indices, sparse_values, colbert, colbert_dim) -> EmbeddingOutput:
+    sparse = None
+    if sparse_indices is not None:
+        indices = np.frombuffer(sparse_indices, dtype=np.int32)
+        values = np.frombuffer(sparse_values, dtype=np.float16).astype(np.float32)
+        sparse = dict(zip(indices.tolist(), values.tolist()))
+
+    colbert_vec = None
+    if colbert is not None:
+        matrix = np.frombuffer(colbert, dtype=np.float16).astype(np.float32)
+        colbert_vec = matrix.reshape(-1, colbert_dim).tolist() if colbert_dim else []
+
+    return EmbeddingOutput(
+        dense=np.frombuffer(dense, dtype=np.float16).astype(np.float32).tolist() if dense is not None else None,
+        sparse=sparse,
+        colbert_vec=colbert_vec,
+    )
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed cache of document embeddings.
+
+    Entries are keyed by (model name, normalized text hash) and stored as float16,
+    so re-embedding unchanged content (force_reprocess, chunker version bumps that keep
+    chunk boundaries, the same file on several devices) becomes a lookup.
+    The total size is capped at `max_bytes`; the least recently used entries are evicted first.
+    """
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode = WAL;")
+        self._conn.execute("PRAGMA synchronous = NORMAL;")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key BLOB PRIMARY KEY,
+                dense BLOB,
+                sparse_indices BLOB,
+                sparse_values BLOB,
+                colbert BLOB,
+                colbert_dim INTEGER,
+                size_bytes INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used);")
+        self._conn.commit()
+        # Tracked per process; with several workers sharing the file each one evicts on its own estimate
+        self._size_bytes = self._conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM embeddings").fetchone()[0]
+
+    def _select_in(self, select: str, keys: List[bytes]) -> list:
+        rows = []
+        # Stay well below SQLite's host parameter limit
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ", ".join("?" for _ in batch)
+            rows.extend(self._conn.execute(f"{select} FROM embeddings WHERE key IN ({placeholders})", batch).fetchall())
+        return rows
+
+    def get_many(self, keys: Iterable[bytes]) -> Dict[bytes, EmbeddingOutput]:
+        """
+        Look up several keys at once. Returns only the keys that were found.
+        """
+        unique_keys = list(dict.fromkeys(keys))
+        found: Dict[bytes, EmbeddingOutput] = {}
+        with self._lock:
+            rows = self._select_in(
+                "SELECT key, dense, sparse_indices, sparse_values, colbert, colbert_dim",
+                unique_keys,
+            )
+            for key, *packed in rows:
+                found[key] = _unpack(*packed)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(unique_keys) - len(found)
+        return found
+
+    def put_many(self, entries: Dict[bytes, EmbeddingOutput]) -> None:
+        if not entries:
+            return
+        now = time.time()
+        rows = []
+        for key, embedding in entries.items():
+            packed = _pack(embedding)
+            size = len(key) + sum(len(blob) for blob in packed[:4] if blob is not None)
+            rows.append((key, *packed, size, now))
+
+        with self._lock:
+            # Replaced entries must not be counted twice
+            previous = sum(size for _, size in self._select_in("SELECT key, size_bytes", list(entries)))
+            self._conn.executemany(
+                """
+                INSERT OR REPLACE INTO embeddings
+                    (key, dense, sparse_indices, sparse_values, colbert, colbert_dim, size_bytes, last_used)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            self._size_bytes += sum(row[6] for row in rows) - previous
+            if self._size_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        target = int(self.max_bytes * _EVICT_TO_FRACTION)
+        cursor = self._conn.execute("SELECT key, size_bytes FROM embeddings ORDER BY last_used ASC")
+        evicted = []
+        for key, size in cursor:
+            if self._size_bytes <= target:
+                break
+            evicted.append((key,))
+            self._size_bytes -= size
+        cursor.close()
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", evicted)
+        logger.info(f"Evicted {len(evicted)} entries from the embedding cache ({self._size_bytes} bytes remain).")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "size_bytes": self._size_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._size_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Return the process-wide embedding cache, or None if it is disabled (LOSEME_EMBEDDING_CACHE_MAX_BYTES=0).
+    """
+    global _embedding_cache
+    if EMBEDDING_CACHE_MAX_BYTES <= 0:
+        return None
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache(Path(EMBEDDING_CACHE_PATH), EMBEDDING_CACHE_MAX_BYTES)
+    return _embedding_cache
+
+
+def embed_texts_cached(
+    provider,
+    model_name: str,
+    texts: List[str],
+    batch_size: int,
+    cache: Optional[EmbeddingCache] = None,
+) -> List[EmbeddingOutput]:
+    """
+    Embed `texts` with `provider`, answering from `cache` where possible.
+    Only cache misses reach the provider, each distinct text once, in slices of `batch_size`.
+    """
+    def _embed(batch: List[str]) -> List[EmbeddingOutput]:
+        embeddings: List[EmbeddingOutput] = []
+        for start in range(0, len(batch), batch_size):
+            embeddings.extend(provider.embed_documents(batch[start:start + batch_size]))
+        return embeddings
+
+    if cache is None:
+        return _embed(texts)
+
+    keys = [cache_key(model_name, text) for text in texts]
+    found = cache.get_many(keys)
+
+    missing: Dict[bytes, str] = {}
+    for key, text in zip(keys, texts):
+        if key not in found:
+            missing.setdefault(key, text)
+
+    if missing:
+        fresh = dict(zip(missing.keys(), _embed(list(missing.values()))))
+        cache.put_many(fresh)
+        found.update(fresh)
+
+    return [found[key] for key in keys]
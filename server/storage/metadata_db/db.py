@@ -1,20 +1,110 @@
 import sqlite3
 import io
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator
 from storage.metadata_db.migrations import run_migrations
 
 DB_PATH = Path("/var/lib/loseme/metadata/metadata.db")
 
+# Per-connection tuning. cache_size is negative, so it is a size in KiB rather than pages.
+CACHE_SIZE_KIB = 64 * 1024
+MMAP_SIZE_BYTES = 256 * 1024 * 1024
+BUSY_TIMEOUT_SECONDS = 30.0
+# sqlite3 keeps this many prepared statements per connection; long-lived connections make the cache pay off
+CACHED_STATEMENTS = 256
+
+_local = threading.local()
+
+def _open_connection(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)  # <-- ensure directory exists
+    conn = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT_SECONDS,
+        cached_statements=CACHED_STATEMENTS,
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON;")
+    # WAL lets readers proceed while a writer commits; NORMAL only fsyncs at checkpoints
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute("PRAGMA synchronous = NORMAL;")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB};")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE_BYTES};")
+    conn.execute("PRAGMA temp_store = MEMORY;")
+    return conn
+
 def get_connection() -> sqlite3.Connection:
     """
-    Returns a SQLite connection and ensures foreign keys are enabled.
+    Returns the calling thread's SQLite connection, opening it on first use.
+    Connections are reused for the lifetime of the thread, so the pragmas above
+    and the prepared statement cache are only paid for once.
     """
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)  # <-- ensure directory exists
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON;")
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.path == DB_PATH:
+        return conn
+
+    close_connection()
+    conn = _open_connection(DB_PATH)
+    _local.conn = conn
+    _local.path = DB_PATH
+    _local.depth = 0
     return conn
 
+def close_connection() -> None:
+    """
+    Closes the calling thread's connection, if any.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+    _local.conn = None
+    _local.path = None
+    _local.depth = 0
+
+@contextmanager
+def transaction() -> Iterator[sqlite3.Connection]:
+    """
+    Groups all statements issued through this module on the current thread into one transaction.
+    The write lock is taken up front, the transaction commits when the outermost block exits and
+    rolls back if it raises. Nested blocks join the enclosing transaction.
+
+    Usage:
+        with transaction():
+            execute(...)
+            execute(...)
+    """
+    conn = get_connection()
+    if _local.depth > 0:
+        _local.depth += 1
+        try:
+            yield conn
+        finally:
+            _local.depth -= 1
+        return
+
+    conn.execute("BEGIN IMMEDIATE;")
+    _local.depth = 1
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+    finally:
+        _local.depth = 0
+
+def _commit_unless_in_transaction(conn: sqlite3.Connection) -> None:
+    if _local.depth == 0:
+        conn.commit()
+
+def _rollback_unless_in_transaction(conn: sqlite3.Connection) -> None:
+    # A failed statement leaves sqlite3's implicit transaction open, holding the write lock
+    # on this thread's long-lived connection; inside transaction() the outermost block rolls back
+    if _local.depth == 0:
+        conn.rollback()
+
 
 def init_db() -> None:
     """
@@ -105,31 +195,73 @@ def init_db() -> None:
         run_migrations(conn)  # <-- run migrations after ensuring base tables exist
 
         
-def execute(query: str, params: tuple = ()) -> None:
+def execute(query: str, params: tuple = ()) -> int:
     """
     Executes a query with the provided parameters.
+    Returns the number of rows modified by the statement.
     """
-    with get_connection() as conn:
-        conn.execute(query, params)
-        conn.commit()
+    conn = get_connection()
+    try:
+        cur = conn.execute(query, params)
+        _commit_unless_in_transaction(conn)
+    except BaseException:
+        _rollback_unless_in_transaction(conn)
+        raise
+    return cur.rowcount
+
+
+def execute_many(query: str, params_seq: list) -> int:
+    """
+    Executes a query once per parameter tuple inside a single transaction.
+    Returns the total number of rows modified.
+    """
+    conn = get_connection()
+    try:
+        cur = conn.executemany(query, params_seq)
+        _commit_unless_in_transaction(conn)
+    except BaseException:
+        _rollback_unless_in_transaction(conn)
+        raise
+    return cur.rowcount
+
+
+def execute_returning(query: str, params: tuple = ()) -> list:
+    """
+    Executes a modifying query with a RETURNING clause and commits it.
+    Returns the rows produced by the RETURNING clause.
+    """
+    conn = get_connection()
+    try:
+        rows = conn.execute(query, params).fetchall()
+        _commit_unless_in_transaction(conn)
+    except BaseException:
+        _rollback_unless_in_transaction(conn)
+        raise
+    return rows
 
 
 def fetch_one(query: str, params: tuple = ()):
     """
     Fetches a single row from the database for the given query and parameters.
     """
-    with get_connection() as conn:
-        cur = conn.execute(query, params)
-        return cur.fetchone()
+    cur = get_connection().execute(query, params)
+    return cur.fetchone()
 
 
 def fetch_all(query: str, params: tuple = ()) -> list:
     """
     Fetches all rows from the database for the given query and parameters.
     """
-    with get_connection() as conn:
-        cur = conn.execute(query, params)
-        return cur.fetchall()
+    cur = get_connection().execute(query, params)
+    return cur.fetchall()
+
+
+def data_version() -> int:
+    """
+    Returns SQLite's data_version for the calling thread's connection.
+    The value changes whenever another connection, in this or another process, commits.
+    """
+    return fetch_one("PRAGMA data_version;")[0]
 
 
 def get_document_part(document_part_id: str) -> sqlite3.Row:
@@ -137,9 +269,7 @@ def get_document_part(document_part_id: str) -> sqlite3.Row:
     Retrieves a document part by its ID.
     """
     query = "SELECT * FROM document_parts WHERE document_part_id = ?"
-    with get_connection() as conn:
-        cur = conn.execute(query, (document_part_id,))
-        return cur.fetchone()
+    return fetch_one(query, (document_part_id,))
 
 def export_db() -> io.BytesIO:
     """
@@ -168,6 +298,12 @@ def import_db(file_path: str) -> None:
 def delete_database() -> None:
     """
     Deletes the database file. Use with caution.
+    Connections held by other threads keep the deleted file open until they are closed.
     """
+    close_connection()
     if DB_PATH.exists():
         DB_PATH.unlink()
+    for suffix in ("-wal", "-shm"):
+        sidecar = DB_PATH.with_name(DB_PATH.name + suffix)
+        if sidecar.exists():
+            sidecar.unlink()
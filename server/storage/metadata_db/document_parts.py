@@ -41,6 +41,7 @@ def upsert_document_part(
         )
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ON CONFLICT(document_part_id) DO UPDATE SET
+            checksum = excluded.checksum,
             source_path = excluded.source_path,
             metadata_json = excluded.metadata_json,
             last_indexed_run_id = excluded.last_indexed_run_id,
@@ -61,7 +62,7 @@ def upsert_document_part(
             part["source_instance_id"],
             part["device_id"],
             part["source_path"],
-            json.dumps(part.get("metadata", {})),
+            json.dumps(part.get("metadata_json") or part.get("metadata") or {}),
             run_id,
             None,
             part.get("unit_locator"),
@@ -113,7 +114,7 @@ def mark_document_part_processed(document_part_id: str, run_id: str, chunk_ids:
     if timestamp is None:
         timestamp = datetime.utcnow().isoformat()
 
-    if chunk_ids:
+    if chunk_ids is not None:
         execute(
             """
             UPDATE document_parts
@@ -131,7 +132,7 @@ def mark_document_part_processed(document_part_id: str, run_id: str, chunk_ids:
                 document_part_id
             ),
         )
-    if not chunk_ids:
+    else:
         # If no chunk IDs provided, just update the last indexed info without changing chunk_ids
         execute(
             """
@@ -187,7 +188,7 @@ def get_stale_parts(run_id: str):
  
     rows = fetch_all(
         """
-        SELECT dp.document_part_id, dp.chunk_ids
+        SELECT dp.document_part_id
         FROM document_parts dp
         JOIN indexing_runs ir ON dp.last_indexed_run_id = ir.id
         WHERE ir.scope_json = ?
@@ -196,9 +197,7 @@ def get_stale_parts(run_id: str):
         (scope_json, run_id),
     )
     
-    stale_document_ids = [row["document_part_id"] for row in rows]
-    stale_chunk_ids = [json.loads(row["chunk_ids"]) if row["chunk_ids"] else [] for row in rows]
-    return stale_document_ids, stale_chunk_ids
+    return [row["document_part_id"] for row in rows]
 
 def remove_document_parts_by_id(document_part_ids: List[str]) -> None:
     execute(
@@ -257,37 +256,10 @@ def get_document_stats_per_source() -> List[dict]:
 
 def delete_all_parts_for_scope(source_type: str, scope_json: str) -> None:
     from storage.vector_db.runtime import get_vector_store
-    
-    # First we need to delete all the chunks associated with the document parts that match the scope, to avoid orphaned chunks in the vector store
-    
-    rows = fetch_all(
-            """
-            SELECT chunk_ids
-            FROM document_parts
-            WHERE source_type = ? AND scope_json = ?
-            """,
-            (source_type, scope_json),
-        )
-    chunk_ids_to_delete = []
-    BATCH_SIZE = 100
-    delteted_chunks_count = 0
-
-    vector_store = get_vector_store()
-    for row in rows:
-        if row["chunk_ids"]:
-            chunk_ids = json.loads(row["chunk_ids"])
-            chunk_ids_to_delete.extend(chunk_ids)
 
-            # Delete in batches to avoid overwhelming the vector store
-            if len(chunk_ids_to_delete) >= BATCH_SIZE:
-                delteted_chunks_count += len(chunk_ids_to_delete)
-                vector_store.remove_chunks(chunk_ids_to_delete)
-                chunk_ids_to_delete = []
-            
-    # Delete any remaining chunk ids
-    if chunk_ids_to_delete:
-        delteted_chunks_count += len(chunk_ids_to_delete)
-        vector_store.remove_chunks(chunk_ids_to_delete) 
+    # Delete the chunks first, to avoid orphaned chunks in the vector store.
+    # Chunks carry the ID of their scope, so this is one filter delete however large the source is.
+    get_vector_store().remove_by_scope(source_type, json.loads(scope_json))
 
     execute(
         """
@@ -1,10 +1,54 @@
 import json
-from typing import Optional
-from storage.metadata_db.db import execute, fetch_one, fetch_all
+from datetime import datetime, timedelta
+from typing import Optional, Sequence
+from storage.metadata_db.db import execute, execute_many, execute_returning, fetch_one, fetch_all
 import logging
 
 logger = logging.getLogger(__name__)
 
+_INSERT_QUEUE_ROW = """
+    INSERT INTO document_parts_queue (
+        run_id,
+        document_part_id,
+        checksum,
+        source_type,
+        source_instance_id,
+        device_id,
+        source_path,
+        metadata_json,
+        unit_locator,
+        content_type,
+        extractor_name,
+        extractor_version,
+        created_at,
+        updated_at,
+        text,
+        scope_json
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (run_id, document_part_id) DO NOTHING
+    """
+
+def _queue_row(part: dict, run_id: str) -> tuple:
+    return (
+        run_id,
+        part["document_part_id"],
+        part["checksum"],
+        part["source_type"],
+        part["source_instance_id"],
+        part["device_id"],
+        part["source_path"],
+        json.dumps(part.get("metadata", {})),
+        part["unit_locator"],
+        part["content_type"],
+        part["extractor_name"],
+        part["extractor_version"],
+        part["created_at"].isoformat(),
+        part["updated_at"].isoformat(),
+        part["text"],
+        json.dumps(part.get("scope_json"))
+    )
+
 def add_document_part_to_queue(
     part: dict,
     run_id: str,
@@ -13,77 +57,141 @@ def add_document_part_to_queue(
     Add a document part to the processing queue.
     This is used for parts that need to be processed asynchronously, such as extracting text from a PDF.
     """
-    if check_if_document_part_in_queue(run_id, part["document_part_id"]):
+    inserted = execute(_INSERT_QUEUE_ROW, _queue_row(part, run_id))
+
+    if inserted == 0:
         logger.debug(f"Document part with ID {part['document_part_id']} is already in the queue for run_id {run_id}. Skipping adding to queue.")
         return {"status": "already_in_queue"}
 
-    execute(
-        """
-        INSERT INTO document_parts_queue (
-            run_id,
-            document_part_id,
-            checksum,
-            source_type,
-            source_instance_id,
-            device_id,
-            source_path,
-            metadata_json,
-            unit_locator,
-            content_type,
-            extractor_name,
-            extractor_version,
-            created_at,
-            updated_at,
-            text,
-            scope_json
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        (
-            run_id,
-            part["document_part_id"],
-            part["checksum"],
-            part["source_type"],
-            part["source_instance_id"],
-            part["device_id"],
-            part["source_path"],
-            json.dumps(part.get("metadata", {})),
-            part["unit_locator"],
-            part["content_type"],
-            part["extractor_name"],
-            part["extractor_version"],
-            part["created_at"].isoformat(),
-            part["updated_at"].isoformat(),
-            part["text"],
-            json.dumps(part.get("scope_json"))
-            ),
-    )
-
     return {"status": "added_to_queue"}
 
+def add_document_parts_to_queue(
+    parts: list[dict],
+    run_id: str,
+) -> int:
+    """
+    Add several document parts to the processing queue in a single transaction.
+    Parts already queued for the run are skipped. Returns the number of parts actually added.
+    """
+    if not parts:
+        return 0
+    return execute_many(_INSERT_QUEUE_ROW, [_queue_row(part, run_id) for part in parts])
+
 def get_next_document_part_from_queue(run_id: str) -> Optional[dict]:
     """
     Get the next document part from the processing queue for a given run_id.
     This is used by the worker process to get the next part that needs to be processed.
     """
-    
-    row = fetch_one(
+    parts = get_next_document_parts_from_queue(run_id, limit=1)
+    return parts[0] if parts else None
+
+def get_next_document_parts_from_queue(run_id: str, limit: int) -> list:
+    """
+    Get up to `limit` document parts from the processing queue for a given run_id, oldest first.
+    This lets the worker process chunk and embed several parts together.
+    """
+    rows = fetch_all(
         """
         SELECT *
         FROM document_parts_queue
         WHERE run_id = ?
-        ORDER BY created_at ASC
-        LIMIT 1
+        ORDER BY created_at ASC, id ASC
+        LIMIT ?
         """,
-        (run_id,)
+        (run_id, limit)
+    )
+
+    parts = []
+    for row in rows:
+        part = dict(row)
+        part["metadata_json"] = json.loads(part["metadata_json"])
+        parts.append(part)
+    return parts
+
+def claim_document_parts_from_queue(
+    worker_id: str,
+    run_ids: Sequence[str],
+    limit: int,
+    lease_seconds: int,
+) -> list:
+    """
+    Atomically lease up to `limit` unclaimed document parts of the given runs to `worker_id`, oldest first.
+    Parts whose lease has expired count as unclaimed, so parts held by a crashed worker are picked up again.
+    Every claim increments the part's `attempts` counter.
+    """
+    if not run_ids:
+        return []
+
+    now = datetime.utcnow()
+    claimed_until = (now + timedelta(seconds=lease_seconds)).isoformat()
+    placeholders = ", ".join("?" for _ in run_ids)
+    rows = execute_returning(
+        f"""
+        UPDATE document_parts_queue
+        SET claimed_by = ?, claimed_until = ?, attempts = attempts + 1
+        WHERE id IN (
+            SELECT id
+            FROM document_parts_queue
+            WHERE run_id IN ({placeholders})
+              AND (claimed_until IS NULL OR claimed_until < ?)
+            ORDER BY created_at ASC, id ASC
+            LIMIT ?
+        )
+        RETURNING *
+        """,
+        (worker_id, claimed_until, *run_ids, now.isoformat(), limit)
     )
 
-    if row is None:
-        return None
-    else: 
+    parts = []
+    for row in rows:
         part = dict(row)
         part["metadata_json"] = json.loads(part["metadata_json"])
-        return part
+        parts.append(part)
+    # RETURNING does not guarantee the order of the subquery
+    parts.sort(key=lambda part: (part["created_at"], part["id"]))
+    return parts
+
+def complete_claimed_document_part(queue_id: int, worker_id: str) -> bool:
+    """
+    Remove a claimed document part from the queue once `worker_id` has processed it.
+    Returns False if the lease expired and another worker has claimed the part in the meantime.
+    """
+    removed = execute(
+        """
+        DELETE FROM document_parts_queue
+        WHERE id = ? AND claimed_by = ?
+        """,
+        (queue_id, worker_id)
+    )
+    return removed > 0
+
+def release_claimed_document_parts(worker_id: str) -> int:
+    """
+    Hand back all document parts currently leased to `worker_id` without counting an attempt.
+    This is used when a worker shuts down gracefully.
+    """
+    return execute(
+        """
+        UPDATE document_parts_queue
+        SET claimed_by = NULL, claimed_until = NULL, attempts = MAX(attempts - 1, 0)
+        WHERE claimed_by = ?
+        """,
+        (worker_id,)
+    )
+
+def count_document_parts_in_queue(run_id: str) -> int:
+    """
+    Count the document parts still queued for a given run_id, including claimed ones.
+    """
+    row = fetch_one(
+        """
+        SELECT COUNT(*) AS count
+        FROM document_parts_queue
+        WHERE run_id = ?
+        """,
+        (run_id,)
+    )
+    return row["count"]
 
 def remove_document_part_from_queue(run_id: str, document_part_id: str) -> None:
     """
@@ -407,14 +407,14 @@ def stop_discovery(run_id: str) -> None:
         (_now(), run_id),
     )
 
-def start_indexing(run_id: str) -> None:
+def start_indexing(run_id: str, force_reprocess: bool = False) -> None:
     execute(
         """
         UPDATE indexing_runs
-        SET is_indexing = 1, updated_at = ?
+        SET is_indexing = 1, force_reprocess = ?, updated_at = ?
         WHERE id = ?
         """,
-        (_now(), run_id),
+        (int(force_reprocess), _now(), run_id),
     )
 
 def stop_indexing(run_id: str) -> None:
@@ -426,3 +426,41 @@ def stop_indexing(run_id: str) -> None:
         """,
         (_now(), run_id),
     )
+
+def claim_run_completion(run_id: str) -> bool:
+    """
+    Atomically flip is_indexing off for a running run.
+    Only the single caller that gets True may finalize the run, even with several workers draining its queue.
+    """
+    updated = execute(
+        """
+        UPDATE indexing_runs
+        SET is_indexing = 0, updated_at = ?
+        WHERE id = ? AND is_indexing = 1 AND status = 'running'
+        """,
+        (_now(), run_id),
+    )
+    return updated > 0
+
+def list_runs_to_index() -> list[dict]:
+    """
+    List the running runs whose queues workers should currently drain.
+    Runs with a pending stop request are included so a worker can mark them interrupted.
+    """
+    rows = fetch_all(
+        """
+        SELECT id, is_discovering, force_reprocess, stop_requested
+        FROM indexing_runs
+        WHERE status = 'running' AND is_indexing = 1
+        ORDER BY started_at ASC
+        """,
+    )
+    return [
+        {
+            "id": row["id"],
+            "is_discovering": bool(row["is_discovering"]),
+            "force_reprocess": bool(row["force_reprocess"]),
+            "stop_requested": bool(row["stop_requested"]),
+        }
+        for row in rows
+    ]
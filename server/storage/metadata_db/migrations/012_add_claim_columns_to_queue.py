@@ -0,0 +1,11 @@
+def run(conn):
+    # Lease columns so several workers can claim queue rows atomically.
+    # Rows whose claimed_until lies in the past are visible to other workers again.
+    cur = conn.execute("PRAGMA table_info(document_parts_queue);")
+    columns = {row[1] for row in cur.fetchall()}
+    if "claimed_by" not in columns:
+        conn.execute("ALTER TABLE document_parts_queue ADD COLUMN claimed_by TEXT;")
+    if "claimed_until" not in columns:
+        conn.execute("ALTER TABLE document_parts_queue ADD COLUMN claimed_until TEXT;")
+    if "attempts" not in columns:
+        conn.execute("ALTER TABLE document_parts_queue ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0;")
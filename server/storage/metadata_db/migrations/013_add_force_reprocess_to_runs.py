@@ -0,0 +1,6 @@
+def run(conn):
+    # Persist the force_reprocess flag so standalone workers honour it too
+    cur = conn.execute("PRAGMA table_info(indexing_runs);")
+    columns = {row[1] for row in cur.fetchall()}
+    if "force_reprocess" not in columns:
+        conn.execute("ALTER TABLE indexing_runs ADD COLUMN force_reprocess INTEGER NOT NULL DEFAULT 0;")
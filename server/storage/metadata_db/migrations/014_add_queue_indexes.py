@@ -0,0 +1,25 @@
+def run(conn):
+    # Drop duplicates left over from the old check-then-insert path before enforcing uniqueness
+    conn.execute(
+        """
+        DELETE FROM document_parts_queue
+        WHERE id NOT IN (
+            SELECT MIN(id)
+            FROM document_parts_queue
+            GROUP BY run_id, document_part_id
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_document_parts_queue_run_part
+        ON document_parts_queue (run_id, document_part_id);
+        """
+    )
+    # Serves the per-run, oldest-first dequeue without scanning the table
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_document_parts_queue_run_created
+        ON document_parts_queue (run_id, created_at, id);
+        """
+    )
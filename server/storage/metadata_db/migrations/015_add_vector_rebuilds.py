@@ -0,0 +1,34 @@
+def run(conn):
+    # Online rebuilds of the Qdrant collection behind an alias, and the writes stores
+    # mirrored while one was copying, so the rebuild can re-copy what they touched
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS vector_rebuilds (
+            id TEXT PRIMARY KEY,
+            alias TEXT NOT NULL,
+            source_collection TEXT,
+            target_collection TEXT NOT NULL,
+            status TEXT NOT NULL,
+            copied_points INTEGER NOT NULL DEFAULT 0,
+            started_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            finished_at TEXT
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS vector_rebuild_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            rebuild_id TEXT NOT NULL,
+            field TEXT NOT NULL,
+            value TEXT NOT NULL
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_vector_rebuild_changes_rebuild
+        ON vector_rebuild_changes (rebuild_id, seq);
+        """
+    )
@@ -0,0 +1,85 @@
+import uuid
+from datetime import datetime
+from typing import List, Optional, Sequence
+from storage.metadata_db.db import execute, execute_many, fetch_one, fetch_all
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A rebuild in this state has its target collection mirrored by every store writing to the alias
+COPYING = "copying"
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def create_rebuild(alias: str, source_collection: Optional[str], target_collection: str) -> str:
+    """
+    Register a rebuild of `alias` into `target_collection`; raises if one is already copying.
+    """
+    active = get_active_rebuild(alias)
+    if active is not None:
+        raise RuntimeError(
+            f"Rebuild {active['id']} of '{alias}' into '{active['target_collection']}' is still running"
+        )
+    rebuild_id = str(uuid.uuid4())
+    now = _now()
+    execute(
+        """
+        INSERT INTO vector_rebuilds (
+            id, alias, source_collection, target_collection, status, started_at, updated_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        (rebuild_id, alias, source_collection, target_collection, COPYING, now, now),
+    )
+    return rebuild_id
+
+
+def get_active_rebuild(alias: str):
+    return fetch_one(
+        "SELECT * FROM vector_rebuilds WHERE alias = ? AND status = ?",
+        (alias, COPYING),
+    )
+
+
+def get_rebuild(rebuild_id: str):
+    return fetch_one("SELECT * FROM vector_rebuilds WHERE id = ?", (rebuild_id,))
+
+
+def update_copied_points(rebuild_id: str, copied_points: int) -> None:
+    execute(
+        "UPDATE vector_rebuilds SET copied_points = ?, updated_at = ? WHERE id = ?",
+        (copied_points, _now(), rebuild_id),
+    )
+
+
+def finish_rebuild(rebuild_id: str, status: str) -> None:
+    """
+    End a rebuild with `status` ("swapped", "failed" or "aborted"); stores stop mirroring into it
+    and its change log is dropped.
+    """
+    now = _now()
+    execute(
+        "UPDATE vector_rebuilds SET status = ?, updated_at = ?, finished_at = ? WHERE id = ?",
+        (status, now, now, rebuild_id),
+    )
+    execute("DELETE FROM vector_rebuild_changes WHERE rebuild_id = ?", (rebuild_id,))
+
+
+def record_changes(rebuild_id: str, field: str, values: Sequence[str]) -> None:
+    """
+    Log that points whose payload `field` has one of `values` were written during the rebuild.
+    """
+    execute_many(
+        "INSERT INTO vector_rebuild_changes (rebuild_id, field, value) VALUES (?, ?, ?)",
+        [(rebuild_id, field, value) for value in dict.fromkeys(values)],
+    )
+
+
+def changes_after(rebuild_id: str, seq: int) -> List:
+    return fetch_all(
+        "SELECT seq, field, value FROM vector_rebuild_changes WHERE rebuild_id = ? AND seq > ? ORDER BY seq",
+        (rebuild_id, seq),
+    )
@@ -1,82 +1,198 @@
-from typing import List, Tuple
-import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
 
 from loseme_core import Chunk
-from storage.vector_db.vector_store import VectorStore
+from loseme_core.ids import make_scope_id
+from loseme_core.domain import EmbeddingOutput
+from storage.vector_db.vector_store import SearchFilter, VectorStore, check_batch_lengths
+
+# Rows allocated up front; the matrix doubles whenever it is full
+INITIAL_CAPACITY = 1024
+# Deleted rows are only reclaimed once there are at least this many and they make up half the matrix
+COMPACT_MIN_DELETED = 1024
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    Unit-length copies of the rows of `vectors`; zero rows stay zero, so they score 0 against anything.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def top_k_rows(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Indices of the `top_k` highest finite scores, best first; ties keep row order.
+    """
+    candidates = np.flatnonzero(np.isfinite(scores))
+    if top_k <= 0 or candidates.size == 0:
+        return candidates[:0]
+    if candidates.size > top_k:
+        # argpartition only orders the k best, so selecting is O(n) and only k rows get sorted
+        best = np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+        candidates = np.sort(candidates[best])
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
 
 
 class InMemoryVectorStore(VectorStore):
     """
-    Minimal in-memory vector store.
-    Intended for Phase 1 end-to-end validation only.
+    In-memory vector store for tests and single-machine installs.
+
+    Vectors live normalized in one preallocated float32 matrix, so search is a single
+    matrix-vector product followed by a partial sort. Re-adding a chunk ID overwrites
+    its row in place; removed rows become tombstones that are compacted away in bulk.
     """
 
     def __init__(self, dimension: int):
         self._dimension = dimension
-        self._data: List[Tuple[Chunk, List[float]]] = []
+        self._vectors = np.zeros((INITIAL_CAPACITY, dimension), dtype=np.float32)
+        self._live = np.zeros(INITIAL_CAPACITY, dtype=bool)
+        self._chunks: List[Optional[Chunk]] = []
+        self._rows: Dict[str, int] = {}
+        self._deleted = 0
 
-    def add(self, chunk: Chunk, vector: List[float]) -> None:
-        """
-        Adds a chunk and its vector to the store.
-        """
-        vector = vector.dense if hasattr(vector, "dense") else vector
+    def _check_dimension(self, vector, what: str = "Vector") -> None:
         if len(vector) != self._dimension:
             raise ValueError(
-                f"Vector dimension mismatch: expected {self._dimension}, "
+                f"{what} dimension mismatch: expected {self._dimension}, "
                 f"got {len(vector)}"
             )
 
-        # Replace if chunk with same ID already exists
-        self._data = [(c, v) for c, v in self._data if c.id != chunk.id]
-        self._data.append((chunk, vector))
+    def add(self, chunk: Chunk, vector: List[float]) -> None:
+        """
+        Adds a chunk and its vector to the store, replacing an entry with the same ID.
+        """
+        self.add_batch([chunk], [vector])
+
+    def add_batch(self, chunks: List[Chunk], embeddings: List[EmbeddingOutput]) -> None:
+        """
+        Adds several chunks at once, replacing existing entries with the same IDs.
+        """
+        check_batch_lengths(chunks, embeddings)
+        vectors = []
+        for embedding in embeddings:
+            vector = embedding.dense if hasattr(embedding, "dense") else embedding
+            self._check_dimension(vector)
+            vectors.append(vector)
+        if not chunks:
+            return
+
+        rows = np.empty(len(chunks), dtype=np.int64)
+        for i, chunk in enumerate(chunks):
+            row = self._rows.get(chunk.id)
+            if row is None:
+                row = self._append_row()
+                self._rows[chunk.id] = row
+            self._chunks[row] = chunk
+            rows[i] = row
+        # A later duplicate in the batch wins, as with sequential adds
+        self._vectors[rows] = normalize_rows(vectors)
+        self._live[rows] = True
+
+    def _append_row(self) -> int:
+        row = len(self._chunks)
+        if row == len(self._vectors):
+            self._grow(2 * row)
+        self._chunks.append(None)
+        return row
+
+    def _grow(self, capacity: int) -> None:
+        vectors = np.zeros((capacity, self._dimension), dtype=np.float32)
+        vectors[:len(self._chunks)] = self._vectors[:len(self._chunks)]
+        live = np.zeros(capacity, dtype=bool)
+        live[:len(self._chunks)] = self._live[:len(self._chunks)]
+        self._vectors, self._live = vectors, live
 
     def search(
-        self, 
-        query_vector: List[float], 
-        top_k: int
+        self,
+        query_vector: List[float],
+        top_k: int,
+        filters: Optional[SearchFilter] = None,
     ) -> List[Tuple[Chunk, float]]:
         """
-        Search for the top_k most similar chunks.
-        
+        Search for the top_k most similar chunks, among those matching `filters` if given.
+
         Returns:
             List of (chunk, score) tuples ordered by descending similarity
         """
         vector = query_vector.dense if hasattr(query_vector, "dense") else query_vector
-        if len(vector) != self._dimension:
-            raise ValueError(
-                f"Query vector dimension mismatch: expected {self._dimension}, "
-                f"got {len(vector)}"
-            )
-
-        scored = []
-        for chunk, stored_vector in self._data:
-            score = self._cosine_similarity(vector, stored_vector)
-            scored.append((chunk, score))
-
-        # Sort by score descending
-        scored.sort(key=lambda x: x[1], reverse=True)
-        return scored[:top_k]
+        self._check_dimension(vector, "Query vector")
 
-    def _cosine_similarity(self, a: List[float], b: List[float]) -> float:
-        dot = sum(x * y for x, y in zip(a, b))
-        norm_a = math.sqrt(sum(x * x for x in a))
-        norm_b = math.sqrt(sum(y * y for y in b))
+        size = len(self._chunks)
+        if size == 0:
+            return []
+        scores = self._vectors[:size] @ normalize_rows(vector)
+        mask = self._live[:size].copy()
+        if filters is not None and not filters.is_empty():
+            mask &= np.fromiter(
+                (chunk is not None and filters.matches(chunk) for chunk in self._chunks),
+                dtype=bool,
+                count=size,
+            )
+        scores[~mask] = -np.inf
 
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
-        return dot / (norm_a * norm_b)
+        return [(self._chunks[row], float(scores[row])) for row in top_k_rows(scores, top_k)]
 
     def clear(self) -> None:
         """
         Clears the vector store.
         """
-        self._data.clear()
-    
+        self.__init__(self._dimension)
+
     def dimension(self) -> int:
         return self._dimension
 
     def query(self, vector: List[float], top_k: int = 10) -> List[Tuple[Chunk, float]]:
         return self.search(vector, top_k)
 
+    def chunks(self) -> List[Chunk]:
+        """
+        All stored chunks, oldest row first.
+        """
+        return [chunk for chunk in self._chunks if chunk is not None]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
     def remove_chunks(self, chunk_ids: List[str]) -> None:
-        self._data = [(c, v) for c, v in self._data if c.id not in chunk_ids]
+        self._remove_rows(self._rows[chunk_id] for chunk_id in chunk_ids if chunk_id in self._rows)
+
+    def remove_by_document_part_ids(self, document_part_ids: List[str]) -> None:
+        document_part_ids = set(document_part_ids)
+        self._remove_rows(
+            row for row, chunk in enumerate(self._chunks)
+            if chunk is not None and chunk.document_part_id in document_part_ids
+        )
+
+    def remove_by_scope(self, source_type: str, scope: dict) -> None:
+        scope_id = make_scope_id(scope)
+        self._remove_rows(
+            row for row, chunk in enumerate(self._chunks)
+            if chunk is not None and chunk.source_type == source_type and chunk.scope_id == scope_id
+        )
+
+    def _remove_rows(self, rows: Iterable[int]) -> None:
+        for row in list(rows):
+            chunk = self._chunks[row]
+            if chunk is None:
+                continue
+            del self._rows[chunk.id]
+            self._chunks[row] = None
+            self._live[row] = False
+            self._deleted += 1
+        if self._deleted >= COMPACT_MIN_DELETED and 2 * self._deleted >= len(self._chunks):
+            self._compact()
+
+    def _compact(self) -> None:
+        """
+        Move the live rows to the front of the matrix, dropping tombstones.
+        """
+        keep = np.flatnonzero(self._live[:len(self._chunks)])
+        self._vectors[:len(keep)] = self._vectors[keep]
+        self._live[:] = False
+        self._live[:len(keep)] = True
+        self._chunks = [self._chunks[row] for row in keep]
+        self._rows = {chunk.id: row for row, chunk in enumerate(self._chunks)}
+        self._deleted = 0
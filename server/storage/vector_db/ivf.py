@@ -0,0 +1,145 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from storage.vector_db.in_memory import normalize_rows
+
+# Rows assigned to centroids per matrix product, to bound the temporary score matrix
+ASSIGN_BATCH = 16384
+# Training sample per list; k-means gains little from more
+TRAIN_POINTS_PER_LIST = 32
+TRAIN_ITERATIONS = 8
+# Fewest vectors worth indexing; below this an exact scan is about as fast
+MIN_INDEXED_POINTS = 10_000
+
+# Bit b of byte value v, as packbits orders them (most significant first)
+_BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).astype(np.float32)
+
+
+@dataclass(frozen=True)
+class IVFParams:
+    """
+    Inverted-file index settings: vectors are grouped by their nearest of `nlist` centroids,
+    a search scans the `nprobe` lists whose centroids are closest to the query, ranks their rows
+    by 1-bit residual codes and re-scores the best `oversampling` x top_k with the exact vectors.
+    """
+    nlist: int = 0
+    nprobe: int = 16
+    oversampling: float = 20.0
+
+    def lists_for(self, count: int) -> int:
+        """
+        Number of lists for an index over `count` vectors; about 4·sqrt(count) unless `nlist` is set.
+        """
+        nlist = self.nlist or 4 * int(math.sqrt(count))
+        return max(1, min(nlist, count))
+
+    def min_points(self) -> int:
+        """
+        Fewest vectors to train the index on and search through it.
+        """
+        return max(MIN_INDEXED_POINTS, 8 * self.nlist)
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """
+    Index of the most similar centroid for each (normalized) row of `vectors`.
+    """
+    lists = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_BATCH):
+        batch = np.asarray(vectors[start:start + ASSIGN_BATCH], dtype=np.float32)
+        lists[start:start + len(batch)] = np.argmax(batch @ centroids.T, axis=1)
+    return lists
+
+
+def train_centroids(vectors: np.ndarray, nlist: int, seed: int = 0) -> np.ndarray:
+    """
+    Spherical k-means over a sample of `vectors`: unit-length centroids, rows assigned by dot product.
+    """
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), nlist * TRAIN_POINTS_PER_LIST)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))], dtype=np.float32)
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+    for _ in range(TRAIN_ITERATIONS):
+        lists = assign_lists(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, lists, sample)
+        # Lists that lost all their points restart from random sample rows
+        empty = np.flatnonzero(np.bincount(lists, minlength=nlist) == 0)
+        sums[empty] = sample[rng.choice(sample_size, len(empty), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+class SegmentLists:
+    """
+    IVF data for one segment: each row's list, the sign bits of its residual from the
+    list centroid and the mean absolute residual, plus the rows grouped by list.
+    """
+
+    def __init__(self, lists: np.ndarray, codes: np.ndarray, scales: np.ndarray, version: int):
+        self.lists = lists
+        self.codes = codes
+        self.scales = scales
+        self.version = version
+        self._order = np.argsort(lists, kind="stable").astype(np.int32)
+        # Rows of list i are _order[_bounds[i]:_bounds[i + 1]]
+        self._bounds = np.searchsorted(lists[self._order], np.arange(int(lists.max(initial=-1)) + 2))
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, centroids: np.ndarray, version: int) -> "SegmentLists":
+        lists = assign_lists(vectors, centroids)
+        codes = np.empty((len(vectors), (centroids.shape[1] + 7) // 8), dtype=np.uint8)
+        scales = np.empty(len(vectors), dtype=np.float32)
+        for start in range(0, len(vectors), ASSIGN_BATCH):
+            end = start + ASSIGN_BATCH
+            residuals = np.asarray(vectors[start:end], dtype=np.float32) - centroids[lists[start:end]]
+            codes[start:end] = np.packbits(residuals > 0, axis=1)
+            scales[start:end] = np.abs(residuals).mean(axis=1)
+        return cls(lists, codes, scales, version)
+
+    @classmethod
+    def concatenate(cls, parts: list, version: int) -> "SegmentLists":
+        return cls(
+            np.concatenate([part.lists for part in parts]),
+            np.concatenate([part.codes for part in parts]),
+            np.concatenate([part.scales for part in parts]),
+            version,
+        )
+
+    def take(self, rows: np.ndarray) -> "SegmentLists":
+        return SegmentLists(self.lists[rows], self.codes[rows], self.scales[rows], self.version)
+
+    def rows_in(self, lists: np.ndarray) -> np.ndarray:
+        """
+        Rows belonging to any of `lists`, grouped by list.
+        """
+        lists = lists[lists < len(self._bounds) - 1]
+        return np.concatenate(
+            [self._order[self._bounds[i]:self._bounds[i + 1]] for i in lists]
+            + [np.zeros(0, dtype=np.int32)]
+        )
+
+    def estimate(self, rows: np.ndarray, query: np.ndarray, centroid_scores: np.ndarray) -> np.ndarray:
+        """
+        Approximate query similarity of `rows`: the centroid's exact score plus the residual's
+        score estimated from its sign bits.
+        """
+        code_bytes = self.codes.shape[1]
+        weights = np.zeros(code_bytes * 8, dtype=np.float32)
+        weights[:len(query)] = 2 * query
+        # Summed weights of the bits set in each possible byte value, per byte position, so a
+        # row costs one lookup per byte rather than one multiply per dimension
+        table = (_BYTE_BITS @ weights.reshape(code_bytes, 8).T).T.ravel()
+        offsets = np.arange(code_bytes) * 256
+        signed = np.take(table, self.codes[rows] + offsets).sum(axis=1) - query.sum()
+        return centroid_scores[self.lists[rows]] + self.scales[rows] * signed
+
+    def save(self, path) -> None:
+        np.savez(path, lists=self.lists, codes=self.codes, scales=self.scales, version=self.version)
+
+    @classmethod
+    def load(cls, path) -> "SegmentLists":
+        with np.load(path) as data:
+            return cls(data["lists"], data["codes"], data["scales"], int(data["version"]))
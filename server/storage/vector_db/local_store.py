@@ -0,0 +1,591 @@
+import math
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from loseme_core import Chunk
+from loseme_core.ids import make_scope_id
+from loseme_core.domain import EmbeddingOutput
+from storage.vector_db.in_memory import normalize_rows, top_k_rows
+from storage.vector_db.ivf import IVFParams, SegmentLists, train_centroids
+from storage.vector_db.vector_store import SearchFilter, VectorStore, _as_utc, check_batch_lengths
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Compact once there are more segment files than this
+COMPACT_MAX_SEGMENTS = 16
+# ... or once this share of all stored rows is deleted or overwritten
+COMPACT_DEAD_RATIO = 0.3
+# With an index, retrain once the store holds this many times the vectors it was trained on (nlist=0 only)
+RETRAIN_GROWTH = 4
+# Chunk IDs per SQL statement, below SQLite's bound parameter limit
+SQL_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS points (
+    chunk_id TEXT PRIMARY KEY,
+    segment INTEGER NOT NULL,
+    row INTEGER NOT NULL,
+    document_part_id TEXT NOT NULL,
+    source_type TEXT NOT NULL,
+    source_path TEXT NOT NULL,
+    device_id TEXT NOT NULL,
+    scope_id TEXT,
+    created_at TEXT,
+    chunk_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_points_document_part ON points (document_part_id);
+CREATE INDEX IF NOT EXISTS idx_points_scope ON points (source_type, scope_id);
+CREATE INDEX IF NOT EXISTS idx_points_segment ON points (segment, row);
+"""
+
+
+def _timestamp(value) -> Optional[str]:
+    # Fixed-width UTC, so SQL compares timestamps as strings
+    return _as_utc(value).isoformat(timespec="microseconds") if value is not None else None
+
+
+def _write_file(path: Path, save) -> None:
+    # Complete and synced before it appears under its name
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        save(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class _Segment:
+    """
+    One immutable .npy file of normalized vectors, memory-mapped, plus which of its rows are still live.
+    """
+
+    def __init__(self, segment_id: int, path: Path, ids: List[Optional[str]]):
+        self.id = segment_id
+        self.path = path
+        self.vectors = np.load(path, mmap_mode="r")
+        self.ids = ids
+        self.live = np.array([chunk_id is not None for chunk_id in ids], dtype=bool)
+        self.lists: Optional[SegmentLists] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class LocalVectorStore(VectorStore):
+    """
+    Persistent vector store in a local directory, for installs without a Qdrant service.
+
+    Every add_batch appends one segment file of float32 vectors that is never modified
+    afterwards and is memory-mapped for search. A SQLite sidecar maps chunk IDs to
+    (segment, row) and holds the payload, so deletes, filters and result lookups are
+    index queries. Overwritten and deleted rows stay in their segment until a background
+    compaction merges segments into one without them.
+
+    With `index` set, searches over enough vectors go through an IVF index instead of
+    scanning every row. Its centroids are trained during compaction, each new segment is
+    assigned to them as it is written, and deleted rows are skipped through the live masks.
+
+    Only one process may open a directory at a time.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        dimension: int,
+        background_compaction: bool = True,
+        index: Optional[IVFParams] = None,
+    ):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._dimension = dimension
+        self.background_compaction = background_compaction
+        self.index = index
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._db = sqlite3.connect(self.path / "index.db", check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = WAL;")
+        self._db.executescript(_SCHEMA)
+        self._check_stored_dimension()
+        self._load()
+
+    def _check_stored_dimension(self) -> None:
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'dimension'").fetchone()
+        if row is None:
+            with self._db:
+                self._db.execute("INSERT INTO meta (key, value) VALUES ('dimension', ?)", (str(self._dimension),))
+        elif int(row[0]) != self._dimension:
+            raise ValueError(
+                f"Vector store at {self.path} holds {row[0]}-dimensional vectors, "
+                f"the embedding model produces {self._dimension}"
+            )
+
+    def _segment_path(self, segment_id: int) -> Path:
+        return self.path / f"segment-{segment_id:08d}.npy"
+
+    def _lists_path(self, segment_id: int) -> Path:
+        return self.path / f"segment-{segment_id:08d}.ivf.npz"
+
+    def _centroids_path(self, version: int) -> Path:
+        return self.path / f"ivf-centroids-{version:08d}.npy"
+
+    def _meta(self, key: str, default: int = 0) -> int:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return int(row[0]) if row else default
+
+    def _remove_segment_files(self, segment_id: int) -> None:
+        self._segment_path(segment_id).unlink(missing_ok=True)
+        self._lists_path(segment_id).unlink(missing_ok=True)
+
+    def _load(self) -> None:
+        rows: Dict[int, List[Tuple[int, str]]] = {}
+        for chunk_id, segment_id, row in self._db.execute("SELECT chunk_id, segment, row FROM points"):
+            rows.setdefault(segment_id, []).append((row, chunk_id))
+
+        self._segments: Dict[int, _Segment] = {}
+        self._locations: Dict[str, Tuple[_Segment, int]] = {}
+        self._dead = 0
+        for tmp_path in [*self.path.glob("segment-*.tmp"), *self.path.glob("ivf-*.tmp")]:
+            tmp_path.unlink()
+        on_disk = {int(path.stem.split("-")[1]): path for path in self.path.glob("segment-*.npy")}
+        for path in self.path.glob("segment-*.ivf.npz"):
+            if int(path.name.split(".")[0].split("-")[1]) not in on_disk:
+                path.unlink()
+        for segment_id, path in sorted(on_disk.items()):
+            if segment_id not in rows:
+                # Left behind by a crash before its rows were indexed, or by a compaction
+                self._remove_segment_files(segment_id)
+                continue
+            length = len(np.load(path, mmap_mode="r"))
+            ids: List[Optional[str]] = [None] * length
+            for row, chunk_id in rows[segment_id]:
+                ids[row] = chunk_id
+            segment = _Segment(segment_id, path, ids)
+            self._segments[segment_id] = segment
+            self._dead += length - int(segment.live.sum())
+            for row, chunk_id in rows[segment_id]:
+                self._locations[chunk_id] = (segment, row)
+        self._next_segment = max(on_disk, default=0) + 1
+        self._load_index()
+        logger.info(f"Opened local vector store at {self.path}: {len(self._locations)} vectors in {len(self._segments)} segments")
+
+    def _load_index(self) -> None:
+        """
+        Read the current centroids and each segment's lists; lists that are missing or
+        belong to older centroids are rebuilt.
+        """
+        self._centroids: Optional[np.ndarray] = None
+        self._index_version = self._meta("ivf_version")
+        self._trained_on = self._meta("ivf_trained_on")
+        for path in self.path.glob("ivf-centroids-*.npy"):
+            if path != self._centroids_path(self._index_version):
+                path.unlink()
+        if self.index is None or not self._centroids_path(self._index_version).exists():
+            return
+        self._centroids = np.load(self._centroids_path(self._index_version))
+        for segment in self._segments.values():
+            path = self._lists_path(segment.id)
+            lists = SegmentLists.load(path) if path.exists() else None
+            if lists is None or lists.version != self._index_version or len(lists.lists) != len(segment):
+                lists = self._build_lists(segment.id, segment.vectors)
+            segment.lists = lists
+
+    def _build_lists(self, segment_id: int, vectors: np.ndarray) -> SegmentLists:
+        lists = SegmentLists.build(vectors, self._centroids, self._index_version)
+        self._write_lists(segment_id, lists)
+        return lists
+
+    def _write_lists(self, segment_id: int, lists: SegmentLists) -> None:
+        _write_file(self._lists_path(segment_id), lists.save)
+
+    def _write_segment(self, segment_id: int, vectors: np.ndarray) -> Path:
+        path = self._segment_path(segment_id)
+        _write_file(path, lambda f: np.save(f, vectors))
+        return path
+
+    def add(self, chunk: Chunk, vector: List[float]) -> None:
+        self.add_batch([chunk], [vector])
+
+    def add_batch(self, chunks: List[Chunk], embeddings: List[EmbeddingOutput]) -> None:
+        """
+        Append the chunks as one new segment; entries with the same IDs are replaced.
+        """
+        check_batch_lengths(chunks, embeddings)
+        vectors = []
+        for embedding in embeddings:
+            vector = embedding.dense if hasattr(embedding, "dense") else embedding
+            if len(vector) != self._dimension:
+                raise ValueError(
+                    f"Vector dimension mismatch: expected {self._dimension}, "
+                    f"got {len(vector)}"
+                )
+            vectors.append(vector)
+        if not chunks:
+            return
+
+        # A later duplicate in the batch wins, as with sequential adds
+        latest = {chunk.id: row for row, chunk in enumerate(chunks)}
+        with self._lock:
+            segment_id = self._next_segment
+            self._next_segment += 1
+            vectors = normalize_rows(vectors)
+            path = self._write_segment(segment_id, vectors)
+            lists = self._build_lists(segment_id, vectors) if self._centroids is not None else None
+            with self._db:
+                self._db.executemany(
+                    """
+                    INSERT INTO points (
+                        chunk_id, segment, row, document_part_id, source_type, source_path,
+                        device_id, scope_id, created_at, chunk_json
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (chunk_id) DO UPDATE SET
+                        segment = excluded.segment,
+                        row = excluded.row,
+                        document_part_id = excluded.document_part_id,
+                        source_type = excluded.source_type,
+                        source_path = excluded.source_path,
+                        device_id = excluded.device_id,
+                        scope_id = excluded.scope_id,
+                        created_at = excluded.created_at,
+                        chunk_json = excluded.chunk_json
+                    """,
+                    [self._point_row(chunks[row], segment_id, row) for row in latest.values()],
+                )
+            self._mark_dead(latest)
+            ids: List[Optional[str]] = [None] * len(chunks)
+            for chunk_id, row in latest.items():
+                ids[row] = chunk_id
+            segment = _Segment(segment_id, path, ids)
+            segment.lists = lists
+            self._segments[segment_id] = segment
+            self._dead += len(chunks) - len(latest)
+            for chunk_id, row in latest.items():
+                self._locations[chunk_id] = (segment, row)
+        self._maybe_compact()
+
+    @staticmethod
+    def _point_row(chunk: Chunk, segment_id: int, row: int) -> tuple:
+        return (
+            chunk.id, segment_id, row, chunk.document_part_id, chunk.source_type, chunk.source_path,
+            chunk.device_id, chunk.scope_id, _timestamp(chunk.created_at), chunk.model_dump_json(),
+        )
+
+    def _mark_dead(self, chunk_ids: Iterable[str]) -> None:
+        for chunk_id in chunk_ids:
+            location = self._locations.pop(chunk_id, None)
+            if location is not None:
+                segment, row = location
+                segment.live[row] = False
+                self._dead += 1
+
+    def search(
+        self,
+        query_vector: List[float],
+        top_k: int,
+        filters: Optional[SearchFilter] = None,
+    ) -> List[Tuple[Chunk, float]]:
+        """
+        Search for the top_k most similar chunks, among those matching `filters` if given.
+
+        Returns:
+            List of (chunk, score) tuples ordered by descending similarity
+        """
+        vector = query_vector.dense if hasattr(query_vector, "dense") else query_vector
+        if len(vector) != self._dimension:
+            raise ValueError(
+                f"Query vector dimension mismatch: expected {self._dimension}, "
+                f"got {len(vector)}"
+            )
+        query = normalize_rows(vector)
+
+        with self._lock:
+            allowed = self._filtered_rows(filters)
+            candidates = None
+            if self._centroids is not None and self._allowed_count(allowed) >= self.index.min_points():
+                candidates = self._index_candidates(query, top_k, allowed)
+            if candidates is None or len(candidates) < top_k:
+                # The probed lists held too few matches, e.g. under a narrow filter
+                candidates = self._exact_candidates(query, top_k, allowed)
+
+            candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+            candidates = candidates[:top_k]
+            chunks = self._load_chunks([chunk_id for _, chunk_id in candidates])
+        return [(chunks[chunk_id], score) for score, chunk_id in candidates]
+
+    def _allowed_count(self, allowed: Optional[Dict[int, np.ndarray]]) -> int:
+        if allowed is None:
+            return len(self._locations)
+        return sum(int(mask.sum()) for mask in allowed.values())
+
+    def _exact_candidates(
+        self, query: np.ndarray, top_k: int, allowed: Optional[Dict[int, np.ndarray]]
+    ) -> List[Tuple[float, str]]:
+        """
+        Up to top_k best (score, chunk ID) pairs per segment, scoring every allowed row.
+        """
+        candidates: List[Tuple[float, str]] = []
+        for segment in self._segments.values():
+            mask = segment.live if allowed is None else allowed.get(segment.id)
+            if mask is None or not mask.any():
+                continue
+            scores = np.asarray(segment.vectors @ query, dtype=np.float32)
+            scores[~mask] = -np.inf
+            candidates.extend((float(scores[row]), segment.ids[row]) for row in top_k_rows(scores, top_k))
+        return candidates
+
+    def _index_candidates(
+        self, query: np.ndarray, top_k: int, allowed: Optional[Dict[int, np.ndarray]]
+    ) -> List[Tuple[float, str]]:
+        """
+        (score, chunk ID) pairs for the rows of the `nprobe` closest lists whose estimated
+        score is among the best `oversampling` x top_k, re-scored with their exact vectors.
+        """
+        centroid_scores = self._centroids @ query
+        probed = top_k_rows(centroid_scores, self.index.nprobe)
+        estimates, owners = [], []
+        for segment in self._segments.values():
+            mask = segment.live if allowed is None else allowed.get(segment.id)
+            if mask is None:
+                continue
+            rows = segment.lists.rows_in(probed)
+            rows = rows[mask[rows]]
+            if rows.size:
+                estimates.append(segment.lists.estimate(rows, query, centroid_scores))
+                owners.append((segment, rows))
+        if not owners:
+            return []
+
+        shortlist = top_k_rows(np.concatenate(estimates), math.ceil(top_k * self.index.oversampling))
+        offsets = np.cumsum([0] + [len(rows) for _, rows in owners])
+        candidates: List[Tuple[float, str]] = []
+        for (segment, rows), start, end in zip(owners, offsets, offsets[1:]):
+            picked = np.sort(rows[shortlist[(shortlist >= start) & (shortlist < end)] - start])
+            if picked.size:
+                scores = np.asarray(segment.vectors[picked] @ query, dtype=np.float32)
+                candidates.extend(zip(scores.tolist(), (segment.ids[row] for row in picked)))
+        return candidates
+
+    def _filtered_rows(self, filters: Optional[SearchFilter]) -> Optional[Dict[int, np.ndarray]]:
+        """
+        Per segment, a mask of the live rows matching `filters`; None if nothing is filtered.
+        """
+        if filters is None or filters.is_empty():
+            return None
+        clauses, params = [], []
+        for field, values in filters.keyword_conditions():
+            clauses.append(f"{field} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        if filters.created_since is not None:
+            clauses.append("created_at >= ?")
+            params.append(_timestamp(filters.created_since))
+        if filters.created_before is not None:
+            clauses.append("created_at < ?")
+            params.append(_timestamp(filters.created_before))
+
+        masks: Dict[int, np.ndarray] = {}
+        for segment_id, row in self._db.execute(
+            f"SELECT segment, row FROM points WHERE {' AND '.join(clauses)}", params
+        ):
+            segment = self._segments[segment_id]
+            mask = masks.get(segment_id)
+            if mask is None:
+                mask = masks[segment_id] = np.zeros(len(segment), dtype=bool)
+            mask[row] = True
+        return masks
+
+    def _load_chunks(self, chunk_ids: List[str]) -> Dict[str, Chunk]:
+        chunks = {}
+        for start in range(0, len(chunk_ids), SQL_BATCH):
+            batch = chunk_ids[start:start + SQL_BATCH]
+            for chunk_id, chunk_json in self._db.execute(
+                f"SELECT chunk_id, chunk_json FROM points WHERE chunk_id IN ({', '.join('?' * len(batch))})",
+                batch,
+            ):
+                chunks[chunk_id] = Chunk.model_validate_json(chunk_json)
+        return chunks
+
+    def query(self, vector: List[float], top_k: int = 10) -> List[Tuple[Chunk, float]]:
+        return self.search(vector, top_k)
+
+    def retrieve_chunk_by_id(self, chunk_id: str) -> Optional[Chunk]:
+        with self._lock:
+            return self._load_chunks([chunk_id]).get(chunk_id)
+
+    def count_chunks(self) -> int:
+        return len(self._locations)
+
+    def dimension(self) -> int:
+        return self._dimension
+
+    def remove_chunks(self, chunk_ids: List[str]) -> None:
+        self._delete_where("chunk_id IN ({})", list(chunk_ids))
+
+    def remove_by_document_part_ids(self, document_part_ids: List[str]) -> None:
+        self._delete_where("document_part_id IN ({})", list(document_part_ids))
+
+    def remove_by_scope(self, source_type: str, scope: dict) -> None:
+        with self._lock:
+            with self._db:
+                deleted = self._db.execute(
+                    "DELETE FROM points WHERE source_type = ? AND scope_id = ? RETURNING chunk_id",
+                    (source_type, make_scope_id(scope)),
+                ).fetchall()
+            self._mark_dead(chunk_id for (chunk_id,) in deleted)
+        self._maybe_compact()
+
+    def _delete_where(self, condition: str, values: List[str]) -> None:
+        with self._lock:
+            for start in range(0, len(values), SQL_BATCH):
+                batch = values[start:start + SQL_BATCH]
+                with self._db:
+                    deleted = self._db.execute(
+                        f"DELETE FROM points WHERE {condition.format(', '.join('?' * len(batch)))} RETURNING chunk_id",
+                        batch,
+                    ).fetchall()
+                self._mark_dead(chunk_id for (chunk_id,) in deleted)
+        self._maybe_compact()
+
+    def clear(self) -> None:
+        if os.environ.get("ALLOW_VECTOR_CLEAR", "false").lower() != "1":
+            raise PermissionError("Clearing the vector store is not allowed.")
+        with self._lock, self._compact_lock:
+            with self._db:
+                self._db.execute("DELETE FROM points")
+                # The index is trained again once the store refills
+                self._db.execute("DELETE FROM meta WHERE key IN ('ivf_version', 'ivf_trained_on')")
+            for segment in self._segments.values():
+                self._remove_segment_files(segment.id)
+            self._load()
+
+    def _needs_training(self) -> bool:
+        if self.index is None:
+            return False
+        if self._centroids is None:
+            return len(self._locations) >= self.index.min_points()
+        # A fixed nlist never needs more lists; the automatic one grows with the store
+        return not self.index.nlist and len(self._locations) >= RETRAIN_GROWTH * self._trained_on
+
+    def _needs_compaction(self) -> bool:
+        stored = sum(len(segment) for segment in self._segments.values())
+        return (
+            len(self._segments) > COMPACT_MAX_SEGMENTS
+            or (stored and self._dead / stored >= COMPACT_DEAD_RATIO)
+            or self._needs_training()
+        )
+
+    def _maybe_compact(self) -> None:
+        if not self._needs_compaction() or self._compact_lock.locked():
+            return
+        if self.background_compaction:
+            threading.Thread(target=self.compact, name="vector-compaction", daemon=True).start()
+        else:
+            self.compact()
+
+    def compact(self) -> None:
+        """
+        Merge all segments into one holding only their live rows, training the IVF index
+        on them first if it is due.
+        Searches and writes continue while the new segment is written; rows deleted or
+        overwritten meanwhile are dropped when it is swapped in.
+        """
+        if not self._compact_lock.acquire(blocking=False):
+            return
+        try:
+            with self._lock:
+                retrain = self._needs_training()
+                if len(self._segments) < 2 and not self._dead and not retrain:
+                    return
+                sources = list(self._segments.values())
+                rows = [np.flatnonzero(segment.live) for segment in sources]
+                segment_id = self._next_segment
+                self._next_segment += 1
+
+            vectors = np.concatenate(
+                [np.asarray(segment.vectors[segment_rows]) for segment, segment_rows in zip(sources, rows)]
+                + [np.zeros((0, self._dimension), dtype=np.float32)]
+            )
+            path = self._write_segment(segment_id, vectors)
+            centroids, lists = self._merged_lists(sources, rows, vectors, retrain and len(vectors) > 0)
+            if lists is not None:
+                self._write_lists(segment_id, lists)
+            moved = [
+                (segment, int(row))
+                for segment, segment_rows in zip(sources, rows)
+                for row in segment_rows
+            ]
+
+            with self._lock:
+                ids: List[Optional[str]] = [None] * len(moved)
+                for new_row, (segment, row) in enumerate(moved):
+                    if segment.live[row]:
+                        ids[new_row] = segment.ids[row]
+                with self._db:
+                    self._db.executemany(
+                        "UPDATE points SET segment = ?, row = ? WHERE chunk_id = ?",
+                        [(segment_id, new_row, chunk_id) for new_row, chunk_id in enumerate(ids) if chunk_id is not None],
+                    )
+                for segment in sources:
+                    del self._segments[segment.id]
+                    self._remove_segment_files(segment.id)
+                if centroids is not None:
+                    self._swap_centroids(centroids, len(vectors))
+                if any(chunk_id is not None for chunk_id in ids):
+                    merged = _Segment(segment_id, path, ids)
+                    merged.lists = lists
+                    self._segments[segment_id] = merged
+                    for new_row, chunk_id in enumerate(ids):
+                        if chunk_id is not None:
+                            self._locations[chunk_id] = (merged, new_row)
+                else:
+                    self._remove_segment_files(segment_id)
+                # Segments written while compacting keep their dead rows
+                self._dead = sum(len(segment) - int(segment.live.sum()) for segment in self._segments.values())
+            logger.info(f"Compacted {len(sources)} vector segments into {path.name} ({len(moved)} vectors)")
+        finally:
+            self._compact_lock.release()
+
+    def _merged_lists(
+        self, sources: List[_Segment], rows: List[np.ndarray], vectors: np.ndarray, retrain: bool
+    ) -> Tuple[Optional[np.ndarray], Optional[SegmentLists]]:
+        """
+        New centroids if the index is retrained (else None), and the lists of the merged segment.
+        """
+        if retrain:
+            centroids = train_centroids(vectors, self.index.lists_for(len(vectors)))
+            logger.info(f"Trained {len(centroids)} IVF lists on {len(vectors)} vectors")
+            return centroids, SegmentLists.build(vectors, centroids, self._index_version + 1)
+        if self._centroids is None:
+            return None, None
+        # Rows keep the lists they were assigned when written
+        return None, SegmentLists.concatenate(
+            [segment.lists.take(segment_rows) for segment, segment_rows in zip(sources, rows)],
+            self._index_version,
+        )
+
+    def _swap_centroids(self, centroids: np.ndarray, trained_on: int) -> None:
+        """
+        Make `centroids` current and re-assign the segments written while they were trained.
+        """
+        old_path = self._centroids_path(self._index_version)
+        self._index_version += 1
+        _write_file(self._centroids_path(self._index_version), lambda f: np.save(f, centroids))
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                [("ivf_version", str(self._index_version)), ("ivf_trained_on", str(trained_on))],
+            )
+        old_path.unlink(missing_ok=True)
+        self._centroids = centroids
+        self._trained_on = trained_on
+        for segment in self._segments.values():
+            segment.lists = self._build_lists(segment.id, segment.vectors)
@@ -0,0 +1,84 @@
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+def run(conn, qdrant_client, collection_name: str):
+    from qdrant_client import models
+    from loseme_core.ids import make_scope_id
+
+    logger.info("Starting scope_id backfill migration...")
+
+    BATCH_SIZE = 500
+
+    # Points stored before chunks carried scope_id; remove_by_scope would leave them behind
+    scroll_filter = models.Filter(
+        must=[
+            models.IsEmptyCondition(
+                is_empty=models.PayloadField(key="scope_id")
+            ),
+        ],
+    )
+
+    offset = None
+    total_updated = 0
+
+    while True:
+        points, offset = qdrant_client.scroll(
+            collection_name=collection_name,
+            scroll_filter=scroll_filter,
+            with_payload=["document_part_id"],
+            limit=BATCH_SIZE,
+            offset=offset,
+        )
+
+        if not points:
+            break
+
+        document_ids = list({
+            (p.payload or {}).get("document_part_id")
+            for p in points
+            if (p.payload or {}).get("document_part_id")
+        })
+
+        scope_id_map = {}
+        if document_ids:
+            placeholders = ",".join("?" * len(document_ids))
+            rows = conn.execute(
+                f"SELECT document_part_id, scope_json FROM document_parts WHERE document_part_id IN ({placeholders})",
+                document_ids,
+            ).fetchall()
+            for document_id, scope_json in rows:
+                scope = json.loads(scope_json) if scope_json else None
+                if scope:
+                    scope_id_map[document_id] = make_scope_id(scope)
+
+        # One operation per document part rather than per point
+        points_by_document = {}
+        for point in points:
+            document_id = (point.payload or {}).get("document_part_id")
+            if document_id in scope_id_map:
+                points_by_document.setdefault(document_id, []).append(point.id)
+
+        update_operations = [
+            models.SetPayloadOperation(
+                set_payload=models.SetPayload(
+                    payload={"scope_id": scope_id_map[document_id]},
+                    points=point_ids,
+                )
+            )
+            for document_id, point_ids in points_by_document.items()
+        ]
+
+        if update_operations:
+            qdrant_client.batch_update_points(
+                collection_name=collection_name,
+                update_operations=update_operations,
+            )
+            total_updated += sum(len(point_ids) for point_ids in points_by_document.values())
+            logger.info(f"Updated {total_updated} points so far...")
+
+        if offset is None:
+            break
+
+    logger.info(f"Migration complete. Total points updated: {total_updated}")
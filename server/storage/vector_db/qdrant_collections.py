@@ -0,0 +1,93 @@
+import re
+import threading
+import time
+from typing import List, Optional, Sequence
+from qdrant_client import QdrantClient, models
+from storage.metadata_db.vector_rebuilds import get_active_rebuild, record_changes
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Longest a store keeps using what it last read about an active rebuild
+REBUILD_CHECK_SECONDS = 2.0
+
+
+def resolve_collection(client: QdrantClient, alias: str) -> Optional[str]:
+    """
+    The collection `alias` points at; `alias` itself if it is a collection created
+    before collections were versioned, None if neither exists.
+    """
+    for description in client.get_aliases().aliases:
+        if description.alias_name == alias:
+            return description.collection_name
+    if client.collection_exists(alias):
+        return alias
+    return None
+
+
+def next_collection_name(client: QdrantClient, alias: str) -> str:
+    """
+    `<alias>_v<n>` with n one above the highest version that exists.
+    """
+    pattern = re.compile(rf"{re.escape(alias)}_v(\d+)")
+    versions = [
+        int(match.group(1))
+        for collection in client.get_collections().collections
+        if (match := pattern.fullmatch(collection.name))
+    ]
+    return f"{alias}_v{max(versions, default=0) + 1}"
+
+
+def point_alias(client: QdrantClient, alias: str, collection_name: str) -> None:
+    """
+    Point `alias` at `collection_name`; moving an existing alias is a single atomic request.
+    """
+    current = resolve_collection(client, alias)
+    operations = []
+    if current == alias:
+        # A collection from before versioning holds the name, so it has to go first; requests
+        # made between the two calls fail
+        logger.warning(f"Deleting unversioned Qdrant collection '{alias}' to replace it with an alias")
+        client.delete_collection(alias)
+    elif current is not None:
+        operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias)))
+    operations.append(
+        models.CreateAliasOperation(
+            create_alias=models.CreateAlias(collection_name=collection_name, alias_name=alias)
+        )
+    )
+    client.update_collection_aliases(change_aliases_operations=operations)
+    logger.info(f"Qdrant alias '{alias}' now points at '{collection_name}'")
+
+
+class CollectionWrites:
+    """
+    Collections a store writes to: the alias, plus the target of an online rebuild
+    while it is copying. Mirrored writes are logged so the rebuild can re-copy the
+    points its bulk copy may have overwritten with older data.
+    """
+
+    def __init__(self, alias: str):
+        self.alias = alias
+        self._rebuild = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _active_rebuild(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at >= REBUILD_CHECK_SECONDS:
+                self._rebuild = get_active_rebuild(self.alias)
+                self._checked_at = now
+            return self._rebuild
+
+    def targets(self, field: str, values: Sequence[str]) -> List[str]:
+        """
+        Collections to apply a write to points whose payload `field` (or "point_id") is in `values`.
+        """
+        rebuild = self._active_rebuild()
+        if rebuild is None:
+            return [self.alias]
+        # Logged before writing, so a write that fails halfway is still re-copied
+        record_changes(rebuild["id"], field, values)
+        return [self.alias, rebuild["target_collection"]]
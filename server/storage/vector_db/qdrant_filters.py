@@ -0,0 +1,76 @@
+from typing import Iterator, List, Optional
+from qdrant_client import QdrantClient, models
+from loseme_core.ids import make_scope_id
+from storage.vector_db.vector_store import SearchFilter
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Document part IDs per delete request; one MatchAny over a whole mailbox would be a huge request body
+DELETE_MAX_DOCUMENT_PART_IDS = 1000
+
+# Payload fields that searches and deletes filter on, with the index type Qdrant keeps for them
+PAYLOAD_INDEXES = {
+    "document_part_id": models.PayloadSchemaType.KEYWORD,
+    "source_path": models.PayloadSchemaType.KEYWORD,
+    "device_id": models.PayloadSchemaType.KEYWORD,
+    "source_type": models.PayloadSchemaType.KEYWORD,
+    "scope_id": models.PayloadSchemaType.KEYWORD,
+    "created_at": models.PayloadSchemaType.DATETIME,
+    "index": models.PayloadSchemaType.INTEGER,
+}
+
+
+def ensure_payload_indexes(client: QdrantClient, collection_name: str) -> None:
+    """
+    Create the payload indexes of PAYLOAD_INDEXES that the collection does not have yet.
+    """
+    existing = client.get_collection(collection_name).payload_schema or {}
+    for field_name, field_schema in PAYLOAD_INDEXES.items():
+        if field_name in existing:
+            continue
+        logger.info(f"Creating {field_schema.value} payload index on '{field_name}' in Qdrant collection '{collection_name}'")
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=field_schema,
+            wait=True,
+        )
+
+
+def to_qdrant_filter(search_filter: Optional[SearchFilter]) -> Optional[models.Filter]:
+    if search_filter is None or search_filter.is_empty():
+        return None
+
+    must = [
+        models.FieldCondition(key=field, match=models.MatchAny(any=values))
+        for field, values in search_filter.keyword_conditions()
+    ]
+    if search_filter.created_since is not None or search_filter.created_before is not None:
+        must.append(
+            models.FieldCondition(
+                key="created_at",
+                range=models.DatetimeRange(gte=search_filter.created_since, lt=search_filter.created_before),
+            )
+        )
+    return models.Filter(must=must)
+
+
+def document_part_filters(document_part_ids: List[str]) -> Iterator[models.Filter]:
+    """
+    Filters selecting the chunks of the given document parts, DELETE_MAX_DOCUMENT_PART_IDS parts each.
+    """
+    for start in range(0, len(document_part_ids), DELETE_MAX_DOCUMENT_PART_IDS):
+        yield models.Filter(must=[
+            models.FieldCondition(
+                key="document_part_id",
+                match=models.MatchAny(any=document_part_ids[start:start + DELETE_MAX_DOCUMENT_PART_IDS]),
+            ),
+        ])
+
+
+def scope_filter(source_type: str, scope: dict) -> models.Filter:
+    return models.Filter(must=[
+        models.FieldCondition(key="source_type", match=models.MatchValue(value=source_type)),
+        models.FieldCondition(key="scope_id", match=models.MatchValue(value=make_scope_id(scope))),
+    ])
@@ -0,0 +1,183 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from qdrant_client import models
+from loseme_core.config import QDRANT_OVERSAMPLING, QDRANT_PROFILE, QDRANT_RESCORE
+import logging
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATIONS = ("scalar", "binary", "product")
+
+
+@dataclass(frozen=True)
+class VectorLayout:
+    """
+    Storage of one named vector.
+
+    on_disk       : original float vectors are memory-mapped instead of held in RAM
+    quantization  : None | "scalar" (int8, 4x smaller) | "binary" (1 bit, 32x) | "product" (16x)
+    always_ram    : keep the quantized copy in RAM, so only rescoring reads the originals from disk
+    hnsw          : build an HNSW graph; vectors that only re-rank a prefetched pool do not need one
+    """
+    on_disk: bool = False
+    quantization: Optional[str] = None
+    always_ram: bool = True
+    hnsw: bool = True
+
+
+@dataclass(frozen=True)
+class CollectionProfile:
+    """
+    Layout of a Qdrant chunk collection and how it is queried.
+
+    The plain store has one unnamed vector laid out as `dense`; the hybrid store
+    additionally has the `colbert` multivector and the `sparse` vector.
+    `oversampling` multiplies the candidates fetched with quantized vectors before
+    they are rescored with the originals.
+    """
+    name: str
+    dense: VectorLayout = field(default_factory=VectorLayout)
+    colbert: VectorLayout = field(default_factory=VectorLayout)
+    sparse_on_disk: bool = True
+    on_disk_payload: bool = False
+    oversampling: float = 1.0
+
+    def vector_params(self, vector_name: str, size: int, **kwargs) -> models.VectorParams:
+        layout = self.layout(vector_name)
+        return models.VectorParams(
+            size=size,
+            distance=models.Distance.COSINE,
+            on_disk=layout.on_disk,
+            quantization_config=quantization_config(layout),
+            hnsw_config=None if layout.hnsw else models.HnswConfigDiff(m=0),
+            **kwargs,
+        )
+
+    def sparse_params(self) -> models.SparseVectorParams:
+        return models.SparseVectorParams(index=models.SparseIndexParams(on_disk=self.sparse_on_disk))
+
+    def search_params(self, vector_name: str) -> Optional[models.SearchParams]:
+        """
+        Query parameters for searches on `vector_name`; None if it is not quantized.
+        """
+        if self.layout(vector_name).quantization is None:
+            return None
+        return models.SearchParams(
+            quantization=models.QuantizationSearchParams(
+                rescore=QDRANT_RESCORE,
+                oversampling=QDRANT_OVERSAMPLING or self.oversampling,
+            )
+        )
+
+    def layout(self, vector_name: str) -> VectorLayout:
+        if vector_name == "colbert":
+            return self.colbert
+        return self.dense
+
+    def mismatches(self, info: models.CollectionInfo) -> List[str]:
+        """
+        Differences between this profile and an existing collection, e.g. one created under another profile.
+        """
+        params = info.config.params
+        vectors = params.vectors if isinstance(params.vectors, dict) else {"dense": params.vectors}
+        found = []
+        for vector_name, vector in vectors.items():
+            layout = self.layout(vector_name)
+            quantization = quantization_kind(vector.quantization_config or info.config.quantization_config)
+            if quantization != layout.quantization:
+                found.append(f"{vector_name} quantization is {quantization}, profile wants {layout.quantization}")
+            if bool(vector.on_disk) != layout.on_disk:
+                found.append(f"{vector_name} on_disk is {bool(vector.on_disk)}, profile wants {layout.on_disk}")
+        if bool(params.on_disk_payload) != self.on_disk_payload:
+            found.append(f"on_disk_payload is {bool(params.on_disk_payload)}, profile wants {self.on_disk_payload}")
+        return found
+
+
+def quantization_config(layout: VectorLayout) -> Optional[models.QuantizationConfig]:
+    if layout.quantization is None:
+        return None
+    if layout.quantization == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=layout.always_ram,
+            )
+        )
+    if layout.quantization == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=layout.always_ram))
+    if layout.quantization == "product":
+        return models.ProductQuantization(
+            product=models.ProductQuantizationConfig(
+                compression=models.CompressionRatio.X16,
+                always_ram=layout.always_ram,
+            )
+        )
+    raise ValueError(f"Unknown quantization '{layout.quantization}', expected one of {QUANTIZATIONS}")
+
+
+def quantization_kind(config) -> Optional[str]:
+    if isinstance(config, models.ScalarQuantization):
+        return "scalar"
+    if isinstance(config, models.BinaryQuantization):
+        return "binary"
+    if isinstance(config, models.ProductQuantization):
+        return "product"
+    return None
+
+
+PROFILES: Dict[str, CollectionProfile] = {
+    # Everything in RAM, nothing quantized: the layout collections were created with so far
+    "default": CollectionProfile(name="default"),
+    # int8 copies in RAM, originals on disk; recall stays close to unquantized
+    "scalar": CollectionProfile(
+        name="scalar",
+        dense=VectorLayout(on_disk=True, quantization="scalar"),
+        colbert=VectorLayout(on_disk=True, quantization="scalar", hnsw=False),
+        oversampling=1.5,
+    ),
+    # 1 bit per dimension in RAM; works well for 1024-dim models such as BGE-M3, needs oversampling
+    "binary": CollectionProfile(
+        name="binary",
+        dense=VectorLayout(on_disk=True, quantization="binary"),
+        colbert=VectorLayout(on_disk=True, quantization="binary", hnsw=False),
+        on_disk_payload=True,
+        oversampling=3.0,
+    ),
+    # Product quantization: smallest in RAM, slowest to build and lowest recall before rescoring
+    "product": CollectionProfile(
+        name="product",
+        dense=VectorLayout(on_disk=True, quantization="product"),
+        colbert=VectorLayout(on_disk=True, quantization="product", hnsw=False),
+        on_disk_payload=True,
+        oversampling=4.0,
+    ),
+    # For hybrid collections larger than RAM: int8 dense in RAM, ColBERT entirely on disk.
+    # ColBERT only re-ranks the fused prefetch pool, so it needs neither a graph nor RAM.
+    "low-memory": CollectionProfile(
+        name="low-memory",
+        dense=VectorLayout(on_disk=True, quantization="scalar"),
+        colbert=VectorLayout(on_disk=True, quantization="binary", always_ram=False, hnsw=False),
+        on_disk_payload=True,
+        oversampling=2.0,
+    ),
+}
+
+
+def get_collection_profile(name: Optional[str] = None) -> CollectionProfile:
+    name = name or QDRANT_PROFILE
+    profile = PROFILES.get(name)
+    if profile is None:
+        raise ValueError(f"Unknown Qdrant collection profile '{name}', expected one of {sorted(PROFILES)}")
+    return profile
+
+
+def warn_on_mismatch(client, collection_name: str, profile: CollectionProfile) -> None:
+    """
+    Profiles apply when a collection is created; log what an existing collection does differently.
+    """
+    for mismatch in profile.mismatches(client.get_collection(collection_name)):
+        logger.warning(
+            f"Qdrant collection '{collection_name}' does not match profile '{profile.name}': {mismatch}. "
+            f"Recreate the collection to apply the profile."
+        )
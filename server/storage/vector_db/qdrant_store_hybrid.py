@@ -3,21 +3,23 @@ import os
 import io
 import logging
 import json
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from qdrant_client import QdrantClient, models
-from qdrant_client.models import PointStruct, VectorParams, Distance, SparseVector, SparseIndexParams, MultiVectorConfig, MultiVectorComparator, SparseVectorParams, PointIdsList
-from qdrant_client.http.exceptions import UnexpectedResponse
+from qdrant_client.models import PointStruct, SparseVector, MultiVectorConfig, MultiVectorComparator, PointIdsList, FilterSelector
 
-from loseme_core.config import EMBEDDING_MODEL
+from loseme_core.config import EMBEDDING_MODEL, QDRANT_COLLECTION, VECTOR_UPSERT_MAX_BYTES
 from loseme_core.models import Chunk
-from wiring import build_embedding_provider
+from loseme_core.ids import make_scope_id
+from pipeline.embeddings.registry import model_registry
 from loseme_core.domain import EmbeddingOutput
-from storage.vector_db.vector_store import VectorStore
+from storage.vector_db.vector_store import SearchFilter, VectorStore, check_batch_lengths, estimate_point_bytes, split_by_bytes
+from storage.vector_db.qdrant_collections import CollectionWrites, next_collection_name, point_alias, resolve_collection
+from storage.vector_db.qdrant_profiles import CollectionProfile, get_collection_profile, warn_on_mismatch
+from storage.vector_db.qdrant_filters import document_part_filters, ensure_payload_indexes, scope_filter, to_qdrant_filter
 from storage.metadata_db.db import get_connection
 from storage.vector_db.migrations import run_vector_migrations
 
-COLLECTION = "chunks"
-VECTOR_SIZE = build_embedding_provider().dimension()
+VECTOR_SIZE = model_registry.dimension()
 
 logger = logging.getLogger(__name__)
 
@@ -26,47 +28,91 @@ def chunk_id_to_uuid(chunk_id: str) -> str:
 
 
 class QdrantVectorStoreHybrid(VectorStore):
-    def __init__(self, client: QdrantClient):
+    def __init__(
+        self,
+        client: QdrantClient,
+        collection: str = QDRANT_COLLECTION,
+        profile: Optional[CollectionProfile] = None,
+    ):
         self.client = client
         self.model_name = EMBEDDING_MODEL
-        self.model = build_embedding_provider()
+        # An alias; the collection behind it changes when the collection is rebuilt
+        self.collection = collection
+        self.writes = CollectionWrites(self.collection)
+        self.profile = profile or get_collection_profile()
+        self._payload_indexed = False
         self._ensure_collection()
         with get_connection() as conn:
-            run_vector_migrations(conn, self.client, COLLECTION)
+            run_vector_migrations(conn, self.client, self.collection)
             
     def _ensure_collection(self) -> None:
-        try:
-            self.client.get_collection(COLLECTION)
-        except UnexpectedResponse:
-            logger.info(f"Creating Qdrant collection '{COLLECTION}' with vector size {VECTOR_SIZE}")
-            self.client.create_collection(
-                collection_name=COLLECTION,
-                vectors_config={
-                    "dense": VectorParams(
-                    size=1024,
-                    distance=Distance.COSINE,
-                ),
-                    "colbert": VectorParams(
-                        size=1024,
-                        distance=Distance.COSINE,
-                        multivector_config=MultiVectorConfig(
-                            comparator=MultiVectorComparator.MAX_SIM
-                        ),
-                    ),
-                },
-                sparse_vectors_config={
-                    "sparse": SparseVectorParams(
-                        index=SparseIndexParams(
-                            on_disk=True,
-                        ),
+        if not self.client.collection_exists(self.collection):
+            if resolve_collection(self.client, self.collection) is None:
+                collection_name = next_collection_name(self.client, self.collection)
+                self.create_collection(collection_name)
+                point_alias(self.client, self.collection, collection_name)
+            self._payload_indexed = False
+        elif not self._payload_indexed:
+            warn_on_mismatch(self.client, self.collection, self.profile)
+        if not self._payload_indexed:
+            ensure_payload_indexes(self.client, resolve_collection(self.client, self.collection))
+            self._payload_indexed = True
+
+    def create_collection(self, collection_name: str) -> None:
+        """
+        Create `collection_name` with the layout of the configured profile.
+        Payload indexes are added by _ensure_collection (or by the rebuild that creates it).
+        """
+        logger.info(
+            f"Creating Qdrant collection '{collection_name}' with vector size {VECTOR_SIZE} "
+            f"and profile '{self.profile.name}'"
+        )
+        self.client.create_collection(
+            collection_name=collection_name,
+            vectors_config={
+                "dense": self.profile.vector_params("dense", 1024),
+                "colbert": self.profile.vector_params(
+                    "colbert",
+                    1024,
+                    multivector_config=MultiVectorConfig(
+                        comparator=MultiVectorComparator.MAX_SIM
                     ),
-                },
-            )
-    
+                ),
+            },
+            sparse_vectors_config={
+                "sparse": self.profile.sparse_params(),
+            },
+            on_disk_payload=self.profile.on_disk_payload,
+        )
+
     def add(self, chunk: Chunk, embedding: EmbeddingOutput) -> None:
-        logger.debug(f"Adding chunk with ID {chunk.id} to Qdrant collection '{COLLECTION}'")
+        logger.debug(f"Adding chunk with ID {chunk.id} to Qdrant collection '{self.collection}'")
         logger.debug(f"Embedding has keys: {embedding.__dict__.keys()}")
-        #self._ensure_collection()
+        self.add_batch([chunk], [embedding])
+        return chunk_id_to_uuid(chunk.id)
+
+    def add_batch(self, chunks: List[Chunk], embeddings: List[EmbeddingOutput]) -> None:
+        """
+        Upsert several chunks, one request per VECTOR_UPSERT_MAX_BYTES worth of points.
+        ColBERT multivectors dominate the request size, so long chunks end up in smaller requests.
+        """
+        check_batch_lengths(chunks, embeddings)
+        if not chunks:
+            return
+
+        points = [self._build_point(chunk, embedding) for chunk, embedding in zip(chunks, embeddings)]
+        sizes = [estimate_point_bytes(embedding, point.payload) for point, embedding in zip(points, embeddings)]
+
+        targets = self.writes.targets("document_part_id", [chunk.document_part_id for chunk in chunks])
+        for batch in split_by_bytes(points, sizes, VECTOR_UPSERT_MAX_BYTES):
+            for collection_name in targets:
+                logger.debug(f"Upserting {len(batch)} points to Qdrant collection '{collection_name}'")
+                self.client.upsert(
+                    collection_name=collection_name,
+                    points=batch,
+                )
+
+    def _build_point(self, chunk: Chunk, embedding: EmbeddingOutput) -> PointStruct:
         dense_vector = embedding.dense  # Assuming embedding.dense is a list of floats
         if len(dense_vector) != VECTOR_SIZE:
             raise ValueError(f"Vector size missmatch: expected {VECTOR_SIZE}, got {len(dense_vector)}")
@@ -86,27 +132,23 @@ class QdrantVectorStoreHybrid(VectorStore):
             "sparse": qdrant_sparse_vector,
         }
 
-        self.client.upsert(
-            collection_name=COLLECTION,
-            points=[
-                PointStruct(
-                    id=chunk_id_to_uuid(chunk.id),
-                    vector=vector,
-                    payload={
-                        "chunk_id": chunk.id,
-                        "text": chunk.text,
-                        "source_type": chunk.source_type,
-                        "source_path": chunk.source_path,
-                        "document_part_id": chunk.document_part_id,
-                        "device_id": chunk.device_id,
-                        "index": chunk.index,
-                        "metadata": chunk.metadata,
-                        "unit_locator": chunk.unit_locator,
-                    },
-                )
-            ],
+        return PointStruct(
+            id=chunk_id_to_uuid(chunk.id),
+            vector=vector,
+            payload={
+                "chunk_id": chunk.id,
+                "text": chunk.text,
+                "source_type": chunk.source_type,
+                "source_path": chunk.source_path,
+                "document_part_id": chunk.document_part_id,
+                "device_id": chunk.device_id,
+                "index": chunk.index,
+                "metadata": chunk.metadata,
+                "unit_locator": chunk.unit_locator,
+                "created_at": chunk.created_at.isoformat() if chunk.created_at else None,
+                "scope_id": chunk.scope_id,
+            },
         )
-        return chunk_id_to_uuid(chunk.id)
     
     def create_sparse_vector(self, sparse_data):
         """Convert BGE-M3 sparse output to Qdrant sparse vector format"""
@@ -140,6 +182,7 @@ class QdrantVectorStoreHybrid(VectorStore):
         score_threshold: float | None = None,
         dense_weight: float = 0.5,
         sparse_weight: float = 0.3,
+        filters: Optional[SearchFilter] = None,
     ) -> List[Tuple[Chunk, float]]:
         if prefetch_limit is None:
             prefetch_limit = max(top_k * 3, 100)
@@ -152,20 +195,25 @@ class QdrantVectorStoreHybrid(VectorStore):
             raise ValueError("ColBERT embedding is required.")
 
         sparse_vector = self.create_sparse_vector(query_embedding.sparse)
+        # Filter every candidate pool, so the fused pool only holds matching chunks
+        query_filter = to_qdrant_filter(filters)
 
         hits = self.client.query_points(
-            collection_name=COLLECTION,
+            collection_name=self.collection,
             prefetch=[
                 models.Prefetch(
                     prefetch=[
                         models.Prefetch(
                             query=sparse_vector,
                             using="sparse",
+                            filter=query_filter,
                             limit=prefetch_limit,
                         ),
                         models.Prefetch(
                             query=query_embedding.dense,
                             using="dense",
+                            filter=query_filter,
+                            params=self.profile.search_params("dense"),
                             limit=prefetch_limit,
                         ),
                     ],
@@ -176,6 +224,8 @@ class QdrantVectorStoreHybrid(VectorStore):
             # ColBERT re-ranks the weighted-RRF-fused pool
             query=query_embedding.colbert_vec,
             using="colbert",
+            query_filter=query_filter,
+            search_params=self.profile.search_params("colbert"),
             with_payload=True,
             limit=top_k,
             score_threshold=score_threshold,
@@ -193,6 +243,8 @@ class QdrantVectorStoreHybrid(VectorStore):
                 index=hit.payload["index"],
                 metadata=hit.payload.get("metadata", {}),
                 unit_locator=hit.payload.get("unit_locator", ""),
+                created_at=hit.payload.get("created_at"),
+                scope_id=hit.payload.get("scope_id"),
             )
             results.append((chunk, hit.score if hit.score is not None else 0.0))
 
@@ -202,7 +254,8 @@ class QdrantVectorStoreHybrid(VectorStore):
         if os.environ.get("ALLOW_VECTOR_CLEAR", "false").lower() != "1":
             raise PermissionError("Clearing the vector store is not allowed.")
 
-        self.client.delete_collection(COLLECTION)
+        self._delete_current_collection()
+        self._payload_indexed = False
         self._ensure_collection()
     
     def dimension(self) -> int:
@@ -214,7 +267,13 @@ class QdrantVectorStoreHybrid(VectorStore):
     def delete_collection(self) -> None:
         if os.environ.get("ALLOW_VECTOR_CLEAR", "false").lower() != "1":
             raise PermissionError("Deleting the vector store collection is not allowed.")
-        self.client.delete_collection(COLLECTION)
+        self._delete_current_collection()
+
+    def _delete_current_collection(self) -> None:
+        # Deleting the collection also removes the alias pointing at it
+        collection_name = resolve_collection(self.client, self.collection)
+        if collection_name is not None:
+            self.client.delete_collection(collection_name)
     
     def retrieve_chunk_by_id(self, chunk_id: str) -> Chunk:
         """ 
@@ -222,13 +281,13 @@ class QdrantVectorStoreHybrid(VectorStore):
         """ 
         point_id = chunk_id_to_uuid(chunk_id)
         result = self.client.retrieve(
-            collection_name=COLLECTION,
+            collection_name=self.collection,
             ids=[point_id],
             with_payload=True,
         )
 
         if result is None or len(result) == 0:
-            logger.warning(f"Chunk with ID {chunk_id} not found in Qdrant collection '{COLLECTION}'")
+            logger.warning(f"Chunk with ID {chunk_id} not found in Qdrant collection '{self.collection}'")
             return None
 
         result = result[0]
@@ -242,25 +301,52 @@ class QdrantVectorStoreHybrid(VectorStore):
             device_id=payload["device_id"],
             index=payload["index"],
             metadata=payload.get("metadata", {}),
-            unit_locator=payload.get("unit_locator", "")
+            unit_locator=payload.get("unit_locator", ""),
+            created_at=payload.get("created_at"),
+            scope_id=payload.get("scope_id"),
         )
         return chunk
 
     def count_chunks(self) -> int:
         self._ensure_collection()
-        stats = self.client.get_collection(collection_name=COLLECTION)
+        stats = self.client.get_collection(collection_name=self.collection)
         return stats.points_count
     
     def remove_chunks(self, chunk_ids: List[str]) -> None:
         point_ids = [chunk_id_to_uuid(cid) for cid in chunk_ids]
-        self.client.delete(
-            collection_name=COLLECTION,
-            points_selector=PointIdsList(points=point_ids)
-        )
+        for collection_name in self.writes.targets("point_id", point_ids):
+            self.client.delete(
+                collection_name=collection_name,
+                points_selector=PointIdsList(points=point_ids)
+            )
+
+    def remove_by_document_part_ids(self, document_part_ids: List[str]) -> None:
+        """
+        Delete the chunks of the given document parts with filter deletes on the indexed
+        document_part_id field, so stale or missing chunk_ids bookkeeping does not matter.
+        """
+        document_part_ids = list(document_part_ids)
+        targets = self.writes.targets("document_part_id", document_part_ids)
+        for part_filter in document_part_filters(document_part_ids):
+            for collection_name in targets:
+                self.client.delete(
+                    collection_name=collection_name,
+                    points_selector=FilterSelector(filter=part_filter),
+                )
+
+    def remove_by_scope(self, source_type: str, scope: dict) -> None:
+        """
+        Delete all chunks of an indexing scope in one server-side filter delete.
+        """
+        for collection_name in self.writes.targets("scope_id", [make_scope_id(scope)]):
+            self.client.delete(
+                collection_name=collection_name,
+                points_selector=FilterSelector(filter=scope_filter(source_type, scope)),
+            )
     
     def export(self, file_path: str) -> io.BytesIO:
         """Export the entire collection as a stream."""
-        export_result = self.client.export_collection(collection_name=COLLECTION)
+        export_result = self.client.export_collection(collection_name=self.collection)
         if not export_result.url:
             raise ValueError("Failed to get export URL from Qdrant.")
         
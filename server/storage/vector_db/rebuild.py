@@ -0,0 +1,159 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+from qdrant_client import models
+from storage.metadata_db.vector_rebuilds import changes_after, create_rebuild, finish_rebuild, update_copied_points
+from storage.vector_db.qdrant_collections import REBUILD_CHECK_SECONDS, next_collection_name, point_alias, resolve_collection
+from storage.vector_db.qdrant_filters import ensure_payload_indexes
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Points read per scroll request and written per upsert
+REBUILD_BATCH_SIZE = 256
+# Upserts into the new collection running at the same time
+REBUILD_WORKERS = 4
+# Wait after registering a rebuild, so every store has seen it and writes that started before have landed
+REBUILD_SETTLE_SECONDS = max(30.0, 2 * REBUILD_CHECK_SECONDS)
+# Catch-up rounds after the bulk copy; under constant ingestion a round rarely comes back empty
+REBUILD_MAX_CATCHUP_ROUNDS = 10
+
+
+def _to_point(record: models.Record) -> models.PointStruct:
+    return models.PointStruct(id=record.id, vector=record.vector, payload=record.payload)
+
+
+class CollectionRebuild:
+    """
+    Rebuild the collection behind a Qdrant store's alias without stopping ingestion.
+
+    1. Create the next versioned collection (<alias>_v<n>) with the store's current profile.
+    2. Register the rebuild; from then on stores mirror every write into the new collection
+       and log which points it touched.
+    3. Copy all points in parallel batches.
+    4. Re-copy the points logged during the copy, since the bulk copy may have overwritten
+       a mirrored write with the older version it had read, until a round logs nothing new.
+    5. Point the alias at the new collection in one request and drop the old one.
+    """
+
+    def __init__(
+        self,
+        store,
+        batch_size: int = REBUILD_BATCH_SIZE,
+        workers: int = REBUILD_WORKERS,
+        settle_seconds: float = REBUILD_SETTLE_SECONDS,
+        keep_old: bool = False,
+    ):
+        if not hasattr(store, "create_collection"):
+            raise ValueError(f"{type(store).__name__} has no Qdrant collection to rebuild")
+        self.store = store
+        self.client = store.client
+        self.alias = store.collection
+        self.batch_size = batch_size
+        self.workers = workers
+        self.settle_seconds = settle_seconds
+        self.keep_old = keep_old
+        self.copied_points = 0
+
+    def run(self) -> str:
+        """
+        Run the rebuild; returns the name of the collection the alias points at afterwards.
+        """
+        source = resolve_collection(self.client, self.alias)
+        target = next_collection_name(self.client, self.alias)
+        logger.info(f"Rebuilding Qdrant collection '{source}' behind '{self.alias}' into '{target}'")
+
+        self.store.create_collection(target)
+        # The store only indexes the collection its alias pointed at when it was opened
+        ensure_payload_indexes(self.client, target)
+        rebuild_id = create_rebuild(self.alias, source, target)
+        try:
+            time.sleep(self.settle_seconds)
+            if source is not None:
+                self.copied_points = self._copy(source, target, scroll_filter=None)
+                update_copied_points(rebuild_id, self.copied_points)
+                self._catch_up(rebuild_id, source, target)
+            point_alias(self.client, self.alias, target)
+        except BaseException:
+            finish_rebuild(rebuild_id, "failed")
+            self.client.delete_collection(target)
+            raise
+        finish_rebuild(rebuild_id, "swapped")
+
+        if source is not None and source != self.alias and not self.keep_old:
+            # Searches that resolved the alias just before the swap may still be running
+            time.sleep(self.settle_seconds)
+            logger.info(f"Deleting previous Qdrant collection '{source}'")
+            self.client.delete_collection(source)
+        logger.info(f"Rebuild of '{self.alias}' finished: {self.copied_points} points copied into '{target}'")
+        return target
+
+    def _copy(self, source: str, target: str, scroll_filter: Optional[models.Filter]) -> int:
+        """
+        Copy the points of `source` matching `scroll_filter` into `target`: one thread
+        scrolls, up to `workers` upserts run at the same time.
+        """
+        copied = 0
+        offset = None
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = set()
+            while True:
+                records, offset = self.client.scroll(
+                    collection_name=source,
+                    scroll_filter=scroll_filter,
+                    limit=self.batch_size,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True,
+                )
+                if records:
+                    if len(pending) >= self.workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                    pending.add(executor.submit(
+                        self.client.upsert,
+                        collection_name=target,
+                        points=[_to_point(record) for record in records],
+                    ))
+                    copied += len(records)
+                if offset is None:
+                    break
+            for future in pending:
+                future.result()
+        return copied
+
+    def _catch_up(self, rebuild_id: str, source: str, target: str) -> None:
+        seq = 0
+        for round_number in range(1, REBUILD_MAX_CATCHUP_ROUNDS + 1):
+            changes = changes_after(rebuild_id, seq)
+            if not changes:
+                return
+            seq = changes[-1]["seq"]
+            by_field: Dict[str, List[str]] = {}
+            for change in changes:
+                by_field.setdefault(change["field"], []).append(change["value"])
+            logger.info(f"Rebuild catch-up round {round_number}: {len(changes)} logged writes")
+            for field, values in by_field.items():
+                self._recopy(source, target, field, list(dict.fromkeys(values)))
+        logger.warning(
+            f"Writes kept arriving after {REBUILD_MAX_CATCHUP_ROUNDS} catch-up rounds; "
+            f"swapping with the last round's writes mirrored but not re-copied"
+        )
+
+    def _recopy(self, source: str, target: str, field: str, values: List[str]) -> None:
+        """
+        Replace the points of `target` whose payload `field` is in `values` with those of `source`.
+        Deleting first means a mirrored write landing in between is either re-copied here or logged again.
+        """
+        for start in range(0, len(values), self.batch_size):
+            batch = values[start:start + self.batch_size]
+            if field == "point_id":
+                self.client.delete(collection_name=target, points_selector=models.PointIdsList(points=batch))
+                records = self.client.retrieve(collection_name=source, ids=batch, with_payload=True, with_vectors=True)
+                if records:
+                    self.client.upsert(collection_name=target, points=[_to_point(record) for record in records])
+                continue
+            value_filter = models.Filter(must=[models.FieldCondition(key=field, match=models.MatchAny(any=batch))])
+            self.client.delete(collection_name=target, points_selector=models.FilterSelector(filter=value_filter))
+            self._copy(source, target, scroll_filter=value_filter)
@@ -1,19 +1,29 @@
 import os
-from qdrant_client import QdrantClient
-from wiring import build_embedding_provider, build_vector_store
+import threading
+from loseme_core.config import VECTOR_STORAGE
+from wiring import build_vector_store
+from pipeline.embeddings.registry import model_registry
 
 _vector_store = None
+# The startup warmup and the first requests may build the store at the same time
+_vector_store_lock = threading.Lock()
 
 def get_vector_store():
     global _vector_store
     if _vector_store is None:
-        client = QdrantClient(
-            url=os.environ.get("QDRANT_URL", "http://qdrant:6333"),
-        )
+        with _vector_store_lock:
+            if _vector_store is None:
+                client = None
+                if VECTOR_STORAGE.startswith("qdrant"):
+                    # Deferred so importing the API does not pull in the Qdrant client
+                    from qdrant_client import QdrantClient
+                    client = QdrantClient(
+                        url=os.environ.get("QDRANT_URL", "http://qdrant:6333"),
+                    )
 
-        _vector_store = build_vector_store(client)
+                _vector_store = build_vector_store(client)
     return _vector_store
 
 def get_embedding_provider():
-    return build_embedding_provider()
+    return model_registry.get_embedding_provider()
 
@@ -1,6 +1,62 @@
 from abc import ABC, abstractmethod
-from typing import List, Tuple
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Sequence, Tuple, TypeVar
+import json
+from pydantic import BaseModel
 from loseme_core.models import Chunk
+from loseme_core.domain import EmbeddingOutput
+
+T = TypeVar("T")
+
+# Rough size of one float in a JSON request body, used to estimate upsert sizes
+_JSON_BYTES_PER_FLOAT = 12
+
+class SearchFilter(BaseModel):
+    """
+    Restricts a search to chunks matching every given field; a list matches any of its values.
+    Stores push the filter into the index lookup rather than filtering the top-k results.
+    """
+    device_ids: Optional[List[str]] = None
+    source_types: Optional[List[str]] = None
+    source_paths: Optional[List[str]] = None
+    document_part_ids: Optional[List[str]] = None
+    created_since: Optional[datetime] = None  # inclusive
+    created_before: Optional[datetime] = None  # exclusive
+
+    def keyword_conditions(self) -> List[Tuple[str, List[str]]]:
+        """
+        (payload field, accepted values) for each keyword field that is set.
+        """
+        fields = (
+            ("device_id", self.device_ids),
+            ("source_type", self.source_types),
+            ("source_path", self.source_paths),
+            ("document_part_id", self.document_part_ids),
+        )
+        return [(field, values) for field, values in fields if values]
+
+    def is_empty(self) -> bool:
+        return not self.keyword_conditions() and self.created_since is None and self.created_before is None
+
+    def matches(self, chunk: Chunk) -> bool:
+        for field, values in self.keyword_conditions():
+            if getattr(chunk, field) not in values:
+                return False
+        if self.created_since is not None or self.created_before is not None:
+            if chunk.created_at is None:
+                return False
+            created_at = _as_utc(chunk.created_at)
+            if self.created_since is not None and created_at < _as_utc(self.created_since):
+                return False
+            if self.created_before is not None and created_at >= _as_utc(self.created_before):
+                return False
+        return True
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Naive timestamps are UTC, as in Qdrant
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
 
 class VectorStore(ABC):
     """
@@ -18,6 +74,21 @@ class VectorStore(ABC):
         """
         pass
 
+    # Fallback implementation
+    def add_batch(self, chunks: List[Chunk], embeddings: List[EmbeddingOutput]) -> None:
+        """Add several chunks and their embeddings to the store.
+
+        Stores backed by a remote service should override this to send as few
+        requests as possible. The fallback calls add in a loop.
+
+        Args:
+            chunks: The chunks to store
+            embeddings: One embedding per chunk, in the same order
+        """
+        check_batch_lengths(chunks, embeddings)
+        for chunk, embedding in zip(chunks, embeddings):
+            self.add(chunk, embedding)
+
     @abstractmethod
     def query(self, vector: List[float], top_k: int = 10) -> List[Tuple[Chunk, float]]:
         """Return top_k chunks most similar to the given vector, with similarity scores."""
@@ -28,6 +99,16 @@ class VectorStore(ABC):
         """Remove chunks by ID from the store."""
         pass
 
+    @abstractmethod
+    def remove_by_document_part_ids(self, document_part_ids: List[str]) -> None:
+        """Remove all chunks of the given document parts, whatever their chunk IDs."""
+        pass
+
+    @abstractmethod
+    def remove_by_scope(self, source_type: str, scope: dict) -> None:
+        """Remove all chunks ingested for an indexing scope (see make_scope_id)."""
+        pass
+
     @abstractmethod
     def clear(self) -> None:
         """Clear all vectors from the store."""
@@ -38,3 +119,42 @@ class VectorStore(ABC):
         """Return the embedding dimensionality the store expects."""
         pass
 
+
+def check_batch_lengths(chunks: Sequence[Chunk], embeddings: Sequence[EmbeddingOutput]) -> None:
+    if len(chunks) != len(embeddings):
+        raise ValueError(
+            f"Batch length mismatch: got {len(chunks)} chunks and {len(embeddings)} embeddings"
+        )
+
+
+def estimate_point_bytes(embedding: EmbeddingOutput, payload: dict) -> int:
+    """
+    Estimate the request size of one point, dominated by the vectors.
+    ColBERT multivectors contribute one float per token and dimension.
+    """
+    floats = 0
+    if embedding.dense is not None:
+        floats += len(embedding.dense)
+    if embedding.sparse:
+        floats += 2 * len(embedding.sparse)
+    if embedding.colbert_vec is not None:
+        floats += sum(len(token_vec) for token_vec in embedding.colbert_vec)
+    return floats * _JSON_BYTES_PER_FLOAT + len(json.dumps(payload, default=str))
+
+
+def split_by_bytes(items: Sequence[T], sizes: Sequence[int], max_bytes: int) -> Iterator[List[T]]:
+    """
+    Split items into consecutive batches whose summed sizes stay within max_bytes.
+    An item larger than max_bytes on its own is yielded as a single-item batch.
+    """
+    batch: List[T] = []
+    batch_bytes = 0
+    for item, size in zip(items, sizes):
+        if batch and batch_bytes + size > max_bytes:
+            yield batch
+            batch = []
+            batch_bytes = 0
+        batch.append(item)
+        batch_bytes += size
+    if batch:
+        yield batch
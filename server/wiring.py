@@ -1,14 +1,27 @@
-from loseme_core.config import CHUNKER_TYPE, EMBEDDING_MODEL, VECTOR_STORAGE 
+from loseme_core.config import (
+    CHUNKER_TYPE, CHUNK_MAX_TOKENS, EMBEDDING_MODEL, LOCAL_IVF_NLIST, LOCAL_IVF_NPROBE,
+    LOCAL_IVF_OVERSAMPLING, LOCAL_VECTOR_INDEX, LOCAL_VECTOR_PATH, VECTOR_STORAGE,
+)
 
 import logging
 logger = logging.getLogger(__name__)
 
 def build_chunker():
-    embedder = build_embedding_provider()
-
     if CHUNKER_TYPE == "semantic":
         from pipeline.chunking.semantic_chunker import SemanticChunker
-        return SemanticChunker(embedder=embedder)
+        from pipeline.embeddings.registry import model_registry
+        # Shares the model used for ingest and search instead of loading a second copy
+        return SemanticChunker(embedder=model_registry.get_embedding_provider())
+
+    elif CHUNKER_TYPE == "token":
+        from pipeline.chunking.token_chunker import TokenBudgetChunker
+        from pipeline.embeddings.registry import model_registry
+        # Sized with the tokenizer and input window of the model the chunks are embedded with
+        return TokenBudgetChunker(embedder=model_registry.get_embedding_provider(), max_tokens=CHUNK_MAX_TOKENS)
+
+    elif CHUNKER_TYPE == "content":
+        from pipeline.chunking.content_chunker import ContentDefinedChunker
+        return ContentDefinedChunker()
 
     elif CHUNKER_TYPE == "sentence":
         from pipeline.chunking.sentence_chunker import SentenceAwareChunker
@@ -17,30 +30,51 @@ def build_chunker():
     from pipeline.chunking.simple_chunker import SimpleTextChunker
     return SimpleTextChunker()
 
-def build_embedding_provider():
-    if EMBEDDING_MODEL.startswith("sentence-transformer:"):
+def build_embedding_provider(model_name: str = EMBEDDING_MODEL):
+    """
+    Construct a new provider, loading the model weights.
+    Use pipeline.embeddings.registry.model_registry to share one instance per process.
+    """
+    if model_name.startswith("sentence-transformer:"):
         from pipeline.embeddings.sentence_transformer import SentenceTransformerEmbeddingProvider
-        logger.info(f"Using SentenceTransformer embedding model: {EMBEDDING_MODEL}")
-        model = EMBEDDING_MODEL.split(":", 1)[1]
+        logger.info(f"Using SentenceTransformer embedding model: {model_name}")
+        model = model_name.split(":", 1)[1]
         return SentenceTransformerEmbeddingProvider(model)
-    elif EMBEDDING_MODEL == "nomic-ai/nomic-embed-text-v1":
+    elif model_name == "nomic-ai/nomic-embed-text-v1":
         from pipeline.embeddings.nomic import NomicEmbeddingProvider
-        logger.info(f"Using Nomic embedding model: {EMBEDDING_MODEL}")
+        logger.info(f"Using Nomic embedding model: {model_name}")
         return NomicEmbeddingProvider()
-    elif EMBEDDING_MODEL == "bge-m3":
+    elif model_name == "bge-m3":
         from pipeline.embeddings.bgem3 import BGEM3EmbeddingProvider
-        logger.info(f"Using BGEM3 embedding model: {EMBEDDING_MODEL}")
+        logger.info(f"Using BGEM3 embedding model: {model_name}")
         return BGEM3EmbeddingProvider()
 
-    raise ValueError(f"Unknown embedding model {EMBEDDING_MODEL}")
+    raise ValueError(f"Unknown embedding model {model_name}")
 
 def build_cross_encoding_provider(model_name: str):
     return CrossEncoderEmbeddingProvider(model_name)
 
+def build_local_index():
+    """
+    IVF settings for the local vector store, or None for exact search.
+    """
+    if LOCAL_VECTOR_INDEX == "flat":
+        return None
+    elif LOCAL_VECTOR_INDEX == "ivf":
+        from storage.vector_db.ivf import IVFParams
+        return IVFParams(nlist=LOCAL_IVF_NLIST, nprobe=LOCAL_IVF_NPROBE, oversampling=LOCAL_IVF_OVERSAMPLING)
+
+    raise ValueError(f"Unknown local vector index {LOCAL_VECTOR_INDEX}")
+
 def build_vector_store(client):
     if VECTOR_STORAGE == "in-memory":
         from storage.vector_db.in_memory import InMemoryVectorStore
-        return InMemoryVectorStore(client)
+        from pipeline.embeddings.registry import model_registry
+        return InMemoryVectorStore(model_registry.dimension())
+    elif VECTOR_STORAGE == "local":
+        from storage.vector_db.local_store import LocalVectorStore
+        from pipeline.embeddings.registry import model_registry
+        return LocalVectorStore(LOCAL_VECTOR_PATH, model_registry.dimension(), index=build_local_index())
     elif VECTOR_STORAGE == "qdrant":
         from storage.vector_db.qdrant_store import QdrantVectorStore
         return QdrantVectorStore(client)
@@ -0,0 +1,165 @@
+"""
+worker.py
+─────────
+Standalone indexing worker that drains the document parts queue outside of
+the API process.
+
+Each worker process repeatedly:
+  1. Lists the runs that are currently indexing.
+  2. Atomically claims a batch of queued parts with a lease
+     (LOSEME_QUEUE_LEASE_SECONDS), so no two workers process the same part.
+  3. Chunks, embeds and stores the batch, then removes the parts from the queue.
+  4. Finalizes runs whose discovery has stopped and whose queue is empty.
+  5. When there is nothing to claim, blocks until another process commits to
+     the metadata DB (checked every --poll-interval seconds) or
+     LOSEME_QUEUE_WAIT_SECONDS pass.
+
+Parts claimed by a worker that crashes are picked up again by other workers
+once their lease has expired. Parts that keep failing are dropped after
+LOSEME_QUEUE_MAX_ATTEMPTS claims.
+
+Set LOSEME_INPROCESS_INDEXING=false on the API server so only the standalone
+workers drain the queue.
+
+Usage
+─────
+  # One worker process:
+  python -m worker
+
+  # Four worker processes, each with its own embedding model:
+  python -m worker --processes 4
+
+  # Larger batches and a shorter lease:
+  python -m worker --batch-size 32 --lease-seconds 120
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+from collections import defaultdict
+
+from loseme_core.config import INGEST_PART_BATCH_SIZE, QUEUE_LEASE_SECONDS, QUEUE_WAIT_SECONDS
+
+logging.basicConfig(
+    level=logging.INFO,
+    stream=sys.stdout,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+)
+logger = logging.getLogger("worker")
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def run_worker(batch_size: int, lease_seconds: int, poll_interval: float) -> None:
+    """
+    Claim and process queued document parts until SIGINT or SIGTERM is received.
+    """
+    # Imported here so every spawned process loads its own models
+    from api.app.routes.runs import process_claimed_parts, cleanup_run
+    from api.app.queue_events import queue_notifier
+    from storage.metadata_db.document_parts_queue import (
+        claim_document_parts_from_queue,
+        count_document_parts_in_queue,
+        release_claimed_document_parts,
+    )
+    from storage.metadata_db.indexing_runs import list_runs_to_index, update_status
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    stopping = False
+
+    def _request_shutdown(signum, frame):
+        nonlocal stopping
+        logger.info(f"Worker {worker_id} received signal {signum}, finishing current batch.")
+        stopping = True
+        # Wake the loop if it is blocked waiting for new parts
+        queue_notifier.notify()
+
+    signal.signal(signal.SIGINT, _request_shutdown)
+    signal.signal(signal.SIGTERM, _request_shutdown)
+
+    logger.info(f"Worker {worker_id} started (batch size {batch_size}, lease {lease_seconds}s).")
+
+    while not stopping:
+        generation = queue_notifier.generation
+        runs = []
+        for run in list_runs_to_index():
+            if run["stop_requested"]:
+                update_status(run["id"], "interrupted")
+                logger.info(f"Indexing run {run['id']} interrupted by user request.")
+            else:
+                runs.append(run)
+
+        if not runs:
+            queue_notifier.wait(generation, timeout=QUEUE_WAIT_SECONDS, check_interval=poll_interval)
+            continue
+
+        force_reprocess = {run["id"]: run["force_reprocess"] for run in runs}
+        claimed_parts = claim_document_parts_from_queue(
+            worker_id,
+            list(force_reprocess),
+            limit=batch_size,
+            lease_seconds=lease_seconds,
+        )
+
+        if not claimed_parts:
+            for run in runs:
+                if not run["is_discovering"] and count_document_parts_in_queue(run["id"]) == 0:
+                    cleanup_run(run["id"])
+            queue_notifier.wait(generation, timeout=QUEUE_WAIT_SECONDS, check_interval=poll_interval)
+            continue
+
+        parts_by_run = defaultdict(list)
+        for part in claimed_parts:
+            parts_by_run[part["run_id"]].append(part)
+
+        for run_id, parts in parts_by_run.items():
+            process_claimed_parts(run_id, parts, worker_id, force_reprocess=force_reprocess[run_id])
+
+    released = release_claimed_document_parts(worker_id)
+    logger.info(f"Worker {worker_id} stopped, released {released} claimed document parts.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drain the LoSeMe indexing queue.")
+    parser.add_argument("--processes", type=int, default=1, help="Number of worker processes (default: 1)")
+    parser.add_argument("--batch-size", type=int, default=INGEST_PART_BATCH_SIZE, help="Document parts claimed per batch")
+    parser.add_argument("--lease-seconds", type=int, default=QUEUE_LEASE_SECONDS, help="How long a claim is held before other workers may take it over")
+    parser.add_argument("--poll-interval", type=float, default=0.25, help="How often an idle worker checks the metadata DB for changes, in seconds")
+    args = parser.parse_args()
+
+    from storage.metadata_db.db import init_db
+    # Run migrations once, before any worker touches the queue
+    init_db()
+
+    worker_args = (args.batch_size, args.lease_seconds, args.poll_interval)
+    if args.processes <= 1:
+        run_worker(*worker_args)
+        return
+
+    # spawn rather than fork so no CUDA or model state is shared between processes
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_worker, args=worker_args, name=f"loseme-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def _forward_shutdown(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, _forward_shutdown)
+    # Children receive SIGINT from the terminal themselves
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,16 @@ import pytest
 # ---------------------------------------------------------------------------
 
 
+@pytest.fixture(autouse=True, scope="session")
+def _isolated_embedding_cache(tmp_path_factory):
+    """
+    Keep the embedding cache used by the ingest tests out of /var/lib/loseme.
+    """
+    cache_path = tmp_path_factory.mktemp("embedding_cache") / "embeddings.db"
+    with patch("storage.embedding_cache.EMBEDDING_CACHE_PATH", str(cache_path)):
+        yield
+
+
 # ---------------------------------------------------------------------------
 # In-memory SQLite DB fixture
 # ---------------------------------------------------------------------------
@@ -58,7 +68,8 @@ def db_conn() -> Generator[sqlite3.Connection, None, None]:
             indexed_document_count INTEGER NOT NULL DEFAULT 0,
             stop_requested INTEGER NOT NULL DEFAULT 0,
             is_discovering INTEGER NOT NULL DEFAULT 1,
-            is_indexing INTEGER NOT NULL DEFAULT 0
+            is_indexing INTEGER NOT NULL DEFAULT 0,
+            force_reprocess INTEGER NOT NULL DEFAULT 0
         );
 
         CREATE TABLE IF NOT EXISTS document_parts (
@@ -100,9 +111,18 @@ def db_conn() -> Generator[sqlite3.Connection, None, None]:
             created_at TEXT NOT NULL,
             updated_at TEXT NOT NULL,
             text TEXT,
-            scope_json TEXT
+            scope_json TEXT,
+            claimed_by TEXT,
+            claimed_until TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0
         );
 
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_document_parts_queue_run_part
+            ON document_parts_queue (run_id, document_part_id);
+
+        CREATE INDEX IF NOT EXISTS idx_document_parts_queue_run_created
+            ON document_parts_queue (run_id, created_at, id);
+
         CREATE TABLE IF NOT EXISTS monitored_sources (
             id TEXT NOT NULL PRIMARY KEY,
             source_type TEXT NOT NULL,
@@ -115,6 +135,25 @@ def db_conn() -> Generator[sqlite3.Connection, None, None]:
             created_at TIMESTAMP NOT NULL,
             device_id TEXT
         );
+
+        CREATE TABLE IF NOT EXISTS vector_rebuilds (
+            id TEXT PRIMARY KEY,
+            alias TEXT NOT NULL,
+            source_collection TEXT,
+            target_collection TEXT NOT NULL,
+            status TEXT NOT NULL,
+            copied_points INTEGER NOT NULL DEFAULT 0,
+            started_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            finished_at TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS vector_rebuild_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            rebuild_id TEXT NOT NULL,
+            field TEXT NOT NULL,
+            value TEXT NOT NULL
+        );
     """)
     conn.commit()
     yield conn
@@ -114,6 +114,30 @@ class TestHealth:
     def test_root_returns_200(self, app_client):
         assert app_client.get("/").status_code == 200
 
+    def test_ready_reports_warmup(self, app_client):
+        from api.app.warmup import warmup
+        # TestClient without a context manager does not run the lifespan, so nothing preloaded yet
+        assert app_client.get("/health/ready").status_code == 503
+
+        warmup.run(inference=True)
+        try:
+            resp = app_client.get("/health/ready")
+            assert resp.status_code == 200
+            body = resp.json()
+            assert body["ready"] is True
+            assert set(body["timings"]) == {"vector_store", "embedding_model", "chunker", "warmup_inference"}
+        finally:
+            warmup.ready.clear()
+            warmup.timings.clear()
+
+    def test_ready_without_preload(self, app_client):
+        from api.app.warmup import warmup
+        warmup.skip()
+        try:
+            assert app_client.get("/health/ready").status_code == 200
+        finally:
+            warmup.ready.clear()
+
 
 # ===========================================================================
 # Runs
@@ -205,6 +229,23 @@ class TestRunEndpoints:
         assert resp.status_code == 200
         assert resp.json()["stop_requested"] is False
 
+    def test_run_events_report_stop_and_end(self, app_client):
+        run_id = _create_run(app_client)
+        app_client.post(f"/runs/request_stop/{run_id}")
+        resp = app_client.get(f"/runs/events/{run_id}")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        events = [json.loads(line[len("data:"):]) for line in resp.text.splitlines() if line.startswith("data:")]
+        assert events == [{
+            "run_id": run_id,
+            "status": "interrupted",
+            "stop_requested": True,
+            "is_discovering": True,
+        }]
+
+    def test_run_events_unknown_run_404(self, app_client):
+        assert app_client.get("/runs/events/does-not-exist").status_code == 404
+
 
 # ===========================================================================
 # Ingest
@@ -285,6 +326,24 @@ class TestSearchEndpoints:
         doc_ids = [r["document_part_id"] for r in resp.json()["results"]]
         assert payload["document_part_id"] in doc_ids
 
+    def test_search_filters_by_device(self, app_client):
+        run_id = _create_run(app_client)
+        unique_text = "tectonic plate subduction survey"
+        payload = _make_ingest_payload(
+            run_id, text=unique_text,
+            unit_locator="filesystem:/tmp/integration/geology.txt"
+        )
+        app_client.post("/ingest/document_part", json=payload)
+
+        resp = app_client.post("/search", json={"query": unique_text, "top_k": 10, "device_ids": ["other-device"]})
+        assert resp.status_code == 200
+        assert resp.json()["results"] == []
+        resp = app_client.post("/search", json={
+            "query": unique_text, "top_k": 10, "device_ids": ["test-device"],
+            "created_since": "2024-01-01T00:00:00", "created_before": "2024-01-02T00:00:00",
+        })
+        assert payload["document_part_id"] in [r["document_part_id"] for r in resp.json()["results"]]
+
     def test_search_result_has_required_fields(self, app_client):
         run_id = _create_run(app_client)
         payload = _make_ingest_payload(
@@ -397,6 +456,107 @@ class TestQueueEndpoints:
         resp = app_client.post("/queue/add", json=payload)
         assert resp.status_code == 200
 
+    def test_add_batch_to_queue_counts_new_parts_once(self, app_client):
+        run_id = _create_run(app_client)
+        sid = make_source_instance_id("filesystem", "dev1", Path("/tmp"))
+        parts = []
+        for i in range(3):
+            locator = f"filesystem:/tmp/batch_{i}.txt"
+            parts.append({
+                "document_part_id": make_logical_document_part_id(sid, locator),
+                "checksum": f"ck{i}",
+                "source_type": "filesystem",
+                "source_instance_id": sid,
+                "device_id": "dev1",
+                "source_path": f"/tmp/batch_{i}.txt",
+                "unit_locator": locator,
+                "content_type": "text/plain",
+                "extractor_name": "plaintext",
+                "extractor_version": "0.1",
+                "metadata_json": {},
+                "created_at": "2024-01-01T00:00:00",
+                "updated_at": "2024-01-01T00:00:00",
+                "text": f"batch queue test {i}",
+                "scope_json": {"type": "filesystem", "directories": ["/tmp"]},
+            })
+
+        first = app_client.post("/queue/add_batch", json={"run_id": run_id, "parts": parts[:2]})
+        second = app_client.post("/queue/add_batch", json={"run_id": run_id, "parts": parts})
+
+        assert first.json() == {"status": "success", "added": 2, "already_in_queue": 0}
+        assert second.json() == {"status": "success", "added": 1, "already_in_queue": 2}
+        assert app_client.get(f"/queue/show_all/{run_id}").json()["total_parts"] == 3
+        runs = {r["run_id"]: r for r in app_client.get("/runs/list").json()["runs"]}
+        assert runs[run_id]["discovered_document_count"] == 3
+
+
+class TestQueueBatcher:
+    """
+    Client-side buffering for /queue/add_batch, against a stand-in transport.
+    """
+
+    @pytest.fixture
+    def server(self):
+        import httpx
+        state = {"failures": 0, "batches": []}
+
+        def handle(request):
+            if state["failures"]:
+                state["failures"] -= 1
+                return httpx.Response(503)
+            parts = json.loads(request.content)["parts"]
+            state["batches"].append([p["document_part_id"] for p in parts])
+            return httpx.Response(200, json={"status": "success", "added": len(parts), "already_in_queue": 0})
+
+        client = httpx.Client(base_url="http://test", transport=httpx.MockTransport(handle))
+        with patch("ingest.queue_client.get_client", return_value=client):
+            yield state
+
+    def _part(self, i):
+        from loseme_core.document_models import DocumentPart
+        sid = make_source_instance_id("filesystem", "dev1", Path("/tmp"))
+        locator = f"filesystem:/tmp/buffered_{i}.txt"
+        return DocumentPart(
+            text=f"buffered {i}", document_part_id=make_logical_document_part_id(sid, locator), checksum=f"ck{i}",
+            source_type="filesystem", source_instance_id=sid, device_id="dev1", source_path=f"/tmp/buffered_{i}.txt",
+            unit_locator=locator, content_type="text/plain", extractor_name="plaintext", extractor_version="0.1",
+            scope_json={"type": "filesystem", "directories": ["/tmp"]},
+        )
+
+    def _batcher(self, **kwargs):
+        from ingest.queue_client import DocumentPartQueueBatcher
+        from loseme_core.filesystem_model import FilesystemIndexingScope
+        return DocumentPartQueueBatcher("run", FilesystemIndexingScope(directories=[Path("/tmp")]), retry_delay=0, **kwargs)
+
+    def test_failed_request_keeps_parts_buffered(self, server):
+        import httpx
+        batcher = self._batcher(max_parts=2, retries=2)
+        server["failures"] = 2
+        batcher.add(self._part(0))
+        with pytest.raises(httpx.HTTPStatusError):
+            batcher.add(self._part(1))
+        assert server["batches"] == []
+
+        server["failures"] = 1
+        batcher.close()
+        assert server["batches"] == [[self._part(0).document_part_id, self._part(1).document_part_id]]
+
+    def test_aged_parts_are_sent_without_another_add(self, server):
+        import time
+        with self._batcher(max_seconds=0.05) as batcher:
+            batcher.add(self._part(0))
+            deadline = time.monotonic() + 5
+            while not server["batches"] and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert server["batches"] == [[self._part(0).document_part_id]]
+
+    def test_buffered_parts_are_sent_when_the_loop_fails(self, server):
+        with pytest.raises(KeyError):
+            with self._batcher(max_seconds=60) as batcher:
+                batcher.add(self._part(0))
+                raise KeyError("extraction failed")
+        assert server["batches"] == [[self._part(0).document_part_id]]
+
 
 # ===========================================================================
 # Sources
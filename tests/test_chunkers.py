@@ -216,6 +216,122 @@ class TestSentenceAwareChunker:
         chunks, _ = chunker.chunk(_make_part(text=text))
         assert len(chunks) >= 5
 
+# ===========================================================================
+# ChunkBatch
+# ===========================================================================
+
+class TestChunkBatch:
+
+    def test_offsets_slice_the_part_text(self):
+        from pipeline.chunking.sentence_chunker import SentenceAwareChunker
+        part = _make_part(SAMPLE)
+        batch = SentenceAwareChunker(max_chars=200, overlap_sentences=0, min_chars=0).chunk_batch(part)
+        for i, text in enumerate(batch.texts()):
+            assert text == part.text[batch.starts[i]:batch.ends[i]]
+            assert batch.metadata_at(i)["char_len"] == len(text)
+
+    def test_to_chunks_matches_columns(self):
+        from pipeline.chunking.sentence_chunker import SentenceAwareChunker
+        batch = SentenceAwareChunker(max_chars=60, overlap_sentences=0, min_chars=0).chunk_batch(_make_part(SAMPLE))
+        chunks = batch.to_chunks()
+        assert [c.id for c in chunks] == batch.ids
+        assert [c.index for c in chunks] == list(range(len(batch)))
+        assert [c.metadata["sentence_count"] for c in chunks] == list(batch.columns["sentence_count"])
+
+    def test_chunk_ids_match_chunker_ids(self):
+        from pipeline.chunking.simple_chunker import SimpleTextChunker
+        chunker = SimpleTextChunker(chunk_size=50, overlap=10)
+        part = _make_part(SAMPLE)
+        assert chunker.chunk_batch(part).ids == [c.id for c in chunker.chunk(part)[0]]
+
+    def test_positional_ids_do_not_slice_the_text(self):
+        from types import SimpleNamespace
+        from pipeline.chunking.chunk_batch import ChunkBatch
+
+        class SliceCountingText(str):
+            slices = 0
+
+            def __getitem__(self, key):
+                SliceCountingText.slices += 1
+                return super().__getitem__(key)
+
+        part = _make_part(SAMPLE)
+        text = SliceCountingText(part.text)
+        batch = ChunkBatch(SimpleNamespace(document_part_id=part.document_part_id, checksum=part.checksum, text=text))
+        batch.append(0, 10)
+        batch.append(10, 20)
+        batch.rebase(origin=0, first_index=2)
+        assert SliceCountingText.slices == 0
+        assert len(set(batch.ids)) == 2
+
+    def test_split_spans_handles_crlf_paragraphs(self):
+        from pipeline.chunking.chunk_batch import PARAGRAPH_BREAK_RE, split_spans
+        text = "  first\r\n\r\nsecond \n\n\n third\n"
+        assert [text[s:e] for s, e in split_spans(text, PARAGRAPH_BREAK_RE)] == ["first", "second", "third"]
+
+    def test_sentence_overlap_with_long_sentences_terminates(self):
+        from pipeline.chunking.sentence_chunker import SentenceAwareChunker
+        text = "A" * 50 + ". " + "B" * 50 + ". " + "C" * 50 + "."
+        chunker = SentenceAwareChunker(max_chars=60, overlap_sentences=1, min_chars=0)
+        _, texts = chunker.chunk(_make_part(text))
+        assert texts == ["A" * 50 + ".", "B" * 50 + ".", "C" * 50 + "."]
+
+    def test_rebase_places_tail_chunks_after_stored_ones(self):
+        from pipeline.chunking.chunk_batch import ChunkBatch
+        from pipeline.chunking.content_chunker import ContentDefinedChunker
+        batch = ContentDefinedChunker(min_chars=10, max_chars=40).chunk_batch(_make_part("Same line here. Same line here."))
+        stored = batch.ids[:1]
+        batch.rebase(origin=500, first_index=3, taken=set(stored))
+        assert list(batch.indices) == [3, 4][:len(batch)]
+        assert not set(batch.ids) & set(stored)
+        assert len(set(batch.ids)) == len(batch)
+        assert batch.metadata_at(0)["start"] == 500 + batch.starts[0]
+
+
+# ===========================================================================
+# ContentDefinedChunker
+# ===========================================================================
+
+_REPORT = "\n\n".join(
+    " ".join(f"Paragraph {p} sentence {s} talks about topic {p * 7 + s}." for s in range(6))
+    for p in range(30)
+)
+
+
+class TestContentDefinedChunker:
+
+    @pytest.fixture
+    def chunker(self):
+        from pipeline.chunking.content_chunker import ContentDefinedChunker
+        return ContentDefinedChunker(min_chars=150, max_chars=600, anchor_every=3)
+
+    def test_chunks_cover_all_sentences_in_order(self, chunker):
+        _, texts = chunker.chunk(_make_part(_REPORT))
+        assert " ".join(" ".join(texts).split()) == " ".join(_REPORT.split())
+
+    def test_no_chunk_exceeds_max_chars(self, chunker):
+        _, texts = chunker.chunk(_make_part(_REPORT + "\n\n" + "x" * 2000))
+        assert max(len(t) for t in texts) <= 600
+
+    def test_edit_changes_only_nearby_chunk_ids(self, chunker):
+        edited = _REPORT.replace("Paragraph 15 sentence 2 talks", "Paragraph 15 sentence 2 now discusses")
+        before = chunker.chunk_batch(_make_part(_REPORT)).ids
+        after = chunker.chunk_batch(_make_part(edited)).ids
+        changed = set(after) - set(before)
+        assert 1 <= len(changed) <= 2
+        assert len(set(before) - set(after)) == len(changed)
+
+    def test_repeated_text_gets_distinct_ids(self, chunker):
+        text = "\n\n".join(["Same boilerplate footer line that repeats. " * 5] * 3)
+        ids = chunker.chunk_batch(_make_part(text)).ids
+        assert len(ids) == len(set(ids))
+
+    def test_ids_do_not_depend_on_document_checksum(self, chunker):
+        part = _make_part(_REPORT)
+        other = part.model_copy(update={"checksum": "different"})
+        assert chunker.chunk_batch(part).ids == chunker.chunk_batch(other).ids
+
+
 # ===========================================================================
 # SemanticChunker (via DummyEmbeddingProvider — no GPU)
 # ===========================================================================
@@ -261,3 +377,135 @@ class TestSemanticChunkerWithDummy:
         chunks, texts = chunker.chunk(_make_part(SAMPLE))
         for c, t in zip(chunks, texts):
             assert c.text == t
+
+    def test_units_embedded_in_one_batch(self):
+        from unittest.mock import patch
+        from pipeline.chunking.semantic_chunker import SemanticChunker
+        from pipeline.embeddings.dummy import DummyEmbeddingProvider
+
+        embedder = DummyEmbeddingProvider(dimension=32)
+        chunker = SemanticChunker(embedder=embedder)
+        with patch.object(embedder, "embed_documents", wraps=embedder.embed_documents) as batch, \
+             patch.object(embedder, "embed_query") as single:
+            chunker.chunk(_make_part(SAMPLE))
+        assert batch.call_count == 1
+        single.assert_not_called()
+
+    def test_single_unit_chunks_reuse_unit_embedding(self, chunker):
+        batch = chunker.chunk_batch(_make_part(SAMPLE))
+        assert len(batch.embeddings) == len(batch)
+        for text, embedding in zip(batch.texts(), batch.embeddings):
+            if "\n\n" not in text:
+                assert embedding.dense == chunker.embedder.embed_document(text).dense
+
+    def test_merged_chunks_get_pooled_unit_embedding(self):
+        import numpy as np
+        from pipeline.chunking.semantic_chunker import SemanticChunker
+        from pipeline.embeddings.dummy import DummyEmbeddingProvider
+
+        embedder = DummyEmbeddingProvider(dimension=32)
+        chunker = SemanticChunker(embedder=embedder, similarity_threshold=-1.0, max_chars=10_000)
+        batch = chunker.chunk_batch(_make_part("alpha\n\nbeta\n\ngamma"))
+        embeddings = batch.embeddings
+
+        assert batch.texts() == ["alpha\n\nbeta\n\ngamma"]
+        units = np.array([embedder.embed_document(u).dense for u in ("alpha", "beta", "gamma")])
+        units /= np.linalg.norm(units, axis=1, keepdims=True)
+        expected = units.mean(axis=0)
+        expected /= np.linalg.norm(expected)
+        assert embeddings[0].dense == pytest.approx(expected.tolist(), abs=1e-5)
+
+    def test_pooling_can_be_disabled(self):
+        from pipeline.chunking.semantic_chunker import SemanticChunker
+        from pipeline.embeddings.dummy import DummyEmbeddingProvider
+
+        chunker = SemanticChunker(
+            embedder=DummyEmbeddingProvider(dimension=32),
+            similarity_threshold=-1.0,
+            pool_merged_chunks=False,
+        )
+        assert chunker.chunk_batch(_make_part("alpha\n\nbeta")).embeddings == [None]
+
+
+# ===========================================================================
+# TokenBudgetChunker (whitespace "tokenizer" — no model)
+# ===========================================================================
+
+class _WhitespaceTokenizerProvider:
+    """Counts one token per whitespace-separated word plus [CLS]/[SEP]."""
+
+    def __init__(self, window: int = 32):
+        self.window = window
+        self.count_calls = 0
+
+    def max_sequence_length(self):
+        return self.window
+
+    def count_tokens(self, texts):
+        self.count_calls += 1
+        return [len(t.split()) + 2 for t in texts]
+
+
+class TestTokenBudgetChunker:
+
+    @pytest.fixture(autouse=True)
+    def _fresh_calibration(self):
+        from pipeline.chunking.token_counter import clear_token_counters
+        clear_token_counters()
+        yield
+        clear_token_counters()
+
+    def _chunker(self, provider, **kwargs):
+        from pipeline.chunking.token_chunker import TokenBudgetChunker
+        return TokenBudgetChunker(embedder=provider, model_name="whitespace", **kwargs)
+
+    def test_no_chunk_exceeds_window(self):
+        provider = _WhitespaceTokenizerProvider(window=32)
+        _, texts = self._chunker(provider).chunk(_make_part(SAMPLE * 20))
+        assert texts
+        assert max(provider.count_tokens(texts)) <= 32
+
+    def test_chunks_fill_the_window(self):
+        provider = _WhitespaceTokenizerProvider(window=32)
+        # 10 words per sentence: three sentences fit into 30 + 2 tokens
+        sentence = "one two three four five six seven eight nine ten."
+        _, texts = self._chunker(provider).chunk(_make_part(" ".join([sentence] * 12)))
+        assert provider.count_tokens(texts) == [32, 32, 32, 32]
+
+    def test_never_cuts_sentences_that_fit(self):
+        provider = _WhitespaceTokenizerProvider(window=64)
+        _, texts = self._chunker(provider).chunk(_make_part(SAMPLE))
+        for t in texts:
+            assert t.endswith((".", "!"))
+
+    def test_overlong_sentence_is_split_between_words(self):
+        provider = _WhitespaceTokenizerProvider(window=12)
+        words = [f"w{i}" for i in range(50)]
+        _, texts = self._chunker(provider).chunk(_make_part(" ".join(words)))
+        assert max(provider.count_tokens(texts)) <= 12
+        assert " ".join(texts).split() == words
+
+    def test_max_tokens_caps_below_window(self):
+        provider = _WhitespaceTokenizerProvider(window=512)
+        chunker = self._chunker(provider, max_tokens=20)
+        assert chunker.max_tokens == 20
+        _, texts = chunker.chunk(_make_part(SAMPLE * 5))
+        assert max(provider.count_tokens(texts)) <= 20
+
+    def test_calibration_is_cached_per_model(self):
+        from pipeline.chunking.token_counter import get_token_counter
+        provider = _WhitespaceTokenizerProvider()
+        first = get_token_counter("m", provider, ["a b c", "d e"])
+        calls = provider.count_calls
+        assert get_token_counter("m", provider, ["other text"]) is first
+        assert provider.count_calls == calls
+        assert first.special_tokens == 2
+        assert first.tokens_per_piece == pytest.approx(1.0)
+
+    def test_provider_without_tokenizer_uses_defaults(self):
+        from pipeline.embeddings.dummy import DummyEmbeddingProvider
+        from pipeline.chunking.token_chunker import DEFAULT_MAX_TOKENS
+        chunker = self._chunker(DummyEmbeddingProvider(dimension=8))
+        assert chunker.max_tokens == DEFAULT_MAX_TOKENS
+        chunks, texts = chunker.chunk(_make_part(SAMPLE))
+        assert len(chunks) == 1 and texts[0] == SAMPLE
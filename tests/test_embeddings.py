@@ -85,6 +85,34 @@ class TestDummyEmbeddingProvider:
         # Both should be EmbeddingOutput with correct dimension
         assert len(q.dense) == len(d.dense) == 128
 
+    # --- embed_documents ---
+
+    def test_embed_documents_preserves_length_and_order(self, provider):
+        texts = ["first", "second", "third"]
+        results = provider.embed_documents(texts)
+        assert len(results) == len(texts)
+        for text, result in zip(texts, results):
+            assert result.dense == provider.embed_document(text).dense
+
+    def test_embed_documents_empty_list(self, provider):
+        assert provider.embed_documents([]) == []
+
+    def test_base_class_fallback_loops_over_embed_document(self):
+        from loseme_core.domain import EmbeddingProvider
+
+        class LoopOnlyProvider(EmbeddingProvider):
+            def dimension(self):
+                return 1
+
+            def embed_query(self, text):
+                return EmbeddingOutput(dense=[float(len(text))])
+
+            def embed_document(self, text):
+                return EmbeddingOutput(dense=[float(len(text))])
+
+        results = LoopOnlyProvider().embed_documents(["a", "bbb"])
+        assert [r.dense for r in results] == [[1.0], [3.0]]
+
 
 # ===========================================================================
 # EmbeddingOutput model
@@ -117,6 +145,192 @@ class TestEmbeddingOutput:
         assert eo.dense == []
 
 
+# ===========================================================================
+# EmbeddingCache
+# ===========================================================================
+
+class _CountingProvider(DummyEmbeddingProvider):
+    def __init__(self, dimension: int = 16):
+        super().__init__(dimension=dimension)
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+class TestEmbeddingCache:
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        from storage.embedding_cache import EmbeddingCache
+        return EmbeddingCache(tmp_path / "cache.db", max_bytes=10 * 1024 * 1024)
+
+    def test_round_trip_all_vector_kinds(self, cache):
+        from storage.embedding_cache import cache_key
+        key = cache_key("m", "text")
+        original = EmbeddingOutput(
+            dense=[0.1, -0.5, 0.25],
+            sparse={3: 0.5, 17: 0.125},
+            colbert_vec=[[0.5, 0.25], [-0.75, 1.0]],
+        )
+        cache.put_many({key: original})
+        restored = cache.get_many([key])[key]
+        assert restored.dense == pytest.approx(original.dense, abs=1e-3)
+        assert restored.sparse == pytest.approx(original.sparse, abs=1e-3)
+        assert restored.colbert_vec == original.colbert_vec
+
+    def test_key_ignores_whitespace_but_not_model(self):
+        from storage.embedding_cache import cache_key
+        assert cache_key("m", "hello   world\n") == cache_key("m", " hello world")
+        assert cache_key("m", "hello world") != cache_key("other", "hello world")
+
+    def test_only_misses_reach_provider(self, cache):
+        from storage.embedding_cache import embed_texts_cached
+        provider = _CountingProvider()
+        embed_texts_cached(provider, "m", ["a", "b"], batch_size=8, cache=cache)
+        results = embed_texts_cached(provider, "m", ["a", "c", "c", "b"], batch_size=8, cache=cache)
+
+        assert provider.embedded == ["a", "b", "c"]
+        assert len(results) == 4
+        assert results[1].dense == results[2].dense
+        assert results[0].dense == pytest.approx(provider.embed_document("a").dense, abs=1e-3)
+
+    def test_hit_rate_stats(self, cache):
+        from storage.embedding_cache import embed_texts_cached
+        provider = _CountingProvider()
+        embed_texts_cached(provider, "m", ["a", "b"], batch_size=8, cache=cache)
+        embed_texts_cached(provider, "m", ["a", "b"], batch_size=8, cache=cache)
+        stats = cache.stats()
+        assert stats["entries"] == 2
+        assert stats["hits"] == 2 and stats["misses"] == 2
+        assert stats["hit_rate"] == 0.5
+
+    def test_lru_eviction_keeps_recently_used(self, tmp_path):
+        from storage.embedding_cache import EmbeddingCache, cache_key
+        entry = EmbeddingOutput(dense=[0.0] * 64)  # 128 bytes of float16 plus a 32 byte key
+        cache = EmbeddingCache(tmp_path / "lru.db", max_bytes=3 * 160)
+        keys = [cache_key("m", str(i)) for i in range(3)]
+        for key in keys:
+            cache.put_many({key: entry})
+        cache.get_many([keys[0]])  # key 1 is now the least recently used
+
+        cache.put_many({cache_key("m", "new"): entry})
+
+        assert cache.stats()["size_bytes"] <= 3 * 160
+        remaining = cache.get_many(keys)
+        assert keys[0] in remaining and keys[1] not in remaining
+
+    def test_persists_across_instances(self, tmp_path):
+        from storage.embedding_cache import EmbeddingCache, cache_key
+        key = cache_key("m", "persist")
+        EmbeddingCache(tmp_path / "p.db", max_bytes=1024 * 1024).put_many({key: EmbeddingOutput(dense=[1.0])})
+        reopened = EmbeddingCache(tmp_path / "p.db", max_bytes=1024 * 1024)
+        assert reopened.get_many([key])[key].dense == [1.0]
+        assert reopened.stats()["size_bytes"] > 0
+
+
+# ===========================================================================
+# ModelRegistry
+# ===========================================================================
+
+class TestModelRegistry:
+
+    @pytest.fixture
+    def registry(self):
+        from pipeline.embeddings.registry import ModelRegistry
+        return ModelRegistry()
+
+    def test_concurrent_first_use_loads_once(self, registry):
+        import threading
+        import time
+        from unittest.mock import patch
+
+        built = []
+
+        def _build(model_name):
+            time.sleep(0.05)  # widen the race window
+            built.append(model_name)
+            return DummyEmbeddingProvider(dimension=32)
+
+        providers = []
+        with patch("wiring.build_embedding_provider", side_effect=_build):
+            threads = [
+                threading.Thread(target=lambda: providers.append(registry.get_embedding_provider("m")))
+                for _ in range(8)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert built == ["m"]
+        assert len(providers) == 8
+        assert all(p is providers[0] for p in providers)
+
+    def test_known_dimension_does_not_load_model(self, registry):
+        from unittest.mock import patch
+        with patch("wiring.build_embedding_provider") as build:
+            assert registry.dimension("bge-m3") == 1024
+        build.assert_not_called()
+        assert not registry.is_loaded("bge-m3")
+
+    def test_unknown_dimension_loads_model(self, registry):
+        from unittest.mock import patch
+        with patch("wiring.build_embedding_provider", return_value=DummyEmbeddingProvider(dimension=48)):
+            assert registry.dimension("custom") == 48
+        assert registry.is_loaded("custom")
+
+    def test_register_and_clear(self, registry):
+        provider = DummyEmbeddingProvider(dimension=8)
+        registry.register("dummy", provider)
+        assert registry.get_embedding_provider("dummy") is provider
+        assert registry.dimension("dummy") == 8
+
+        registry.clear()
+        assert not registry.is_loaded("dummy")
+
+
+# ===========================================================================
+# Lazily built store and chunker
+# ===========================================================================
+
+class TestLazySingletons:
+
+    def test_concurrent_first_use_builds_store_and_chunker_once(self):
+        import threading
+        import time
+        from unittest.mock import patch
+        from api.app.routes import ingest
+        from storage.vector_db import runtime
+
+        built = []
+
+        def _builder(kind):
+            def build(*args):
+                time.sleep(0.05)  # widen the race window
+                built.append(kind)
+                return object()
+            return build
+
+        results = []
+        with patch.object(runtime, "_vector_store", None), \
+             patch.object(ingest, "_chunker", None), \
+             patch.object(runtime, "build_vector_store", side_effect=_builder("store")), \
+             patch.object(ingest, "build_chunker", side_effect=_builder("chunker")):
+            threads = [
+                threading.Thread(target=lambda: results.append((runtime.get_vector_store(), ingest.get_chunker())))
+                for _ in range(8)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert sorted(built) == ["chunker", "store"]
+        assert len(set(results)) == 1
+
+
 # ===========================================================================
 # Round-trip: embed → store → search (integration without real models)
 # ===========================================================================
@@ -86,6 +86,29 @@ class TestPlainTextExtractor:
         result = extractor.extract(f)
         assert not result.is_multipart
 
+    def test_can_extract_log(self, extractor, tmp_path):
+        f = tmp_path / "service.log"
+        f.write_text("started")
+        assert extractor.can_extract(f)
+
+    def test_extract_range_reads_from_byte_offset(self, extractor, tmp_path):
+        f = tmp_path / "grow.log"
+        f.write_bytes("café\r\nline two\n".encode("utf-8"))
+        result = extractor.extract_range(f, len("café\r\n".encode("utf-8")))
+        assert result.text() == "line two\n"
+        assert result.metadata[0]["byte_end"] == f.stat().st_size
+        assert result.unit_locators == extractor.extract(f).unit_locators
+
+    def test_extract_range_keeps_line_endings(self, extractor, tmp_path):
+        f = tmp_path / "crlf.txt"
+        f.write_bytes(b"a\r\nb")
+        assert extractor.extract_range(f).text() == "a\r\nb"
+
+    def test_extract_range_rejects_split_character(self, extractor, tmp_path):
+        f = tmp_path / "split.txt"
+        f.write_bytes("é".encode("utf-8"))
+        assert extractor.extract_range(f, 1) is None
+
 
 # ===========================================================================
 # HTMLExtractor
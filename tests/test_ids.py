@@ -11,7 +11,9 @@ import pytest
 
 from loseme_core.ids import (
     make_chunk_id,
+    make_content_chunk_id,
     make_logical_document_part_id,
+    make_scope_id,
     make_source_instance_id,
     make_thunderbird_source_id,
 )
@@ -142,6 +144,29 @@ class TestChunkId:
         assert all(c in "0123456789abcdef" for c in cid)
 
 
+class TestContentChunkId:
+
+    def _doc_id(self):
+        sid = make_source_instance_id("filesystem", "dev1", Path("/docs"))
+        return make_logical_document_part_id(sid, "filesystem:/docs/f.txt")
+
+    def test_deterministic(self):
+        doc_id = self._doc_id()
+        assert make_content_chunk_id(doc_id, "some text") == make_content_chunk_id(doc_id, "some text")
+
+    def test_differs_by_text(self):
+        doc_id = self._doc_id()
+        assert make_content_chunk_id(doc_id, "v1") != make_content_chunk_id(doc_id, "v2")
+
+    def test_differs_by_occurrence(self):
+        doc_id = self._doc_id()
+        assert make_content_chunk_id(doc_id, "same", 0) != make_content_chunk_id(doc_id, "same", 1)
+
+    def test_never_equals_positional_id(self):
+        doc_id = self._doc_id()
+        assert make_content_chunk_id(doc_id, "ck", 0) != make_chunk_id(doc_id, "ck", 0)
+
+
 # ===========================================================================
 # make_thunderbird_source_id
 # ===========================================================================
@@ -167,3 +192,20 @@ class TestThunderbirdSourceId:
         a = make_thunderbird_source_id("dev1", "/mail/Inbox", "<msg@host>")
         b = make_thunderbird_source_id("dev2", "/mail/Inbox", "<msg@host>")
         assert a != b
+
+
+# ===========================================================================
+# make_scope_id
+# ===========================================================================
+
+class TestScopeId:
+
+    def test_ignores_key_order(self):
+        a = make_scope_id({"type": "filesystem", "directories": ["/docs"]})
+        b = make_scope_id({"directories": ["/docs"], "type": "filesystem"})
+        assert a == b
+
+    def test_differs_by_scope(self):
+        a = make_scope_id({"type": "filesystem", "directories": ["/docs"]})
+        b = make_scope_id({"type": "filesystem", "directories": ["/other"]})
+        assert a != b
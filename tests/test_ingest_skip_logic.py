@@ -184,6 +184,90 @@ class TestReprocessOnChange:
         assert resp.json().get("skipped") is not True
         assert resp.json().get("accepted") is True
 
+    def test_reprocess_removes_old_chunks_without_chunk_ids(self, app_client):
+        from api.app.routes import ingest
+        from storage.metadata_db.db import execute
+        loc = _new_locator("lost_ids")
+        first = _payload(_new_run(app_client), "original text", loc)
+        app_client.post("/ingest/document_part", json=first)
+        # Bookkeeping lost: removal must not depend on it
+        execute("UPDATE document_parts SET chunk_ids = NULL WHERE document_part_id = ?", (first["document_part_id"],))
+
+        app_client.post("/ingest/document_part", json=_payload(_new_run(app_client), "modified text", loc))
+        texts = [c.text for c in ingest.get_vector_store().chunks() if c.document_part_id == first["document_part_id"]]
+        assert texts == ["modified text"]
+
+    def test_unchanged_part_without_chunk_ids_is_reprocessed(self, app_client):
+        from storage.metadata_db.db import execute
+        loc = _new_locator("no_ids")
+        first = _payload(_new_run(app_client), "same text", loc)
+        app_client.post("/ingest/document_part", json=first)
+        execute("UPDATE document_parts SET chunk_ids = NULL WHERE document_part_id = ?", (first["document_part_id"],))
+
+        resp = app_client.post("/ingest/document_part", json=_payload(_new_run(app_client), "same text", loc))
+        assert resp.json().get("skipped") is False
+
+    def test_failed_store_write_is_retried_on_reclaim(self, app_client):
+        from api.app.routes import ingest
+        from api.app.routes.runs import process_claimed_parts
+        from loseme_core.models import DocumentPart
+        from storage.metadata_db.document_parts_queue import add_document_part_to_queue, claim_document_parts_from_queue
+        store = ingest.get_vector_store()
+        loc = _new_locator("retry")
+        first = _payload(_new_run(app_client), "original text", loc)
+        app_client.post("/ingest/document_part", json=first)
+
+        run = _new_run(app_client)
+        changed = {k: v for k, v in _payload(run, "modified text", loc).items() if k != "run_id"}
+        add_document_part_to_queue(DocumentPart(**changed).model_dump(), run)
+        # An expired lease, as if the worker had crashed, so the part can be claimed again at once
+        claimed = claim_document_parts_from_queue("w1", [run], limit=1, lease_seconds=-1)
+        with patch.object(store, "add_batch", side_effect=RuntimeError("store unavailable")):
+            assert process_claimed_parts(run, claimed, "w1") == 0
+
+        texts = lambda: [c.text for c in store.chunks() if c.document_part_id == first["document_part_id"]]
+        # The old vectors outlive the failed write
+        assert texts() == ["original text"]
+
+        reclaimed = claim_document_parts_from_queue("w2", [run], limit=1, lease_seconds=60)
+        assert process_claimed_parts(run, reclaimed, "w2") == 1
+        assert texts() == ["modified text"]
+
+    def test_failing_part_does_not_hold_back_its_batch(self, app_client):
+        from api.app.routes import ingest
+        from api.app.routes.runs import process_claimed_parts
+        from loseme_core.models import DocumentPart
+        from storage.metadata_db.document_parts_queue import (
+            add_document_part_to_queue, claim_document_parts_from_queue, count_document_parts_in_queue,
+        )
+        known = _new_locator("isolate_known")
+        app_client.post("/ingest/document_part", json=_payload(_new_run(app_client), "already indexed", known))
+
+        run = _new_run(app_client)
+        payloads = [
+            _payload(run, "already indexed", known),
+            _payload(run, "healthy part", _new_locator("isolate_new")),
+            _payload(run, "broken part", _new_locator("isolate_bad")),
+        ]
+        for payload in payloads:
+            add_document_part_to_queue(DocumentPart(**{k: v for k, v in payload.items() if k != "run_id"}).model_dump(), run)
+        bad_id = payloads[2]["document_part_id"]
+
+        prepare = ingest._prepare_document_part
+        def failing_prepare(req, *args, **kwargs):
+            if req.document_part_id == bad_id:
+                raise ValueError("cannot chunk")
+            return prepare(req, *args, **kwargs)
+
+        claimed = claim_document_parts_from_queue("w1", [run], limit=3, lease_seconds=60)
+        with patch.object(ingest, "_prepare_document_part", side_effect=failing_prepare):
+            assert process_claimed_parts(run, claimed, "w1") == 2
+
+        # Only the broken part stays queued, and the failed first attempt counted nothing
+        assert count_document_parts_in_queue(run) == 1
+        runs = {x["run_id"]: x for x in app_client.get("/runs/list").json()["runs"]}
+        assert runs[run]["indexed_document_count"] == 2
+
 
 # ===========================================================================
 # Ingest increments counters
@@ -203,3 +287,212 @@ class TestIngestCounters:
         runs_after = {x["run_id"]: x for x in app_client.get("/runs/list").json()["runs"]}
         after = runs_after.get(r, {}).get("indexed_document_count", 0)
         assert after > before
+
+
+# ===========================================================================
+# Batched ingestion of several parts
+# ===========================================================================
+
+class TestBatchedIngest:
+
+    def test_batch_mixes_skipped_and_new_parts(self, app_client):
+        from api.app.routes.ingest import ingest_document_parts, IngestDocumentPartRequest
+
+        known = _new_locator("batch_known")
+        r1 = _new_run(app_client)
+        app_client.post("/ingest/document_part", json=_payload(r1, "already indexed", known))
+
+        r2 = _new_run(app_client)
+        reqs = [
+            IngestDocumentPartRequest(**_payload(r2, "already indexed", known)),
+            IngestDocumentPartRequest(**_payload(r2, "brand new part", _new_locator("batch_new"))),
+            IngestDocumentPartRequest(**_payload(r2, "another new part", _new_locator("batch_new"))),
+        ]
+        responses = ingest_document_parts(reqs)
+
+        assert [r.get("skipped") for r in responses] == [True, False, False]
+        assert all(r.get("accepted") is True for r in responses)
+
+        runs = {x["run_id"]: x for x in app_client.get("/runs/list").json()["runs"]}
+        assert runs[r2]["indexed_document_count"] == 3
+
+    def test_precomputed_embeddings_are_not_embedded_again(self, app_client):
+        from unittest.mock import patch
+        from api.app.routes.ingest import embed_chunk_batches
+        from pipeline.chunking.simple_chunker import SimpleTextChunker
+        from loseme_core.domain import EmbeddingOutput
+        from loseme_core.models import DocumentPart
+
+        part = DocumentPart(**{k: v for k, v in _payload("unused", "0123456789", _new_locator("pre")).items() if k != "run_id"})
+        batch = SimpleTextChunker(chunk_size=4, overlap=0).chunk_batch(part)
+        reused = EmbeddingOutput(dense=[1.0, 0.0])
+        batch.embeddings = [None, reused, None]
+        with patch("api.app.routes.ingest.embed_texts_cached", return_value=[EmbeddingOutput(dense=[0.0, 1.0])] * 2) as embed:
+            embeddings = embed_chunk_batches([batch])
+
+        assert embed.call_args.args[2] == ["0123", "89"]
+        assert embeddings[1] is reused
+        assert len(embeddings) == 3
+
+
+# ===========================================================================
+# Delta re-embedding with content-defined chunk IDs
+# ===========================================================================
+
+class TestContentDefinedReingest:
+
+    _TEXT = "\n\n".join(
+        " ".join(f"Section {p} line {s} describes item {p * 10 + s}." for s in range(5))
+        for p in range(12)
+    )
+
+    def _ingest(self, app_client, text, locator, force_reprocess=False):
+        from unittest.mock import patch
+        from api.app.routes import ingest
+        from pipeline.chunking.content_chunker import ContentDefinedChunker
+
+        embedded = []
+        real = ingest.embed_texts_cached
+
+        def _record(provider, model_name, texts, **kwargs):
+            embedded.extend(texts)
+            return real(provider, model_name, texts, **kwargs)
+
+        chunker = ContentDefinedChunker(min_chars=120, max_chars=500, anchor_every=3)
+        with patch.object(ingest, "get_chunker", return_value=chunker), \
+             patch.object(ingest, "embed_texts_cached", side_effect=_record):
+            resp = app_client.post(
+                f"/ingest/document_part?force_reprocess={str(force_reprocess).lower()}",
+                json=_payload(_new_run(app_client), text, locator, chunker_name="content"),
+            )
+        assert resp.status_code == 200, resp.text
+        return embedded
+
+    def _stored_ids(self, locator):
+        from api.app.routes import ingest
+        from storage.metadata_db.document_parts import get_document_part_by_id
+        part_id = _payload("unused", "", locator)["document_part_id"]
+        chunk_ids = json.loads(get_document_part_by_id(part_id)["chunk_ids"])
+        in_store = {c.id for c in ingest.get_vector_store().chunks() if c.document_part_id == part_id}
+        return chunk_ids, in_store
+
+    def test_edit_embeds_only_changed_chunks(self, app_client):
+        loc = _new_locator("content")
+        first = self._ingest(app_client, self._TEXT, loc)
+        ids_before, _ = self._stored_ids(loc)
+
+        edited = self._TEXT.replace("Section 6 line 2 describes", "Section 6 line 2 now explains")
+        second = self._ingest(app_client, edited, loc)
+        ids_after, in_store = self._stored_ids(loc)
+
+        assert 1 <= len(second) <= 2 < len(first)
+        assert all("now explains" in t or "Section 6" in t or "Section 7" in t for t in second)
+        assert in_store == set(ids_after)
+        assert len(set(ids_before) - set(ids_after)) == len(second)
+
+    def test_force_reprocess_embeds_everything(self, app_client):
+        loc = _new_locator("content_force")
+        first = self._ingest(app_client, self._TEXT, loc)
+        again = self._ingest(app_client, self._TEXT, loc, force_reprocess=True)
+        _, in_store = self._stored_ids(loc)
+        assert len(again) == len(first)
+        assert len(in_store) == len(first)
+
+
+# ===========================================================================
+# Append-only tail ingestion
+# ===========================================================================
+
+class TestAppendedTailIngest:
+
+    _LINES = [f"Entry {i}: service heartbeat number {i} was received in time." for i in range(60)]
+
+    def _ingest(self, app_client, payload):
+        from unittest.mock import patch
+        from api.app.routes import ingest
+
+        embedded = []
+        real = ingest.embed_texts_cached
+
+        def _record(provider, model_name, texts, **kwargs):
+            embedded.extend(texts)
+            return real(provider, model_name, texts, **kwargs)
+
+        with patch.object(ingest, "embed_texts_cached", side_effect=_record):
+            resp = app_client.post("/ingest/document_part", json=payload)
+        assert resp.status_code == 200, resp.text
+        return embedded
+
+    def _stored(self, locator):
+        from api.app.routes import ingest
+        from storage.metadata_db.document_parts import get_document_part_by_id
+        part_id = _payload("unused", "", locator)["document_part_id"]
+        record = get_document_part_by_id(part_id)
+        chunks = {c.id: c for c in ingest.get_vector_store().chunks() if c.document_part_id == part_id}
+        return record, chunks
+
+    def _full(self, app_client, text, locator):
+        payload = _payload(_new_run(app_client), text, locator)
+        payload["metadata_json"] = {"tail": {"byte_offset": len(text.encode("utf-8")), "prefix_checksum": "p1"}}
+        return payload, self._ingest(app_client, payload)
+
+    def _append(self, app_client, text, locator, base_checksum, overlap_offset):
+        payload = _payload(_new_run(app_client), text.encode("utf-8")[overlap_offset:].decode("utf-8"), locator)
+        payload["checksum"] = hashlib.sha256(text.encode()).hexdigest()
+        payload["metadata_json"] = {"tail": {
+            "byte_offset": len(text.encode("utf-8")),
+            "prefix_checksum": "p2",
+            "append_from": {"checksum": base_checksum, "overlap_offset": overlap_offset},
+        }}
+        return self._ingest(app_client, payload)
+
+    def test_full_ingest_records_overlap(self, app_client):
+        loc = _new_locator("tail_full")
+        text = "\n".join(self._LINES[:30]) + "\n"
+        self._full(app_client, text, loc)
+        record, chunks = self._stored(loc)
+        tail = json.loads(record["metadata_json"])["tail"]
+        last = chunks[tail["overlap_chunk_ids"][0]]
+        assert json.loads(record["chunk_ids"])[-1] == last.id
+        assert tail["overlap_char_offset"] == last.metadata["start"]
+        assert tail["overlap_offset"] == len(text[:last.metadata["start"]].encode("utf-8"))
+
+    def test_append_embeds_only_the_tail(self, app_client):
+        loc = _new_locator("tail_append")
+        text = "Prefix naïve café.\n" + "\n".join(self._LINES[:30]) + "\n"
+        payload, first = self._full(app_client, text, loc)
+        record, _ = self._stored(loc)
+        tail = json.loads(record["metadata_json"])["tail"]
+        ids_before = json.loads(record["chunk_ids"])
+
+        grown = text + "\n".join(self._LINES[30:]) + "\n"
+        appended = self._append(app_client, grown, loc, payload["checksum"], tail["overlap_offset"])
+        record, chunks = self._stored(loc)
+        ids_after = json.loads(record["chunk_ids"])
+
+        assert appended and all(t in grown[tail["overlap_char_offset"]:] for t in appended)
+        assert len(appended) < len(ids_after)
+        assert ids_after[:len(ids_before) - 1] == ids_before[:-1]
+        assert set(chunks) == set(ids_after)
+        for index, chunk_id in enumerate(ids_after):
+            chunk = chunks[chunk_id]
+            assert chunk.index == index
+            assert grown[chunk.metadata["start"]:chunk.metadata["end"]] == chunk.text
+        assert "Entry 59" in chunks[ids_after[-1]].text
+
+    def test_stale_append_keeps_chunks_and_drops_tail_state(self, app_client):
+        loc = _new_locator("tail_stale")
+        text = "\n".join(self._LINES[:20]) + "\n"
+        self._full(app_client, text, loc)
+        record, _ = self._stored(loc)
+        tail = json.loads(record["metadata_json"])["tail"]
+        ids_before = json.loads(record["chunk_ids"])
+
+        grown = text + self._LINES[20] + "\n"
+        appended = self._append(app_client, grown, loc, "not-the-stored-checksum", tail["overlap_offset"])
+        record, chunks = self._stored(loc)
+
+        assert appended == []
+        assert json.loads(record["chunk_ids"]) == ids_before
+        assert set(chunks) == set(ids_before)
+        assert "tail" not in json.loads(record["metadata_json"])
@@ -2,7 +2,8 @@
 test_metadata_db.py — SQLite metadata layer tests.
 
 All tests use the in-memory db_conn fixture (no disk, no side-effects).
-Functions are called directly; DB path is never touched.
+Functions are called directly; DB path is never touched, except by the connection
+manager and queue claim tests, which patch it to a temporary file.
 """
 import json
 import uuid
@@ -353,6 +354,32 @@ class TestDocumentPartsQueueRaw:
         ).fetchone()
         assert row is not None
 
+    def test_duplicate_part_in_run_rejected(self, db_conn):
+        import sqlite3
+        rid = str(uuid.uuid4())
+        pid = str(uuid.uuid4())
+        self._enqueue(db_conn, rid, pid)
+        with pytest.raises(sqlite3.IntegrityError):
+            self._enqueue(db_conn, rid, pid)
+
+    def test_same_part_allowed_in_different_runs(self, db_conn):
+        pid = str(uuid.uuid4())
+        self._enqueue(db_conn, str(uuid.uuid4()), pid)
+        self._enqueue(db_conn, str(uuid.uuid4()), pid)
+        count = db_conn.execute(
+            "SELECT COUNT(*) FROM document_parts_queue WHERE document_part_id=?", (pid,)
+        ).fetchone()[0]
+        assert count == 2
+
+    def test_dequeue_uses_run_index(self, db_conn):
+        plan = db_conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM document_parts_queue WHERE run_id=? ORDER BY created_at, id LIMIT 8",
+            ("r",),
+        ).fetchall()
+        details = " ".join(row[3] for row in plan)
+        assert "idx_document_parts_queue_run_created" in details
+        assert "TEMP B-TREE" not in details
+
     def test_clear_queue_for_run(self, db_conn):
         rid = str(uuid.uuid4())
         for _ in range(3):
@@ -365,6 +392,208 @@ class TestDocumentPartsQueueRaw:
         assert count == 0
 
 
+# ===========================================================================
+# db — connection manager and transactions
+# ===========================================================================
+
+class TestConnectionManager:
+
+    @pytest.fixture
+    def db(self, tmp_path):
+        from unittest.mock import patch
+        with patch("storage.metadata_db.db.DB_PATH", tmp_path / "conn.db"):
+            from storage.metadata_db import db
+            db.execute("CREATE TABLE t (v INTEGER)")
+            yield db
+            db.close_connection()
+
+    def test_connection_reused_within_thread(self, db):
+        assert db.get_connection() is db.get_connection()
+
+    def test_threads_get_separate_connections(self, db):
+        import threading
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(db.get_connection()))
+        thread.start()
+        thread.join()
+        assert seen[0] is not db.get_connection()
+
+    def test_wal_and_synchronous_normal(self, db):
+        assert db.fetch_one("PRAGMA journal_mode")[0] == "wal"
+        assert db.fetch_one("PRAGMA synchronous")[0] == 1  # NORMAL
+
+    def test_transaction_commits_all_statements(self, db):
+        with db.transaction():
+            db.execute("INSERT INTO t (v) VALUES (1)")
+            db.execute_many("INSERT INTO t (v) VALUES (?)", [(2,), (3,)])
+        assert db.fetch_one("SELECT COUNT(*) FROM t")[0] == 3
+
+    def test_transaction_rolls_back_on_error(self, db):
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                db.execute("INSERT INTO t (v) VALUES (1)")
+                raise RuntimeError("boom")
+        assert db.fetch_one("SELECT COUNT(*) FROM t")[0] == 0
+
+    def test_nested_transaction_joins_outer(self, db):
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                with db.transaction():
+                    db.execute("INSERT INTO t (v) VALUES (1)")
+                raise RuntimeError("boom")
+        assert db.fetch_one("SELECT COUNT(*) FROM t")[0] == 0
+
+    def test_writes_invisible_to_other_threads_until_commit(self, db):
+        import threading
+
+        def count_from_other_thread():
+            result = []
+            thread = threading.Thread(target=lambda: result.append(db.fetch_one("SELECT COUNT(*) FROM t")[0]))
+            thread.start()
+            thread.join()
+            return result[0]
+
+        with db.transaction():
+            db.execute("INSERT INTO t (v) VALUES (1)")
+            assert count_from_other_thread() == 0
+        assert count_from_other_thread() == 1
+
+    def test_failed_statement_releases_write_lock(self, db, monkeypatch):
+        import sqlite3
+        import threading
+        monkeypatch.setattr(db, "BUSY_TIMEOUT_SECONDS", 0.1)
+        db.execute("CREATE TABLE u (v INTEGER UNIQUE)")
+        db.execute("INSERT INTO u (v) VALUES (1)")
+        with pytest.raises(sqlite3.IntegrityError):
+            db.execute("INSERT INTO u (v) VALUES (1)")
+        assert not db.get_connection().in_transaction
+
+        errors = []
+
+        def write():
+            try:
+                db.execute("INSERT INTO u (v) VALUES (2)")
+            except sqlite3.OperationalError as e:
+                errors.append(e)
+            finally:
+                db.close_connection()
+
+        thread = threading.Thread(target=write)
+        thread.start()
+        thread.join()
+        assert errors == []
+        assert db.fetch_one("SELECT COUNT(*) FROM u")[0] == 2
+
+
+# ===========================================================================
+# document_parts_queue — claims and leases
+# ===========================================================================
+
+class TestDocumentPartsQueueClaims:
+
+    @pytest.fixture
+    def queue_db(self, tmp_path):
+        from unittest.mock import patch
+        with patch("storage.metadata_db.db.DB_PATH", tmp_path / "queue.db"):
+            from storage.metadata_db.db import init_db, get_connection
+            init_db()
+            yield get_connection
+
+    def _enqueue(self, get_connection, run_id: str, count: int) -> None:
+        with get_connection() as conn:
+            for i in range(count):
+                now = _now()
+                conn.execute(
+                    """
+                    INSERT INTO document_parts_queue
+                        (run_id, document_part_id, checksum, source_type,
+                         source_instance_id, device_id, source_path, metadata_json,
+                         unit_locator, content_type, extractor_name, extractor_version,
+                         created_at, updated_at, text, scope_json)
+                    VALUES (?, ?, 'ck', 'filesystem', 'si', 'dev', '/tmp/f.txt',
+                            '{}', 'fs:/tmp/f.txt', 'text/plain', 'plaintext', '0.1',
+                            ?, ?, 'hello', '{}')
+                    """,
+                    (run_id, f"part-{i}", now, now),
+                )
+            conn.commit()
+
+    def test_workers_never_claim_the_same_part(self, queue_db):
+        from storage.metadata_db.document_parts_queue import claim_document_parts_from_queue
+        rid = str(uuid.uuid4())
+        self._enqueue(queue_db, rid, 5)
+
+        first = claim_document_parts_from_queue("w1", [rid], limit=3, lease_seconds=60)
+        second = claim_document_parts_from_queue("w2", [rid], limit=3, lease_seconds=60)
+
+        assert [p["document_part_id"] for p in first] == ["part-0", "part-1", "part-2"]
+        assert [p["document_part_id"] for p in second] == ["part-3", "part-4"]
+        assert claim_document_parts_from_queue("w3", [rid], limit=3, lease_seconds=60) == []
+
+    def test_expired_lease_is_reclaimed(self, queue_db):
+        from storage.metadata_db.document_parts_queue import claim_document_parts_from_queue
+        rid = str(uuid.uuid4())
+        self._enqueue(queue_db, rid, 1)
+
+        claim_document_parts_from_queue("crashed", [rid], limit=1, lease_seconds=-1)
+        reclaimed = claim_document_parts_from_queue("w2", [rid], limit=1, lease_seconds=60)
+
+        assert len(reclaimed) == 1
+        assert reclaimed[0]["claimed_by"] == "w2"
+        assert reclaimed[0]["attempts"] == 2
+
+    def test_only_lease_holder_completes_part(self, queue_db):
+        from storage.metadata_db.document_parts_queue import (
+            claim_document_parts_from_queue, complete_claimed_document_part, count_document_parts_in_queue,
+        )
+        rid = str(uuid.uuid4())
+        self._enqueue(queue_db, rid, 1)
+        part = claim_document_parts_from_queue("w1", [rid], limit=1, lease_seconds=60)[0]
+
+        assert complete_claimed_document_part(part["id"], "w2") is False
+        assert count_document_parts_in_queue(rid) == 1
+        assert complete_claimed_document_part(part["id"], "w1") is True
+        assert count_document_parts_in_queue(rid) == 0
+
+    def test_release_makes_parts_claimable(self, queue_db):
+        from storage.metadata_db.document_parts_queue import (
+            claim_document_parts_from_queue, release_claimed_document_parts,
+        )
+        rid = str(uuid.uuid4())
+        self._enqueue(queue_db, rid, 2)
+        claim_document_parts_from_queue("w1", [rid], limit=2, lease_seconds=60)
+
+        assert release_claimed_document_parts("w1") == 2
+        reclaimed = claim_document_parts_from_queue("w2", [rid], limit=2, lease_seconds=60)
+        assert [p["attempts"] for p in reclaimed] == [1, 1]
+
+    def test_add_to_queue_is_idempotent(self, queue_db):
+        from storage.metadata_db.document_parts_queue import add_document_part_to_queue, count_document_parts_in_queue
+        rid = str(uuid.uuid4())
+        now = datetime.utcnow()
+        part = {
+            "document_part_id": "p1", "checksum": "ck", "source_type": "filesystem",
+            "source_instance_id": "si", "device_id": "dev", "source_path": "/tmp/f.txt",
+            "metadata": {}, "unit_locator": "fs:/tmp/f.txt", "content_type": "text/plain",
+            "extractor_name": "plaintext", "extractor_version": "0.1",
+            "created_at": now, "updated_at": now, "text": "hello", "scope_json": {},
+        }
+
+        assert add_document_part_to_queue(part, rid) == {"status": "added_to_queue"}
+        assert add_document_part_to_queue(part, rid) == {"status": "already_in_queue"}
+        assert count_document_parts_in_queue(rid) == 1
+
+    def test_run_completion_claimed_once(self, queue_db):
+        from storage.metadata_db.indexing_runs import claim_run_completion, start_indexing
+        rid = str(uuid.uuid4())
+        with queue_db() as conn:
+            _insert_run(conn, rid, {"type": "filesystem", "directories": ["/tmp"]})
+        start_indexing(rid)
+
+        assert claim_run_completion(rid) is True
+        assert claim_run_completion(rid) is False
+
+
 # ===========================================================================
 # monitored_sources — low-level SQL
 # ===========================================================================
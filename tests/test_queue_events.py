@@ -0,0 +1,61 @@
+"""
+test_queue_events.py — QueueNotifier wakeups for idle indexing loops.
+
+In-process notifications and cross-connection commits (standing in for a
+standalone worker process) must both end a wait; otherwise it times out.
+"""
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from api.app.queue_events import QueueNotifier
+
+
+@pytest.fixture
+def notifier(tmp_path):
+    with patch("storage.metadata_db.db.DB_PATH", tmp_path / "events.db"):
+        from storage.metadata_db import db
+        db.execute("CREATE TABLE t (v INTEGER)")
+        yield QueueNotifier()
+        db.close_connection()
+
+
+def _in_thread(fn, delay: float = 0.05) -> threading.Thread:
+    def run():
+        time.sleep(delay)
+        fn()
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+class TestQueueNotifier:
+
+    def test_times_out_without_changes(self, notifier):
+        start = time.monotonic()
+        assert notifier.wait(notifier.generation, timeout=0.2, check_interval=0.05) is False
+        assert time.monotonic() - start >= 0.2
+
+    def test_notify_wakes_waiter(self, notifier):
+        generation = notifier.generation
+        thread = _in_thread(notifier.notify)
+        start = time.monotonic()
+        assert notifier.wait(generation, timeout=5, check_interval=5) is True
+        assert time.monotonic() - start < 1
+        thread.join()
+
+    def test_notify_before_wait_is_not_lost(self, notifier):
+        generation = notifier.generation
+        notifier.notify()
+        assert notifier.wait(generation, timeout=0.1) is True
+
+    def test_commit_from_other_connection_wakes_waiter(self, notifier):
+        from storage.metadata_db import db
+        generation = notifier.generation
+        thread = _in_thread(lambda: db.execute("INSERT INTO t (v) VALUES (1)"))
+        start = time.monotonic()
+        assert notifier.wait(generation, timeout=5, check_interval=0.05) is True
+        assert time.monotonic() - start < 1
+        thread.join()
@@ -1,10 +1,11 @@
 """
 test_vector_store.py — InMemoryVectorStore unit tests.
 
-No Qdrant, no network.  Tests the store used in CI and the fallback store
+No Qdrant server, no network.  Tests the store used in CI and the fallback store
 used in tests throughout the project.
 """
 import math
+import random
 import hashlib
 from pathlib import Path
 
@@ -116,6 +117,208 @@ class TestAdd:
         assert len(results) == 5
 
 
+# ===========================================================================
+# add_batch
+# ===========================================================================
+
+class TestAddBatch:
+
+    def test_batch_chunks_all_stored(self):
+        store = _store()
+        chunks = [_make_chunk(i, f"text {i}") for i in range(4)]
+        vecs = []
+        for i in range(4):
+            v = [0.0] * DIM
+            v[i] = 1.0
+            vecs.append(EmbeddingOutput(dense=v))
+        store.add_batch(chunks, vecs)
+        results = store.search(EmbeddingOutput(dense=[1.0] + [0.0] * (DIM - 1)), top_k=10)
+        assert {r[0].id for r in results} == {c.id for c in chunks}
+
+    def test_batch_replaces_existing_ids(self):
+        store = _store()
+        chunk = _make_chunk(0, "original")
+        store.add(chunk, _unit([1, 0, 0, 0, 0, 0, 0, 0]))
+        store.add_batch([chunk], [_unit([0, 1, 0, 0, 0, 0, 0, 0])])
+        results = store.search(_unit([0, 1, 0, 0, 0, 0, 0, 0]), top_k=10)
+        assert [r[0].id for r in results] == [chunk.id]
+        assert abs(results[0][1] - 1.0) < 1e-6
+
+    def test_batch_length_mismatch_raises(self):
+        store = _store()
+        with pytest.raises(ValueError):
+            store.add_batch([_make_chunk(0), _make_chunk(1)], [_unit([1, 0, 0, 0, 0, 0, 0, 0])])
+
+    def test_batch_wrong_dimension_raises(self):
+        store = _store()
+        with pytest.raises(ValueError):
+            store.add_batch([_make_chunk(0)], [EmbeddingOutput(dense=[1.0] * (DIM + 1))])
+
+    def test_empty_batch_is_noop(self):
+        store = _store()
+        store.add_batch([], [])
+        assert store.search(EmbeddingOutput(dense=[1.0] + [0.0] * (DIM - 1)), top_k=10) == []
+
+
+class TestMatrixStorage:
+
+    def test_grows_past_initial_capacity(self):
+        from storage.vector_db import in_memory
+        store = _store()
+        n = in_memory.INITIAL_CAPACITY + 5
+        store.add_batch([_make_chunk(i, f"t{i}") for i in range(n)], [_unit([1.0 + i] + [1.0] * (DIM - 1)) for i in range(n)])
+        assert len(store) == n
+        assert store.search(_unit([1.0] + [0.0] * (DIM - 1)), top_k=1)[0][0].index == n - 1
+
+    def test_overwrite_reuses_row(self):
+        store = _store()
+        chunk = _make_chunk(0)
+        store.add(chunk, _unit([1, 0, 0, 0, 0, 0, 0, 0]))
+        store.add(chunk, _unit([0, 1, 0, 0, 0, 0, 0, 0]))
+        assert len(store._chunks) == 1
+
+    def test_compaction_keeps_live_rows_searchable(self, monkeypatch):
+        from storage.vector_db import in_memory
+        monkeypatch.setattr(in_memory, "COMPACT_MIN_DELETED", 2)
+        store = _store()
+        chunks = [_make_chunk(i, f"t{i}") for i in range(4)]
+        for i, c in enumerate(chunks):
+            v = [0.0] * DIM; v[i] = 1.0
+            store.add(c, EmbeddingOutput(dense=v))
+        store.remove_chunks([chunks[0].id, chunks[2].id])
+        assert len(store._chunks) == 2 and store._deleted == 0
+        results = store.search(EmbeddingOutput(dense=[0.0, 0.0, 0.0, 1.0] + [0.0] * (DIM - 4)), top_k=1)
+        assert results[0][0].id == chunks[3].id
+
+    def test_top_k_rows_orders_best_first(self):
+        import numpy as np
+        from storage.vector_db.in_memory import top_k_rows
+        scores = np.array([0.1, 0.9, -np.inf, 0.5, 0.9], dtype=np.float32)
+        assert top_k_rows(scores, 3).tolist() == [1, 4, 3]
+        assert top_k_rows(scores, 10).tolist() == [1, 4, 3, 0]
+
+
+class TestLocalVectorStore:
+
+    def _open(self, path, **kwargs):
+        from storage.vector_db.local_store import LocalVectorStore
+        return LocalVectorStore(str(path), DIM, background_compaction=False, **kwargs)
+
+    def _one_hot(self, i):
+        v = [0.0] * DIM
+        v[i % DIM] = 1.0
+        return EmbeddingOutput(dense=v)
+
+    def test_vectors_survive_reopen(self, tmp_path):
+        store = self._open(tmp_path)
+        chunks = [_make_chunk(i, f"t{i}") for i in range(3)]
+        store.add_batch(chunks, [self._one_hot(i) for i in range(3)])
+        reopened = self._open(tmp_path)
+        results = reopened.search(self._one_hot(1), top_k=1)
+        assert results[0][0].id == chunks[1].id and results[0][0].text == "t1"
+        assert reopened.count_chunks() == 3
+
+    def test_overwrite_and_remove(self, tmp_path):
+        store = self._open(tmp_path)
+        chunks = [_make_chunk(i, f"t{i}") for i in range(3)]
+        store.add_batch(chunks, [self._one_hot(i) for i in range(3)])
+        store.add(chunks[0], self._one_hot(5))
+        store.remove_by_document_part_ids([chunks[1].document_part_id])
+        assert store.search(self._one_hot(5), top_k=1)[0][0].id == chunks[0].id
+        assert {c.id for c, _ in store.search(self._one_hot(0), top_k=10)} == {chunks[0].id, chunks[2].id}
+        assert self._open(tmp_path).count_chunks() == 2
+
+    def test_filters_use_the_index(self, tmp_path):
+        from datetime import datetime
+        from storage.vector_db.vector_store import SearchFilter
+        store = self._open(tmp_path)
+        chunks = [
+            _make_chunk(i).model_copy(update={"device_id": "laptop" if i < 2 else "pi", "created_at": datetime(2024, 1, 1 + i)})
+            for i in range(4)
+        ]
+        store.add_batch(chunks, [_unit([1.0] * DIM)] * 4)
+        filters = SearchFilter(device_ids=["pi"], created_before=datetime(2024, 1, 4))
+        assert [c.index for c, _ in store.search(_unit([1.0] * DIM), top_k=10, filters=filters)] == [2]
+        assert store.search(_unit([1.0] * DIM), top_k=10, filters=SearchFilter(device_ids=["phone"])) == []
+
+    def test_compaction_merges_segments(self, tmp_path, monkeypatch):
+        from storage.vector_db import local_store
+        monkeypatch.setattr(local_store, "COMPACT_MAX_SEGMENTS", 3)
+        store = self._open(tmp_path)
+        chunks = [_make_chunk(i, f"t{i}") for i in range(4)]
+        for i, chunk in enumerate(chunks):
+            store.add(chunk, self._one_hot(i))
+        store.remove_chunks([chunks[0].id])
+        assert len(list(tmp_path.glob("segment-*.npy"))) == 1
+        reopened = self._open(tmp_path)
+        assert reopened.search(self._one_hot(3), top_k=1)[0][0].id == chunks[3].id
+        assert reopened.count_chunks() == 3
+
+    def _indexed(self, path, monkeypatch, count=64, **params):
+        from storage.vector_db import ivf
+        monkeypatch.setattr(ivf, "MIN_INDEXED_POINTS", 0)
+        store = self._open(path, index=ivf.IVFParams(nlist=4, **params))
+        rng = random.Random(7)
+        chunks = [_make_chunk(i, f"t{i}") for i in range(count)]
+        vectors = [_unit([rng.uniform(-1, 1) for _ in range(DIM)]) for _ in chunks]
+        store.add_batch(chunks, vectors)
+        store.compact()
+        return store, chunks, vectors
+
+    def test_ivf_index_is_trained_and_matches_exact_search(self, tmp_path, monkeypatch):
+        store, chunks, vectors = self._indexed(tmp_path / "ivf", monkeypatch, nprobe=4, oversampling=100)
+        assert list((tmp_path / "ivf").glob("ivf-centroids-*.npy"))
+        flat = self._open(tmp_path / "flat")
+        flat.add_batch(chunks, vectors)
+        query = _unit([0.3, -0.2, 0.9, 0.1, -0.5, 0.4, 0.2, -0.1])
+        assert [c.id for c, _ in store.search(query, top_k=5)] == [c.id for c, _ in flat.search(query, top_k=5)]
+
+    def test_ivf_index_follows_adds_removes_and_reopen(self, tmp_path, monkeypatch):
+        from storage.vector_db.ivf import IVFParams
+        store, chunks, _ = self._indexed(tmp_path, monkeypatch, nprobe=1, oversampling=100)
+        extra = _make_chunk(100, "new")
+        store.add(extra, self._one_hot(2))
+        assert store.search(self._one_hot(2), top_k=1)[0][0].id == extra.id
+        store.remove_chunks([extra.id])
+        assert extra.id not in {c.id for c, _ in store.search(self._one_hot(2), top_k=10)}
+
+        reopened = self._open(tmp_path, index=IVFParams(nlist=4, nprobe=1, oversampling=100))
+        assert len(reopened.search(self._one_hot(2), top_k=10)) == 10
+
+    def test_narrow_filter_falls_back_to_exact_search(self, tmp_path, monkeypatch):
+        from storage.vector_db.vector_store import SearchFilter
+        store, chunks, _ = self._indexed(tmp_path, monkeypatch, nprobe=1, oversampling=1)
+        target = chunks[5].model_copy(update={"device_id": "pi"})
+        store.add(target, self._one_hot(0))
+        results = store.search(self._one_hot(7), top_k=3, filters=SearchFilter(device_ids=["pi"]))
+        assert [c.id for c, _ in results] == [target.id]
+
+    def test_dimension_change_is_refused(self, tmp_path):
+        from storage.vector_db.local_store import LocalVectorStore
+        self._open(tmp_path)
+        with pytest.raises(ValueError):
+            LocalVectorStore(str(tmp_path), DIM * 2)
+
+
+class TestUpsertBatchSplitting:
+
+    def test_split_respects_max_bytes(self):
+        from storage.vector_db.vector_store import split_by_bytes
+        batches = list(split_by_bytes(list("abcde"), [4, 4, 4, 4, 4], max_bytes=8))
+        assert batches == [["a", "b"], ["c", "d"], ["e"]]
+
+    def test_oversized_item_gets_own_batch(self):
+        from storage.vector_db.vector_store import split_by_bytes
+        batches = list(split_by_bytes(["small", "huge", "small"], [1, 100, 1], max_bytes=10))
+        assert batches == [["small"], ["huge"], ["small"]]
+
+    def test_colbert_vectors_dominate_estimate(self):
+        from storage.vector_db.vector_store import estimate_point_bytes
+        dense_only = EmbeddingOutput(dense=[0.0] * DIM)
+        with_colbert = EmbeddingOutput(dense=[0.0] * DIM, colbert_vec=[[0.0] * DIM] * 50)
+        assert estimate_point_bytes(with_colbert, {}) > 40 * estimate_point_bytes(dense_only, {})
+
+
 # ===========================================================================
 # search
 # ===========================================================================
@@ -184,6 +387,208 @@ class TestSearch:
         assert results == []
 
 
+# ===========================================================================
+# Filtered search
+# ===========================================================================
+
+class TestFilteredSearch:
+
+    def _filled(self):
+        from datetime import datetime
+        store = _store()
+        for i in range(6):
+            chunk = _make_chunk(i).model_copy(update={
+                "device_id": "laptop" if i < 3 else "pi",
+                "source_type": "thunderbird" if i % 2 else "filesystem",
+                "created_at": datetime(2024, 1, 1 + i),
+            })
+            store.add(chunk, _unit([1.0 + i] + [0.5] * (DIM - 1)))
+        return store
+
+    def test_filter_restricts_results(self):
+        from storage.vector_db.vector_store import SearchFilter
+        filters = SearchFilter(device_ids=["laptop"], source_types=["thunderbird"])
+        results = self._filled().search(_unit([1.0] * DIM), top_k=10, filters=filters)
+        assert [c.index for c, _ in results] == [1]
+
+    def test_date_range_is_half_open(self):
+        from datetime import datetime
+        from storage.vector_db.vector_store import SearchFilter
+        filters = SearchFilter(created_since=datetime(2024, 1, 2), created_before=datetime(2024, 1, 4))
+        results = self._filled().search(_unit([1.0] * DIM), top_k=10, filters=filters)
+        assert sorted(c.index for c, _ in results) == [1, 2]
+
+    def test_date_filter_skips_chunks_without_date(self):
+        from datetime import datetime
+        from storage.vector_db.vector_store import SearchFilter
+        store = _store()
+        store.add(_make_chunk(0), _unit([1.0] * DIM))
+        assert store.search(_unit([1.0] * DIM), top_k=5, filters=SearchFilter(created_since=datetime(2000, 1, 1))) == []
+
+    def test_empty_filter_matches_everything(self):
+        from storage.vector_db.vector_store import SearchFilter
+        assert SearchFilter(device_ids=[]).is_empty()
+        assert len(self._filled().search(_unit([1.0] * DIM), top_k=10, filters=SearchFilter())) == 6
+
+    def test_qdrant_filter_conditions(self):
+        pytest.importorskip("qdrant_client")
+        from datetime import datetime
+        from storage.vector_db.qdrant_filters import to_qdrant_filter
+        from storage.vector_db.vector_store import SearchFilter
+        assert to_qdrant_filter(None) is None
+        assert to_qdrant_filter(SearchFilter()) is None
+        qfilter = to_qdrant_filter(SearchFilter(device_ids=["laptop"], created_since=datetime(2024, 1, 1)))
+        assert [c.key for c in qfilter.must] == ["device_id", "created_at"]
+        assert qfilter.must[0].match.any == ["laptop"]
+
+
+# ===========================================================================
+# Qdrant collection profiles
+# ===========================================================================
+
+class TestCollectionProfiles:
+
+    def test_default_profile_is_unquantized(self):
+        pytest.importorskip("qdrant_client")
+        from storage.vector_db.qdrant_profiles import get_collection_profile
+        profile = get_collection_profile("default")
+        params = profile.vector_params("dense", DIM)
+        assert params.quantization_config is None and not params.on_disk
+        assert profile.search_params("dense") is None
+
+    def test_low_memory_profile_layout(self):
+        pytest.importorskip("qdrant_client")
+        from qdrant_client import models
+        from storage.vector_db.qdrant_profiles import get_collection_profile
+        profile = get_collection_profile("low-memory")
+        dense = profile.vector_params("dense", DIM)
+        colbert = profile.vector_params("colbert", DIM)
+        assert isinstance(dense.quantization_config, models.ScalarQuantization)
+        assert isinstance(colbert.quantization_config, models.BinaryQuantization)
+        assert colbert.on_disk and not colbert.quantization_config.binary.always_ram
+        assert colbert.hnsw_config.m == 0
+        quantization = profile.search_params("dense").quantization
+        assert quantization.rescore and quantization.oversampling == 2.0
+
+    def test_unknown_profile_raises(self):
+        pytest.importorskip("qdrant_client")
+        from storage.vector_db.qdrant_profiles import get_collection_profile
+        with pytest.raises(ValueError):
+            get_collection_profile("tiny")
+
+    def test_mismatches_of_existing_collection(self):
+        pytest.importorskip("qdrant_client")
+        from qdrant_client import QdrantClient
+        from storage.vector_db.qdrant_profiles import get_collection_profile
+        client = QdrantClient(":memory:")
+        scalar = get_collection_profile("scalar")
+        client.create_collection("chunks", vectors_config=scalar.vector_params("dense", DIM))
+        info = client.get_collection("chunks")
+        assert scalar.mismatches(info) == []
+        assert len(get_collection_profile("default").mismatches(info)) == 2
+
+
+# ===========================================================================
+# Versioned Qdrant collections and online rebuilds (local-mode Qdrant)
+# ===========================================================================
+
+class TestCollectionRebuild:
+
+    @pytest.fixture
+    def qdrant_store(self, tmp_path):
+        pytest.importorskip("qdrant_client")
+        from unittest.mock import patch
+        from qdrant_client import QdrantClient
+        from storage.metadata_db.db import close_connection, init_db
+        with patch("storage.metadata_db.db.DB_PATH", tmp_path / "rebuild.db"):
+            init_db()
+            from storage.vector_db.qdrant_store import QdrantVectorStore, VECTOR_SIZE
+            store = QdrantVectorStore(QdrantClient(":memory:"))
+            self.dim = VECTOR_SIZE
+            yield store
+            close_connection()
+
+    def _add(self, store, idx, text="chunk text"):
+        chunk = _make_chunk(idx, text)
+        store.add(chunk, _unit([1.0 + idx] + [0.5] * (self.dim - 1)))
+        return chunk
+
+    def test_new_store_creates_versioned_collection_behind_alias(self, qdrant_store):
+        from storage.vector_db.qdrant_collections import resolve_collection
+        assert resolve_collection(qdrant_store.client, "chunks") == "chunks_v1"
+
+    def test_rebuild_copies_points_and_swaps_alias(self, qdrant_store):
+        from storage.vector_db.qdrant_collections import resolve_collection
+        from storage.vector_db.rebuild import CollectionRebuild
+        chunks = [self._add(qdrant_store, i, f"text {i}") for i in range(5)]
+
+        # Local-mode Qdrant is not thread-safe, so the copy runs on one worker here
+        rebuild = CollectionRebuild(qdrant_store, batch_size=2, workers=1, settle_seconds=0)
+        assert rebuild.run() == "chunks_v2"
+
+        client = qdrant_store.client
+        assert resolve_collection(client, "chunks") == "chunks_v2"
+        assert [c.name for c in client.get_collections().collections] == ["chunks_v2"]
+        assert rebuild.copied_points == 5
+        results = qdrant_store.search(_unit([1.0] + [0.5] * (self.dim - 1)), top_k=10)
+        assert {c.id for c, _ in results} == {c.id for c in chunks}
+
+    def test_payload_indexes_are_created_once_per_collection(self, qdrant_store):
+        from unittest.mock import patch
+        from qdrant_client import QdrantClient
+        from storage.vector_db.qdrant_filters import PAYLOAD_INDEXES
+        from storage.vector_db.qdrant_store import QdrantVectorStore
+        from storage.vector_db.rebuild import CollectionRebuild
+        client = QdrantClient(":memory:")
+        with patch.object(client, "create_payload_index", wraps=client.create_payload_index) as spy:
+            store = QdrantVectorStore(client)
+            assert sorted(c.kwargs["field_name"] for c in spy.call_args_list) == sorted(PAYLOAD_INDEXES)
+
+            spy.reset_mock()
+            CollectionRebuild(store, workers=1, settle_seconds=0).run()
+        assert {c.kwargs["collection_name"] for c in spy.call_args_list} == {"chunks_v2"}
+        assert sorted(c.kwargs["field_name"] for c in spy.call_args_list) == sorted(PAYLOAD_INDEXES)
+
+    def test_writes_during_rebuild_are_mirrored_and_logged(self, qdrant_store):
+        from storage.metadata_db.vector_rebuilds import changes_after, create_rebuild
+        from storage.vector_db.qdrant_store import QdrantVectorStore
+        qdrant_store.create_collection("chunks_v2")
+        rebuild_id = create_rebuild("chunks", "chunks_v1", "chunks_v2")
+
+        store = QdrantVectorStore(qdrant_store.client)
+        chunk = self._add(store, 0)
+        assert store.client.count("chunks_v2").count == 1
+        store.remove_by_document_part_ids([chunk.document_part_id])
+        assert store.client.count("chunks_v2").count == 0
+        assert [row["field"] for row in changes_after(rebuild_id, 0)] == ["document_part_id", "document_part_id"]
+
+    def test_catch_up_replaces_stale_copies(self, qdrant_store):
+        from qdrant_client.models import PointStruct
+        from storage.metadata_db.vector_rebuilds import create_rebuild, record_changes
+        from storage.vector_db.rebuild import CollectionRebuild
+        from storage.vector_db.qdrant_store import chunk_id_to_uuid
+        chunk = self._add(qdrant_store, 0, "current")
+        qdrant_store.create_collection("chunks_v2")
+        rebuild_id = create_rebuild("chunks", "chunks_v1", "chunks_v2")
+        # The bulk copy wrote an older version of the point after the mirrored write
+        qdrant_store.client.upsert("chunks_v2", points=[PointStruct(
+            id=chunk_id_to_uuid(chunk.id),
+            vector=[0.0] * (self.dim - 1) + [1.0],
+            payload={"document_part_id": chunk.document_part_id, "stale": True},
+        )])
+        record_changes(rebuild_id, "document_part_id", [chunk.document_part_id])
+
+        CollectionRebuild(qdrant_store, settle_seconds=0)._catch_up(rebuild_id, "chunks_v1", "chunks_v2")
+        [point] = qdrant_store.client.retrieve("chunks_v2", ids=[chunk_id_to_uuid(chunk.id)], with_payload=True)
+        assert "stale" not in point.payload and point.payload["chunk_id"] == chunk.id
+
+    def test_second_concurrent_rebuild_is_refused(self, qdrant_store):
+        from storage.metadata_db.vector_rebuilds import create_rebuild
+        create_rebuild("chunks", "chunks_v1", "chunks_v2")
+        with pytest.raises(RuntimeError):
+            create_rebuild("chunks", "chunks_v1", "chunks_v3")
+
+
 # ===========================================================================
 # remove_chunks
 # ===========================================================================
@@ -217,6 +622,27 @@ class TestRemoveChunks:
         assert chunks[0].id not in ids
         assert chunks[1].id in ids
 
+    def test_remove_by_document_part_ids(self):
+        store = _store()
+        chunks = [_make_chunk(i, f"t{i}") for i in range(3)]
+        for c in chunks:
+            store.add(c, _unit([1.0] * DIM))
+        store.remove_by_document_part_ids([chunks[0].document_part_id, chunks[2].document_part_id])
+        assert [r[0].id for r in store.search(_unit([1.0] * DIM), top_k=10)] == [chunks[1].id]
+
+    def test_remove_by_scope(self):
+        from loseme_core.ids import make_scope_id
+        store = _store()
+        scope = {"type": "filesystem", "directories": ["/tmp"]}
+        in_scope = _make_chunk(0).model_copy(update={"scope_id": make_scope_id(scope)})
+        other = _make_chunk(1).model_copy(update={"scope_id": make_scope_id({"type": "filesystem", "directories": ["/home"]})})
+        store.add(in_scope, _unit([1.0] * DIM))
+        store.add(other, _unit([1.0] * DIM))
+        store.remove_by_scope("thunderbird", scope)
+        assert len(store.search(_unit([1.0] * DIM), top_k=10)) == 2
+        store.remove_by_scope("filesystem", {"directories": ["/tmp"], "type": "filesystem"})
+        assert [r[0].id for r in store.search(_unit([1.0] * DIM), top_k=10)] == [other.id]
+
 
 # ===========================================================================
 # clear